@@ -0,0 +1,337 @@
+"""
+Append-only columnar audit log of every review (Parquet).
+
+The UI, the batch runner, the watch folder and the review service append one row per result
+row of every review they finish: project, contractor, file names and SHA-256
+hashes, label, field, CSV value, status (and its outcome: pass / fail /
+missing / near / budget), explanation and the review's run time. Rows are buffered
+in memory and written as a new Parquet part file once QC_AUDIT_FLUSH_ROWS
+rows are waiting, QC_AUDIT_FLUSH_S seconds after the first one, or on
+close(). Files are never rewritten in place. Compaction is size-tiered: once
+a month partition holds more than QC_AUDIT_COMPACT_PARTS part files they are
+merged into one file sorted by label (so filters on label and month skip whole
+files and row groups), and once it holds more than that many merged files of
+one tier those are merged into one of the next. Earlier output is left alone
+until its own tier fills, so each row is rewritten once per tier rather than
+on every compaction of its month.
+
+    audit = AuditLog.from_env()        # None when QC_AUDIT_LOG_DIR=off
+    audit.append(record, source="batch")
+    audit.close()
+
+    python audit_log.py failures --label Utility --month 2026-10
+    python audit_log.py compact
+
+The log is a hive-partitioned dataset (<dir>/month=YYYY-MM/*.parquet), so any
+Arrow / pandas / DuckDB reader can scan it directly. pyarrow is imported on
+first write, not at startup.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from guard import BUDGET_EXCEEDED
+from qc_core import NEAR_MATCH
+from review_cache import RULESET_VERSION
+
+DEFAULT_AUDIT_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "qc-review", "audit")
+DEFAULT_FLUSH_ROWS = 5000
+DEFAULT_FLUSH_S = 60
+DEFAULT_COMPACT_PARTS = 32
+
+# A compaction lock older than this was left behind by a crashed process
+STALE_LOCK_S = 10 * 60
+
+AUDIT_COLUMNS = (
+    "reviewed_at", "review_id", "source", "project", "contractor", "csv_file", "pdf_file", "csv_sha256",
+    "pdf_sha256", "ruleset", "review_s", "error", "label", "field", "csv_value", "status", "outcome",
+    "explanation",
+)
+
+OUTCOMES = (("✅", "pass"), ("❌", "fail"), (BUDGET_EXCEEDED, "budget"), ("⚠️", "missing"), (NEAR_MATCH, "near"))
+
+
+@lru_cache(maxsize=None)
+def audit_schema():
+    import pyarrow as pa
+
+    string_columns = [name for name in AUDIT_COLUMNS if name not in ("reviewed_at", "review_s")]
+    types = {"reviewed_at": pa.timestamp("us", tz="UTC"), "review_s": pa.float64()}
+    types.update((name, pa.string()) for name in string_columns)
+    return pa.schema([(name, types[name]) for name in AUDIT_COLUMNS])
+
+
+def status_outcome(status):
+    status = str(status)
+    for prefix, outcome in OUTCOMES:
+        if status.startswith(prefix):
+            return outcome
+    return "other"
+
+
+def audit_rows(record, source, reviewed_at=None):
+    """
+    Audit rows for one batch-style review record (see batch.review_pair). A
+    review that failed with no results still gets one row, with outcome "error".
+    """
+    reviewed_at = reviewed_at or datetime.now(timezone.utc)
+    results = record.get("results") or []
+    contractor = next((str(row[2]) for row in results if row[0] == "Contractor Name"), None)
+    common = {
+        "reviewed_at": reviewed_at,
+        "review_id": uuid.uuid4().hex,
+        "source": source,
+        "project": record.get("project"),
+        "contractor": contractor,
+        "csv_file": os.path.basename(record["csv"]) if record.get("csv") else None,
+        "pdf_file": os.path.basename(record["pdf"]) if record.get("pdf") else None,
+        "csv_sha256": record.get("csv_sha256"),
+        "pdf_sha256": record.get("pdf_sha256"),
+        "ruleset": RULESET_VERSION,
+        "review_s": record.get("elapsed_s"),
+        "error": record.get("error"),
+    }
+    if not results:
+        return [dict(common, label=None, field=None, csv_value=None, status=None, outcome="error", explanation=None)]
+    return [
+        dict(common, label=label, field=field, csv_value=str(value), status=status,
+             outcome=status_outcome(status), explanation=explanation)
+        for label, field, value, status, explanation in results
+    ]
+
+
+def _month(reviewed_at):
+    return reviewed_at.strftime("%Y-%m")
+
+
+def _tier(path):
+    # part-* files are tier 0, compact-* tier 1, compact<k>-* tier k
+    prefix = os.path.basename(path).split("-", 1)[0]
+    return 0 if prefix == "part" else int(prefix[len("compact"):] or 1)
+
+
+def _tier_prefix(tier):
+    return "part" if tier == 0 else "compact" if tier == 1 else f"compact{tier}"
+
+
+class AuditLog:
+    """
+    Buffered, thread-safe appender to the partitioned Parquet dataset under
+    `directory`. Each flush writes new files only (written under a dot name,
+    then renamed), so readers never see a partial file.
+    """
+
+    def __init__(self, directory=DEFAULT_AUDIT_DIR, flush_rows=DEFAULT_FLUSH_ROWS, flush_s=DEFAULT_FLUSH_S,
+                 compact_parts=DEFAULT_COMPACT_PARTS):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_s = flush_s
+        self.compact_parts = compact_parts
+        self.rows_written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @classmethod
+    def from_env(cls):
+        directory = os.environ.get("QC_AUDIT_LOG_DIR", DEFAULT_AUDIT_DIR)
+        if not directory or directory.lower() == "off":
+            return None
+        return cls(
+            directory,
+            flush_rows=int(os.environ.get("QC_AUDIT_FLUSH_ROWS", DEFAULT_FLUSH_ROWS)),
+            flush_s=float(os.environ.get("QC_AUDIT_FLUSH_S", DEFAULT_FLUSH_S)),
+            compact_parts=int(os.environ.get("QC_AUDIT_COMPACT_PARTS", DEFAULT_COMPACT_PARTS)),
+        )
+
+    def append(self, record, source):
+        """Buffer the rows of one review record; flushes once flush_rows are waiting."""
+        rows = audit_rows(record, source)
+        with self._lock:
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.flush_rows
+            if not full and self._timer is None and self.flush_s > 0:
+                # Low-traffic writers (the UI) still land their rows within flush_s
+                self._timer = threading.Timer(self.flush_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as one new part file per month partition, then compact full partitions."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not rows:
+                return
+            import pyarrow as pa
+
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(_month(row["reviewed_at"]), []).append(row)
+            for month, month_rows in by_month.items():
+                self._write(month, pa.Table.from_pylist(month_rows, schema=audit_schema()), "part")
+            self.rows_written += len(rows)
+        for month in by_month:
+            if sum(1 for path in self._files(month) if _tier(path) == 0) > self.compact_parts:
+                self.compact(month, tiered=True)
+
+    def close(self):
+        self.flush()
+
+    def partition(self, month):
+        return os.path.join(self.directory, f"month={month}")
+
+    def months(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.directory) if name.startswith("month="))
+
+    def _files(self, month):
+        directory = self.partition(month)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                      if name.endswith(".parquet") and not name.startswith("."))
+
+    def _write(self, month, table, prefix):
+        import pyarrow.parquet as pq
+
+        directory = self.partition(month)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{prefix}-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+        # Dot-prefixed while being written: dataset readers skip hidden files
+        tmp_path = os.path.join(directory, "." + name)
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    def compact(self, month=None, tiered=False):
+        """
+        Merge the files of one month partition (every partition when None)
+        into a single file sorted by label and time. With tiered=True (as
+        after a flush) only the files of a tier with more than compact_parts
+        files are merged, into one file of the next tier. Returns the number
+        of files merged. Skipped while another process holds the partition's
+        lock.
+        """
+        merged = 0
+        for month in ([month] if month else self.months()):
+            if len(self._files(month)) < 2:
+                continue
+            lock_path = os.path.join(self.partition(month), ".compact.lock")
+            if not _acquire(lock_path):
+                continue
+            try:
+                merged += self._merge_tiers(month) if tiered else self._merge(month, self._files(month))
+            finally:
+                os.remove(lock_path)
+        return merged
+
+    def _merge_tiers(self, month):
+        merged = tier = 0
+        while True:
+            files = self._files(month)
+            if not any(_tier(path) >= tier for path in files):
+                return merged
+            same_tier = [path for path in files if _tier(path) == tier]
+            if len(same_tier) > self.compact_parts:
+                merged += self._merge(month, same_tier, tier + 1)
+            tier += 1
+
+    def _merge(self, month, files, tier=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if len(files) < 2:
+            return 0
+        table = pa.concat_tables([pq.read_table(path, schema=audit_schema()) for path in files])
+        table = table.sort_by([("label", "ascending"), ("reviewed_at", "ascending")])
+        # A full merge keeps the highest tier of its inputs
+        self._write(month, table, _tier_prefix(tier if tier is not None else max(1, *map(_tier, files))))
+        # The merged file is in place before its inputs go, so a crash here
+        # can duplicate rows but never lose them
+        for path in files:
+            os.remove(path)
+        return len(files)
+
+    def dataset(self):
+        """The whole log as a pyarrow.dataset.Dataset (month is a partition column)."""
+        import pyarrow.dataset as ds
+
+        return ds.dataset(self.directory, format="parquet", partitioning="hive", schema=_dataset_schema())
+
+
+@lru_cache(maxsize=None)
+def _dataset_schema():
+    import pyarrow as pa
+
+    return audit_schema().append(pa.field("month", pa.string()))
+
+
+def _acquire(lock_path):
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_path) < STALE_LOCK_S:
+                return False
+            os.remove(lock_path)
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return False
+    os.close(fd)
+    return True
+
+
+def top_failures(audit, label, month=None, limit=10):
+    """[(contractor, failures)] for a check label, most failures first (every contractor when limit is None)."""
+    import pyarrow.compute as pc
+
+    condition = (pc.field("label") == label) & (pc.field("outcome") == "fail")
+    if month:
+        condition &= pc.field("month") == month
+    table = audit.dataset().to_table(columns=["contractor"], filter=condition)
+    counts = table.group_by("contractor").aggregate([("contractor", "count")])
+    ranked = counts.sort_by([("contractor_count", "descending"), ("contractor", "ascending")])
+    if limit is not None:
+        ranked = ranked.slice(0, limit)
+    return list(zip(ranked["contractor"].to_pylist(), ranked["contractor_count"].to_pylist()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or compact the review audit log.")
+    parser.add_argument("--dir", default=None, help="Audit log directory (default: QC_AUDIT_LOG_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact = commands.add_parser("compact", help="Merge the part files of each month partition")
+    compact.add_argument("--month", default=None, help="Only this partition (YYYY-MM)")
+    failures = commands.add_parser("failures", help="Contractors failing a check most often")
+    failures.add_argument("--label", required=True, help="Check label, e.g. Utility")
+    failures.add_argument("--month", default=None, help="Only this month (YYYY-MM)")
+    failures.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    audit = AuditLog(args.dir) if args.dir else AuditLog.from_env()
+    if audit is None or not os.path.isdir(audit.directory):
+        print("No audit log (QC_AUDIT_LOG_DIR is off or empty)", file=sys.stderr)
+        return 1
+    if args.command == "compact":
+        print(f"Merged {audit.compact(args.month)} files", file=sys.stderr)
+    else:
+        start = time.perf_counter()
+        ranked = top_failures(audit, args.label, args.month, args.limit)
+        for contractor, count in ranked:
+            print(f"{count:>7}  {contractor}")
+        print(f"Scanned in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Headless batch runner for the EXPRESS QC REVIEW TOOL.
+
+Reviews many CSV/planset PDF pairs across a multiprocessing worker pool and
+writes one JSON result record per project.
+
+Usage:
+    python batch.py <folder or manifest.csv> [--workers N] [--out results.jsonl] [--memory-budget-mb MB]
+                    [--page-cache DIR|off] [--check-budget-s S] [--review-budget-s S]
+    python batch.py <pdf folder> --bulk-csv export.csv [--key COLUMN] [...]
+
+A folder is paired by file name: `<project>.csv` goes with `<project>.pdf`.
+A manifest is a CSV with `project`, `csv` and `pdf` columns (relative paths
+are resolved against the manifest's folder). With --bulk-csv, every row of a
+wide Salesforce export (one row per project, see bulk_csv.py) is paired with
+`<project key>.pdf` in the folder.
+
+Reviews run on a ReviewWatchdog (see guard.py): a review stuck in one check
+past its time budget is killed and rerun with that check marked ⚠️, so one
+pathological planset cannot stall the batch.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import as_completed
+from functools import lru_cache
+
+from audit_log import AuditLog
+from guard import ResourceBudget, ReviewWatchdog
+from ingest import MemoryBudget, sha256_file
+from page_cache import PageCache
+from qc_core import count_statuses, load_csv_data, review_project, review_rows
+from timing import StageTimer
+
+
+def find_pairs(folder):
+    """Pair `<project>.csv` with `<project>.pdf` inside a folder."""
+    csvs = {}
+    pdfs = {}
+    for name in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext == ".csv":
+            csvs[stem] = os.path.join(folder, name)
+        elif ext == ".pdf":
+            pdfs[stem] = os.path.join(folder, name)
+    return [(stem, csvs[stem], pdfs[stem]) for stem in sorted(csvs) if stem in pdfs]
+
+
+def read_manifest(manifest_path):
+    """Read (project, csv, pdf) rows from a manifest CSV."""
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    pairs = []
+    with open(manifest_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            csv_path = os.path.join(base, row["csv"])
+            pdf_path = os.path.join(base, row["pdf"])
+            project = row.get("project") or os.path.splitext(os.path.basename(csv_path))[0]
+            pairs.append((project, csv_path, pdf_path))
+    return pairs
+
+
+def bulk_pairs(bulk_csv_path, pdf_folder, key=None):
+    """(project, csv, pdf, csv_data) for every project of a wide export that has `<key>.pdf` in pdf_folder."""
+    from bulk_csv import load_bulk_csv  # pandas is only imported for bulk exports
+
+    projects = load_bulk_csv(bulk_csv_path, key=key)
+    pdfs = {}
+    for name in os.listdir(pdf_folder):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() == ".pdf":
+            pdfs[stem] = os.path.join(pdf_folder, name)
+    missing = [project for project in projects if project not in pdfs]
+    if missing:
+        print(f"{len(missing)} projects in {bulk_csv_path} have no planset PDF: {', '.join(missing[:10])}",
+              file=sys.stderr)
+    return [(project, bulk_csv_path, pdfs[project], csv_data)
+            for project, csv_data in projects.items() if project in pdfs]
+
+
+def collect_pairs(source):
+    if os.path.isdir(source):
+        return find_pairs(source)
+    return read_manifest(source)
+
+
+@lru_cache(maxsize=None)
+def worker_page_cache():
+    """One PageCache per worker process (None when disabled), reused for every project it reviews."""
+    return PageCache.from_env()
+
+
+@lru_cache(maxsize=64)
+def _sha256_file(path, mtime_ns, size):
+    return sha256_file(path)
+
+
+def file_sha256(path):
+    """SHA-256 of a file, hashed once per worker while it is unchanged (a bulk export is shared by every project)."""
+    stat = os.stat(path)
+    return _sha256_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+# Errors a second try may not hit again: a file that could not be read (e.g. a network share that dropped out)
+# or memory taken by the reviews running next to this one. Anything else comes from the CSV or planset itself.
+TRANSIENT_ERRORS = (OSError, MemoryError)
+
+
+def review_pair(pair, budget=None):
+    """
+    Worker entry point: review one (project, csv_path, pdf_path) pair, or a
+    (project, csv_path, pdf_path, csv_data) one whose CSV side is already loaded,
+    within `budget` (a ResourceBudget, from the environment by default).
+    """
+    project, csv_path, pdf_path = pair[:3]
+    start = time.perf_counter()
+    record = {"project": project, "csv": csv_path, "pdf": pdf_path}
+    timer = StageTimer()
+    memory = MemoryBudget.from_env()
+    budget = budget if budget is not None else ResourceBudget.from_env()
+    try:
+        with timer.stage("review.hash"):
+            record["csv_sha256"] = file_sha256(csv_path)
+            record["pdf_sha256"] = file_sha256(pdf_path)
+        csv_data = pair[3] if len(pair) > 3 else load_csv_data(csv_path, timer=timer)
+        review = review_project(
+            csv_data,
+            pdf_path=pdf_path,
+            csv_filename=os.path.basename(csv_path),
+            pdf_filename=os.path.basename(pdf_path),
+            timer=timer,
+            memory=memory,
+            page_cache=worker_page_cache(),
+            budget=budget,
+        )
+        results = review_rows(review)
+        match_count, mismatch_count, missing_count, near_count = count_statuses(results)
+        record["results"] = [list(item) for item in results]
+        record["counts"] = {"pass": match_count, "fail": mismatch_count, "missing": missing_count, "near": near_count}
+        record["module"] = review["module"]._asdict()
+        record["evidence"] = {label: box._asdict() for label, box in review["evidence_boxes"].items()}
+        record["page_cache"] = review["page_cache"]
+        record["error"] = None
+        record["transient"] = False
+    except Exception as e:
+        record["results"] = []
+        record["module"] = None
+        record["evidence"] = None
+        record["counts"] = {"pass": 0, "fail": 0, "missing": 0, "near": 0}
+        record["error"] = f"{e}\n{traceback.format_exc()}"
+        record["transient"] = isinstance(e, TRANSIENT_ERRORS)
+    record["elapsed_s"] = round(time.perf_counter() - start, 4)
+    record["timings"] = timer.as_dict()
+    record["memory"] = memory.as_dict()
+    record["budget"] = budget.as_dict()
+    return record
+
+
+def failed_record(pair, error):
+    """The record of a pair whose review never returned one (its worker died or was given up on)."""
+    return {
+        "project": pair[0], "csv": pair[1], "pdf": pair[2], "results": [], "module": None, "evidence": None,
+        "counts": {"pass": 0, "fail": 0, "missing": 0, "near": 0}, "error": f"Review worker failed: {error}",
+        "transient": True,
+    }
+
+
+def run_batch(pairs, workers=None, out=None, audit=None):
+    """
+    Review every pair on a ReviewWatchdog of `workers` processes (defaults to the
+    CPU count). Each record is written to `out` (a text stream) as one JSON line
+    as soon as it completes, and appended to `audit` (an AuditLog) when given.
+    Returns the list of records.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ReviewWatchdog(workers, daemon=True) as watchdog:
+        futures = {watchdog.submit(review_pair, pair): pair for pair in pairs}
+        return _collect(_records(futures), out, audit)
+
+
+def _records(futures):
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:  # e.g. WorkerFailed: the worker was killed by the OOM killer
+            yield failed_record(futures[future], e)
+
+
+def _collect(results, out, audit=None):
+    records = []
+    for record in results:
+        records.append(record)
+        if out is not None:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+        if audit is not None:
+            audit.append(record, source="batch")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Review a folder or manifest of CSV/PDF pairs.")
+    parser.add_argument("source", help="Folder of <project>.csv/<project>.pdf pairs, or a manifest CSV")
+    parser.add_argument("--bulk-csv", default=None,
+                        help="Wide export with one row per project; `source` is then the folder of <project>.pdf")
+    parser.add_argument("--key", default=None,
+                        help="Project key column of --bulk-csv (default: project, Engineering_Project__c.Name, Name or Id)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default="-", help="JSON lines output file (default: stdout)")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Per-worker RSS cap in MB, 0 to disable (default: QC_MEMORY_BUDGET_MB or 2048)")
+    parser.add_argument("--page-cache", default=None,
+                        help="Page cache directory, or 'off' (default: QC_PAGE_CACHE_DIR or ~/.cache/qc-review)")
+    parser.add_argument("--audit-log", default=None,
+                        help="Audit log directory, or 'off' (default: QC_AUDIT_LOG_DIR or ~/.local/share/qc-review/audit)")
+    parser.add_argument("--check-budget-s", type=float, default=None,
+                        help="Seconds one check may run, 0 to disable (default: QC_CHECK_BUDGET_S or 30)")
+    parser.add_argument("--review-budget-s", type=float, default=None,
+                        help="Seconds one review may run, 0 to disable (default: QC_REVIEW_BUDGET_S or 300)")
+    args = parser.parse_args(argv)
+
+    # Read by MemoryBudget.from_env(), PageCache.from_env() and ResourceBudget.from_env()
+    if args.memory_budget_mb is not None:
+        os.environ["QC_MEMORY_BUDGET_MB"] = str(args.memory_budget_mb)
+    if args.check_budget_s is not None:
+        os.environ["QC_CHECK_BUDGET_S"] = str(args.check_budget_s)
+    if args.review_budget_s is not None:
+        os.environ["QC_REVIEW_BUDGET_S"] = str(args.review_budget_s)
+    if args.page_cache is not None:
+        os.environ["QC_PAGE_CACHE_DIR"] = args.page_cache
+    if args.audit_log is not None:
+        os.environ["QC_AUDIT_LOG_DIR"] = args.audit_log
+
+    pairs = bulk_pairs(args.bulk_csv, args.source, args.key) if args.bulk_csv else collect_pairs(args.source)
+    if not pairs:
+        print(f"No CSV/PDF pairs found in {args.source}", file=sys.stderr)
+        return 1
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    audit = AuditLog.from_env()
+    start = time.perf_counter()
+    try:
+        records = run_batch(pairs, workers=args.workers, out=out, audit=audit)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if audit is not None:
+            audit.close()
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for r in records if r["error"])
+    rate = len(records) / elapsed if elapsed else 0.0
+    print(
+        f"Reviewed {len(records)} projects ({failed} errors) in {elapsed:.2f}s "
+        f"- {rate:.2f} projects/s, {rate * 60:.1f} projects/min",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark: AddressMatcher vs the original block_candidates +
+normalize_states_in_text address matching, on a synthetic planset.
+
+Usage:
+    python benchmarks/bench_address_match.py [--pages 4 40 400] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from qc_core import (  # noqa: E402
+    ABBR_TO_FULL,
+    PdfTextIndex,
+    block_candidates,
+    contractor_address_match,
+    normalize_state,
+    normalize_string,
+    project_address_match,
+)
+
+CONTRACTOR = {
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c": "123 Main St",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c": "Portland",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c": "OR",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c": "97201",
+}
+PROJECT = {
+    "Engineering_Project__c.Installation_Street_Address_1__c": "55 Oak Ave",
+    "Engineering_Project__c.Installation_City__c": "Salem",
+    "Engineering_Project__c.Installation_State__c": "Oregon",
+    "Engineering_Project__c.Installation_Zip_Code__c": "97301",
+}
+
+FILLER = [
+    "GENERAL NOTES", "ALL WORK SHALL COMPLY WITH NEC 2020 AND LOCAL CODES",
+    "CONDUIT RUN IN ATTIC, MIN 3.5\" ABOVE ROOF", "ROOF SURFACE TYPE: COMP SHINGLE",
+    "STRING 1: (10) MODULES", "PV DISCONNECT, 60A, 240V, NEMA 3R", "SCALE: 1/8\" = 1'-0\"",
+    "SHEET PV-{page}", "DRAWN BY: QC", "REV 0 - ISSUED FOR PERMIT", "OR-PL-01 IN PLACE OK",
+]
+
+
+def synthetic_planset(pages, lines_per_page=80, seed=0):
+    """Title-block style text; the addresses only appear on the last page."""
+    rng = random.Random(seed)
+    page_texts = []
+    for page in range(1, pages + 1):
+        lines = [rng.choice(FILLER).format(page=page) for _ in range(lines_per_page)]
+        if page == pages:
+            lines[10:10] = ["CONTRACTOR", "123 MAIN ST", "PORTLAND, OR 97201"]
+            lines[40:40] = ["PROJECT ADDRESS", "55 Oak Ave, Salem,", "OR 97301"]
+        page_texts.append((page, "\n".join(lines) + "\n"))
+    return page_texts
+
+
+# ---- Original implementation, kept here as the baseline ----
+
+def legacy_normalize_states_in_text(text):
+    if not text:
+        return text
+    abbrs = sorted(ABBR_TO_FULL.keys(), key=len, reverse=True)
+    pattern = r'(?<![A-Za-z])(' + '|'.join(map(re.escape, abbrs)) + r')(?![A-Za-z])'
+
+    def _repl(m):
+        return ABBR_TO_FULL[m.group(1).lower()]
+
+    return re.sub(pattern, _repl, text, flags=re.IGNORECASE)
+
+
+def legacy_address_match(street, city, state, zipc, pdf_text):
+    csv_components_norm = [
+        normalize_string(street),
+        normalize_string(city),
+        normalize_string(normalize_state(state)),
+        normalize_string(zipc),
+    ]
+    csv_components_norm = [c for c in csv_components_norm if c]
+    for block in block_candidates(pdf_text.splitlines()):
+        block_norm = normalize_string(legacy_normalize_states_in_text(block))
+        if all(comp in block_norm for comp in csv_components_norm):
+            return True
+    return False
+
+
+def legacy_review(pdf_text):
+    return (
+        legacy_address_match(*CONTRACTOR.values(), pdf_text),
+        legacy_address_match(*PROJECT.values(), pdf_text),
+    )
+
+
+def new_review(pages):
+    # The index is built once per document, exactly as review_project does
+    index = PdfTextIndex.from_pages(pages)
+    return (
+        contractor_address_match(CONTRACTOR, index),
+        project_address_match(PROJECT, index),
+    )
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'pages':>6} {'legacy (ms)':>12} {'matcher (ms)':>13} {'speedup':>8}  match")
+    for pages in args.pages:
+        page_texts = synthetic_planset(pages)
+        pdf_text = "".join(text for _, text in page_texts)
+        legacy_s, legacy_result = best_of(lambda: legacy_review(pdf_text), args.repeat)
+        new_s, new_result = best_of(lambda: new_review(page_texts), args.repeat)
+        found = tuple(bool(r) for r in new_result)
+        if found != legacy_result:
+            print(f"result mismatch at {pages} pages: legacy={legacy_result} matcher={new_result}", file=sys.stderr)
+            return 1
+        where = ", ".join(f"p{m.page} l{m.page_line}" for m in new_result if m)
+        print(f"{pages:>6} {legacy_s * 1000:>12.2f} {new_s * 1000:>13.2f} {legacy_s / new_s:>7.1f}x  {where}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Micro-benchmark: audit log append, compaction and an analytics scan.
+
+Appends --reviews synthetic batch records (30 result rows each, spread over
+a few contractors with some Utility failures) to a fresh AuditLog, compacts
+it, then answers "which contractors fail the Utility check most often this
+month" twice: with the columnar scan (audit_log.top_failures) on the
+compacted and on the uncompacted log, and by reading back the same records
+from batch JSON lines, which is what the question cost before.
+
+Usage:
+    python benchmarks/bench_audit_log.py [--reviews 1000 10000] [--flush-rows 5000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audit_log import AuditLog, top_failures  # noqa: E402
+from benchmarks.bench_address_match import best_of  # noqa: E402
+
+CONTRACTORS = [f"Contractor {n:02d} Solar LLC" for n in range(40)]
+LABELS = ["Contractor Name", "Utility", "AHJ", "Property Owner"] + [f"Field {n}" for n in range(26)]
+
+
+def synthetic_record(rng, n):
+    contractor = rng.choice(CONTRACTORS)
+    # Later contractors fail the Utility check more often
+    fail_rate = CONTRACTORS.index(contractor) / (4 * len(CONTRACTORS))
+    results = []
+    for label in LABELS:
+        value = contractor if label == "Contractor Name" else f"value {rng.randrange(1000)}"
+        status = "❌ (PDF: Not Found)" if label == "Utility" and rng.random() < fail_rate else "✅"
+        results.append([label, f"Engineering_Project__c.{label.replace(' ', '_')}__c", value, status,
+                        f"Compared: CSV='{value}' vs PDF='{value}'"])
+    return {
+        "project": f"P-{n:06d}",
+        "csv": f"P-{n:06d}.csv",
+        "pdf": f"P-{n:06d}.pdf",
+        "csv_sha256": f"{rng.getrandbits(256):064x}",
+        "pdf_sha256": f"{rng.getrandbits(256):064x}",
+        "results": results,
+        "elapsed_s": round(rng.uniform(1, 20), 3),
+        "error": None,
+    }
+
+
+def jsonl_failures(path, label):
+    counts = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            rows = record["results"]
+            contractor = next(row[2] for row in rows if row[0] == "Contractor Name")
+            counts.update(contractor for row in rows if row[0] == label and row[3].startswith("❌"))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reviews", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--flush-rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    month = time.strftime("%Y-%m", time.gmtime())
+    print(f"{'reviews':>8} {'rows':>8} {'append (us/row)':>16} {'parts':>6} {'compact (ms)':>13} {'MB':>6} "
+          f"{'scan parts (ms)':>16} {'scan compact (ms)':>18} {'jsonl (ms)':>11}")
+    for reviews in args.reviews:
+        rng = random.Random(reviews)
+        records = [synthetic_record(rng, n) for n in range(reviews)]
+        with tempfile.TemporaryDirectory() as work_dir:
+            jsonl_path = os.path.join(work_dir, "results.jsonl")
+            with open(jsonl_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+            audit = AuditLog(os.path.join(work_dir, "audit"), flush_rows=args.flush_rows, flush_s=0,
+                             compact_parts=1 << 30)
+            start = time.perf_counter()
+            for record in records:
+                audit.append(record, source="batch")
+            audit.close()
+            append_s = time.perf_counter() - start
+            parts = len(audit._files(month))
+
+            scan_parts_s, from_parts = best_of(lambda: top_failures(audit, "Utility", month, limit=None), args.repeat)
+            start = time.perf_counter()
+            audit.compact()
+            compact_s = time.perf_counter() - start
+            size = sum(os.path.getsize(path) for path in audit._files(month))
+            scan_s, from_log = best_of(lambda: top_failures(audit, "Utility", month, limit=None), args.repeat)
+            jsonl_s, from_jsonl = best_of(lambda: jsonl_failures(jsonl_path, "Utility"), args.repeat)
+            if dict(from_log) != from_jsonl or dict(from_parts) != from_jsonl:
+                print(f"failure counts differ at {reviews} reviews: log={from_log} jsonl={from_jsonl}", file=sys.stderr)
+                return 1
+
+        rows = audit.rows_written
+        print(f"{reviews:>8} {rows:>8} {append_s / rows * 1e6:>16.1f} {parts:>6} {compact_s * 1000:>13.1f} "
+              f"{size / 1e6:>6.1f} {scan_parts_s * 1000:>16.1f} {scan_s * 1000:>18.1f} {jsonl_s * 1000:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: equipment catalog load and part number lookups.
+
+Writes a synthetic catalog of --parts module part numbers (shared
+manufacturer prefixes, wattage and suffix variants, like real product
+lines), then times loading it, cold and memoized lookups with suffixed part
+numbers (prefix matches), and the regex wattage guess they replace. Reports
+the radix trie's node count and the memory the loaded catalog takes.
+
+Usage:
+    python benchmarks/bench_catalog.py [--parts 1000 10000 50000] [--lookups 10000]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from equipment_catalog import CATALOG_COLUMNS, EquipmentCatalog  # noqa: E402
+from qc_core import extract_module_wattage  # noqa: E402
+
+SERIES = ["REC", "QPEAK-DUO-BLK-ML-G10", "JKM", "LR5-54HPH", "SPR-MAX3", "CS6R", "HIN-T", "SEG", "TSM-DE09R"]
+SUFFIXES = ["", "AA", "AA-PURE", "M", "MS", "-BLK", "-B", "H", "HL4"]
+
+
+def synthetic_catalog(path, parts, seed=0):
+    rng = random.Random(seed)
+    seen = set()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CATALOG_COLUMNS)
+        while len(seen) < parts:
+            watts = rng.randrange(300, 700, 5)
+            part = f"{rng.choice(SERIES)}{watts}{rng.choice(SUFFIXES)}{rng.randrange(1000) if rng.random() < 0.8 else ''}"
+            if part in seen:
+                continue
+            seen.add(part)
+            imp = round(rng.uniform(9, 15), 2)
+            writer.writerow(["module", "", part, watts, round(watts / imp, 1), imp, 40.1, round(imp * 1.05, 2), ""])
+    return sorted(seen)
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for _, child in (node.edges or {}).values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    print(f"{'parts':>7} {'load (ms)':>10} {'nodes':>8} {'MB':>6} {'cold (us)':>10} {'memo (us)':>10} "
+          f"{'regex (us)':>11}  found")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for parts in args.parts:
+            path = os.path.join(work_dir, f"catalog_{parts}.csv")
+            catalog_parts = synthetic_catalog(path, parts)
+
+            start = time.perf_counter()
+            catalog = EquipmentCatalog.from_file(path)
+            load_s = time.perf_counter() - start
+            # Loaded again under tracemalloc, which slows the load down
+            tracemalloc.start()
+            measured = EquipmentCatalog.from_file(path)
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del measured
+
+            rng = random.Random(1)
+            queries = [rng.choice(catalog_parts) + rng.choice(["", " BLK", "-30MM"]) for _ in range(args.lookups)]
+            start = time.perf_counter()
+            found = sum(1 for q in queries if catalog.module(q) is not None)
+            cold_s = time.perf_counter() - start
+            # Reviews keep asking for the same few modules
+            hot = queries[:100] * (len(queries) // 100)
+            for q in hot[:100]:
+                catalog.module(q)
+            start = time.perf_counter()
+            for q in hot:
+                catalog.module(q)
+            memo_s = time.perf_counter() - start
+            start = time.perf_counter()
+            for q in queries:
+                extract_module_wattage(q)
+            regex_s = time.perf_counter() - start
+
+            n = len(queries)
+            print(f"{parts:>7} {load_s * 1000:>10.1f} {count_nodes(catalog.tries['module'].root):>8} "
+                  f"{size / 1e6:>6.1f} {cold_s / n * 1e6:>10.2f} {memo_s / len(hot) * 1e6:>10.2f} {regex_s / n * 1e6:>11.2f}  "
+                  f"{found}/{n}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: trigram-indexed name lookups (fuzzy_index.NgramIndex) vs a
+scan of every 2-line block, for exact and near (one typo) matches, as the
+planset grows.
+
+The index is built once per planset and shared by every fuzzy check, so the
+build is reported separately from the per-lookup time.
+
+Usage:
+    python benchmarks/bench_fuzzy_match.py [--pages 4 40 400] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.bench_address_match import best_of, synthetic_planset  # noqa: E402
+from fuzzy_index import NgramIndex, allowed_edits, substring_distance  # noqa: E402
+from qc_core import PdfTextIndex, normalize_string  # noqa: E402
+
+# (exact value, the same value with one typo)
+LOOKUPS = [
+    ("PORTLAND, OR 97201", "PORTLND, OR 97201"),
+    ("55 Oak Ave, Salem,", "55 Oak Av, Salem,"),
+    ("PROJECT ADDRESS", "PROJECT ADRESS"),
+]
+
+
+def scan_exact(norm, value):
+    for i in range(len(norm)):
+        if value in norm[i] + (norm[i + 1] if i + 1 < len(norm) else ""):
+            return i
+    return None
+
+
+def scan_near(norm, value):
+    best = None
+    max_edits = allowed_edits(value)
+    for i in range(len(norm)):
+        window = norm[i] + (norm[i + 1] if i + 1 < len(norm) else "")
+        distance = substring_distance(value, window, max_edits)
+        if distance is not None and (best is None or distance < best[1]):
+            best = (i, distance)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    exact_values = [normalize_string(exact) for exact, _ in LOOKUPS]
+    near_values = [normalize_string(typo) for _, typo in LOOKUPS]
+    print(f"{'pages':>6} {'lines':>7} {'build (ms)':>11} {'exact scan (us)':>16} {'exact index (us)':>17} "
+          f"{'near scan (ms)':>15} {'near index (us)':>16}")
+    for pages in args.pages:
+        norm = PdfTextIndex.from_pages(synthetic_planset(pages)).normalized_lines
+        build_s, ngrams = best_of(lambda: NgramIndex(norm), args.repeat)
+        scan_exact_s, scanned = best_of(lambda: [scan_exact(norm, v) for v in exact_values], args.repeat)
+        index_exact_s, indexed = best_of(lambda: [ngrams.first_containing(v) for v in exact_values], args.repeat)
+        scan_near_s, scanned_near = best_of(lambda: [scan_near(norm, v) for v in near_values], 1)
+        index_near_s, indexed_near = best_of(lambda: [ngrams.near_match(v) for v in near_values], args.repeat)
+        if scanned != indexed:
+            print(f"exact lookup mismatch at {pages} pages: scan={scanned} index={indexed}", file=sys.stderr)
+            return 1
+        if [d for _, d in filter(None, scanned_near)] != [m.distance for m in filter(None, indexed_near)]:
+            print(f"near lookup mismatch at {pages} pages: scan={scanned_near} index={indexed_near}", file=sys.stderr)
+            return 1
+        lookups = len(LOOKUPS)
+        print(f"{pages:>6} {len(norm):>7} {build_s * 1000:>11.1f} {scan_exact_s / lookups * 1e6:>16.0f} "
+              f"{index_exact_s / lookups * 1e6:>17.0f} {scan_near_s / lookups * 1000:>15.1f} "
+              f"{index_near_s / lookups * 1e6:>16.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Cold-start budget check: how long a fresh interpreter takes to import each
+entry-point module, and that no unused heavy module comes along with it.
+
+Every sample runs in a new `python -c` process so nothing is already cached in
+sys.modules. The child also reads a small Field/Value CSV with load_csv_data,
+which must not pull in pandas either. Exits with status 1 when a module's
+median import time exceeds --budget-ms or a forbidden module was loaded, so
+it can gate CI.
+
+Usage:
+    python benchmarks/bench_import.py [--modules qc_core batch service] [--repeat 5]
+                                      [--budget-ms 500] [--forbid pandas matplotlib]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_MODULES = ["qc_core", "batch", "service"]
+DEFAULT_FORBIDDEN = ["pandas", "matplotlib"]
+DEFAULT_BUDGET_MS = 500.0
+
+CHILD = """
+import io, json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import qc_core
+qc_core.load_csv_data(io.BytesIO(b"Field,Value\\nEngineering_Project__c.Customer__r.Name,Sunny Day Solar LLC\\n"))
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def time_import(module, repeat):
+    """(import seconds per run, set of top-level modules loaded) for `module` in fresh interpreters."""
+    samples = []
+    loaded = set()
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD.format(module=module)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        )
+        # PyMuPDF may print a deprecation notice to stdout; the JSON is the last line
+        record = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(record["seconds"])
+        loaded.update(name.split(".", 1)[0] for name in record["modules"])
+    return samples, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold-start import time against a budget.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Largest allowed median import time per module (default: {DEFAULT_BUDGET_MS:g})")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Modules that must not be imported at startup")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<12} {'min (ms)':>10} {'median (ms)':>12}  forbidden loaded")
+    for module in args.modules:
+        samples, loaded = time_import(module, args.repeat)
+        median_ms = statistics.median(samples) * 1000
+        forbidden = sorted(loaded.intersection(args.forbid))
+        print(f"{module:<12} {min(samples) * 1000:>10.1f} {median_ms:>12.1f}  {', '.join(forbidden) or '-'}")
+        if median_ms > args.budget_ms:
+            failures.append(f"{module}: median import {median_ms:.1f} ms > budget {args.budget_ms:g} ms")
+        if forbidden:
+            failures.append(f"{module}: imported {', '.join(forbidden)} at startup")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
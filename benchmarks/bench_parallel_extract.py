@@ -0,0 +1,115 @@
+"""
+Benchmark: serial vs parallel page-range extraction on large synthetic plansets.
+
+For each page count, times the full-text extraction (extract_pdf_text vs
+extract_pdf_text_parallel) and a whole review_project with QC_PARALLEL_PAGES
+off and on, for each worker count. The worker pool is started once before
+timing (it is shared by every review in a process), so the numbers are the
+steady-state cost. Both paths must produce identical text and results.
+
+Usage:
+    python benchmarks/bench_parallel_extract.py [--pages 200 400 800] [--workers 2 4 8] [--repeat 3]
+                                                [--out results.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fitz  # noqa: E402  PyMuPDF
+
+from benchmarks.synthetic_planset import write_project  # noqa: E402
+from parallel_extract import extract_pdf_text_parallel  # noqa: E402
+from qc_core import extract_pdf_text, load_csv_data, review_project  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def best_of(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, {"min_s": min(samples), "median_s": statistics.median(samples)}
+
+
+def serial_text(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return extract_pdf_text(doc)
+
+
+def review(csv_data, pdf_path, parallel_pages, workers):
+    os.environ["QC_PARALLEL_PAGES"] = str(parallel_pages)
+    os.environ["QC_EXTRACT_WORKERS"] = str(workers)
+    return review_project(csv_data, pdf_path=pdf_path)
+
+
+def bench_size(pages, workers_list, repeat, work_dir):
+    csv_path, pdf_path = write_project(work_dir, f"parallel_{pages}p", pages)
+    csv_data = load_csv_data(csv_path)
+    os.environ["QC_PAGE_CACHE_DIR"] = "off"
+
+    text, serial_text_timing = best_of(lambda: serial_text(pdf_path), repeat)
+    reference, serial_review_timing = best_of(lambda: review(csv_data, pdf_path, 0, 1), repeat)
+    size = {"pages": pages, "serial": {"text": serial_text_timing, "review": serial_review_timing}, "parallel": []}
+    for workers in workers_list:
+        review(csv_data, pdf_path, 1, workers)  # start the pool outside the timing
+        parallel_text, text_timing = best_of(lambda: extract_pdf_text_parallel(pdf_path, workers), repeat)
+        result, review_timing = best_of(lambda: review(csv_data, pdf_path, 1, workers), repeat)
+        if parallel_text != text or result["comparison"] != reference["comparison"]:
+            raise AssertionError(f"parallel extraction differs from serial at {pages} pages, {workers} workers")
+        size["parallel"].append({"workers": workers, "text": text_timing, "review": review_timing})
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time serial vs parallel page-range extraction.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 400, 800])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None, help="JSON results path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    run = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'pages':>6} {'workers':>8} {'text (ms)':>10} {'speedup':>8} {'review (ms)':>12} {'speedup':>8}")
+        for pages in args.pages:
+            size = bench_size(pages, args.workers, args.repeat, work_dir)
+            run["sizes"].append(size)
+            text_s = size["serial"]["text"]["min_s"]
+            review_s = size["serial"]["review"]["min_s"]
+            print(f"{pages:>6} {'serial':>8} {text_s * 1000:>10.1f} {'':>8} {review_s * 1000:>12.1f}")
+            for item in size["parallel"]:
+                text_p = item["text"]["min_s"]
+                review_p = item["review"]["min_s"]
+                print(f"{pages:>6} {item['workers']:>8} {text_p * 1000:>10.1f} {text_s / text_p:>7.2f}x "
+                      f"{review_p * 1000:>12.1f} {review_s / review_p:>7.2f}x")
+
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("parallel-%Y%m%d-%H%M%S.json"))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"\nSaved {out} ({os.cpu_count()} CPUs)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Benchmark suite for the extraction and comparison hot paths.
+
+Generates synthetic plansets (see synthetic_planset.py) at each page count and
+times extract_pdf_text, extract_pdf_line_values, compare_fields,
+contractor_address_match, project_address_match, compute_extra_checks and the
+end-to-end review_project. The text-based stages run on the full document text
+so they show how each hot path scales with page count. Results are written as
+JSON so runs can be compared for regressions.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--pages 4 40 400] [--repeat 5] [--out results.json]
+                                        [--compare previous.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fitz  # noqa: E402  PyMuPDF
+
+from benchmarks.synthetic_planset import write_project  # noqa: E402
+from qc_core import (  # noqa: E402
+    CUSTOMER_ADDRESS_FIELDS,
+    PROJECT_ADDRESS_FIELDS,
+    build_fields_to_check,
+    compare_fields,
+    compute_extra_checks,
+    contractor_address_match,
+    extract_pdf_line_values,
+    extract_pdf_text,
+    load_csv_data,
+    project_address_match,
+    review_project,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def time_stage(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"min_s": min(samples), "median_s": statistics.median(samples), "repeat": repeat}
+
+
+def bench_size(pages, repeat, work_dir):
+    csv_path, pdf_path = write_project(work_dir, f"bench_{pages}p", pages)
+    csv_data = load_csv_data(csv_path)
+    fields_to_check = build_fields_to_check(csv_data)
+    contractor_name = csv_data.get("Engineering_Project__c.Customer__r.Name", "")
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+
+    with fitz.open(pdf_path) as doc:
+        full_text = extract_pdf_text(doc)
+        module_qty, inverter_qty, contractor_name_pdf, _ = extract_pdf_line_values(doc, contractor_name)
+        customer_address = {field: csv_data.get(field, "") for field in CUSTOMER_ADDRESS_FIELDS}
+        project_address = {field: csv_data.get(field, "") for field in PROJECT_ADDRESS_FIELDS}
+
+        # Raw text is passed on purpose: every call builds its own PdfTextIndex,
+        # so each stage is timed from scratch rather than from a warm index.
+        stages = {
+            "extract_pdf_text": lambda: extract_pdf_text(doc),
+            "extract_pdf_line_values": lambda: extract_pdf_line_values(doc, contractor_name),
+            "compare_fields": lambda: compare_fields(
+                csv_data, full_text, fields_to_check, module_qty, inverter_qty, contractor_name_pdf),
+            "contractor_address_match": lambda: contractor_address_match(customer_address, full_text),
+            "project_address_match": lambda: project_address_match(project_address, full_text),
+            "compute_extra_checks": lambda: compute_extra_checks(csv_data, full_text),
+        }
+        results = {name: time_stage(fn, repeat) for name, fn in stages.items()}
+
+    results["review_project"] = time_stage(lambda: review_project(csv_data, pdf_bytes=pdf_bytes), repeat)
+    return {"pages": pages, "pdf_bytes": len(pdf_bytes), "text_chars": len(full_text), "stages": results}
+
+
+def compare_runs(current, previous):
+    """Print median ratios current/previous for every stage both runs measured."""
+    prev_by_pages = {str(size["pages"]): size for size in previous["sizes"]}
+    print(f"\n{'pages':>6} {'stage':<26} {'prev (ms)':>10} {'now (ms)':>10} {'ratio':>7}")
+    for size in current["sizes"]:
+        prev = prev_by_pages.get(str(size["pages"]))
+        if not prev:
+            continue
+        for stage, timing in size["stages"].items():
+            if stage not in prev["stages"]:
+                continue
+            before = prev["stages"][stage]["median_s"]
+            now = timing["median_s"]
+            ratio = now / before if before else float("inf")
+            flag = "  <-- slower" if ratio > 1.2 else ""
+            print(f"{size['pages']:>6} {stage:<26} {before * 1000:>10.2f} {now * 1000:>10.2f} {ratio:>6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the extraction and comparison hot paths.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None, help="JSON results path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    run = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'pages':>6} {'stage':<26} {'min (ms)':>10} {'median (ms)':>12}")
+        for pages in args.pages:
+            size = bench_size(pages, args.repeat, work_dir)
+            run["sizes"].append(size)
+            for stage, timing in size["stages"].items():
+                print(f"{pages:>6} {stage:<26} {timing['min_s'] * 1000:>10.2f} {timing['median_s'] * 1000:>12.2f}")
+
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("bench-%Y%m%d-%H%M%S.json"))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"\nSaved {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare_runs(run, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark: evidence thumbnails.
+
+Reviews a synthetic project per page count, then times, over every check's
+evidence box: the cold render of its crop (planset opened once), a repeat
+served by the ThumbnailCache, and rendering the whole page at the same DPI,
+which is what showing the evidence would cost without a clip. Also reports
+the average PNG size, which is what the cache's byte cap is spent on.
+
+Usage:
+    python benchmarks/bench_thumbnails.py [--pages 4 40] [--dpi 96] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.bench_address_match import best_of  # noqa: E402
+from benchmarks.synthetic_planset import write_project  # noqa: E402
+from qc_core import load_csv_data, review_project  # noqa: E402
+from thumbnails import ThumbnailCache, open_document  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40])
+    parser.add_argument("--dpi", type=int, default=96)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'pages':>6} {'boxes':>6} {'cold (ms)':>10} {'cached (us)':>12} {'full page (ms)':>15} {'KB/crop':>8}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for pages in args.pages:
+            csv_path, pdf_path = write_project(work_dir, f"thumbs_{pages}", pages)
+            review = review_project(load_csv_data(csv_path), pdf_path=pdf_path)
+            boxes = list(review["evidence_boxes"].values())
+
+            with open_document(pdf_path=pdf_path) as doc:
+                def cold():
+                    cache = ThumbnailCache(dpi=args.dpi)
+                    for box in boxes:
+                        cache.get_or_render("bench", box, lambda: doc)
+                    return cache
+
+                cold_s, cache = best_of(cold, args.repeat)
+                cached_s, _ = best_of(lambda: [cache.get_or_render("bench", box, None) for box in boxes], args.repeat)
+                full_s, _ = best_of(lambda: [doc[box.page - 1].get_pixmap(dpi=args.dpi).tobytes("png")
+                                             for box in boxes], args.repeat)
+
+            n = len(boxes)
+            print(f"{pages:>6} {n:>6} {cold_s / n * 1000:>10.2f} {cached_s / n * 1e6:>12.2f} "
+                  f"{full_s / n * 1000:>15.2f} {cache.total_bytes / len(cache) / 1024:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark: the cost of running reviews on a ReviewWatchdog, and how fast it recovers.
+
+For each page count, times a review_project in this process, the same review
+submitted to a (warm) watchdog worker, and the iter_review events streamed
+back from one, which is the per-review price of being able to kill a stuck
+review. Then makes one check hang and times how long the watchdog takes to
+kill the worker and return the review with that check marked ⚠️, against a
+--check-budget of a second.
+
+Usage:
+    python benchmarks/bench_watchdog.py [--pages 4 40 400] [--repeat 5] [--check-budget 1] [--stuck Utility]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.bench_address_match import best_of  # noqa: E402
+from benchmarks.synthetic_planset import write_project  # noqa: E402
+from guard import ResourceBudget, ReviewWatchdog  # noqa: E402
+from qc_core import CHECK_REGISTRY, iter_review, load_csv_data, review_project  # noqa: E402
+
+
+def stuck_review(csv_data, pdf_path, label, budget=None):
+    """review_project with the check `label` hanging, like a regex that never finishes (runs on a worker)."""
+    check = CHECK_REGISTRY[label]
+    check.run = lambda *args: time.sleep(3600)
+    return review_project(csv_data, pdf_path=pdf_path, budget=budget)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check-budget", type=float, default=1.0)
+    parser.add_argument("--stuck", default="Utility", help="Label of the check made to hang")
+    args = parser.parse_args(argv)
+    os.environ["QC_PAGE_CACHE_DIR"] = "off"
+
+    def budget():
+        return ResourceBudget(check_s=args.check_budget)
+
+    print(f"{'pages':>6} {'in-process (ms)':>16} {'watchdog (ms)':>14} {'streamed (ms)':>14}")
+    with tempfile.TemporaryDirectory() as work_dir, ReviewWatchdog(workers=1, budget_factory=budget) as watchdog:
+        for pages in args.pages:
+            csv_path, pdf_path = write_project(work_dir, f"watchdog_{pages}", pages)
+            csv_data = load_csv_data(csv_path)
+            local_s, _ = best_of(lambda: review_project(csv_data, pdf_path=pdf_path), args.repeat)
+            watchdog.submit(review_project, csv_data, pdf_path=pdf_path).result()  # worker started and warm
+            remote_s, _ = best_of(lambda: watchdog.submit(review_project, csv_data, pdf_path=pdf_path).result(),
+                                  args.repeat)
+            stream_s, _ = best_of(lambda: list(watchdog.stream(iter_review, csv_data, pdf_path=pdf_path)), args.repeat)
+            print(f"{pages:>6} {local_s * 1000:>16.1f} {remote_s * 1000:>14.1f} {stream_s * 1000:>14.1f}")
+
+        start = time.perf_counter()
+        review = watchdog.submit(stuck_review, csv_data, pdf_path, args.stuck).result()
+        elapsed = time.perf_counter() - start
+        row = next(row for row in review["comparison"] if row[0] == args.stuck)
+        others = sum(1 for row in review["comparison"] if row[0] != args.stuck and str(row[3]).startswith("✅"))
+        print(f"\nStuck '{args.stuck}' check: review returned in {elapsed:.2f}s "
+              f"(check budget {args.check_budget:g}s, {watchdog.kills} worker killed)")
+        print(f"  {row[0]}: {row[3]}; {others} other checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Synthetic planset generator.
+
+Writes a PyMuPDF planset with realistic title blocks, MODULE:/INVERTER:
+quantity lines, a DC SIZE label, IMP spec tables and addresses, plus the
+matching per-project Engineering_Project__c Field/Value CSV.
+
+Usage:
+    python benchmarks/synthetic_planset.py OUT_DIR [--pages 4 40 400] [--projects 1]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+
+import fitz  # PyMuPDF
+
+PAGE_SIZE = (1224, 792)  # 17 x 11 in, landscape
+TITLE_BLOCK_X = 0.8  # title block occupies the right-hand 20% of every sheet
+FONT_SIZE = 8
+
+PROJECT = {
+    "Engineering_Project__c.Customer__r.Name": "Sunny Day Solar LLC",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c": "123 Main St",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c": "Portland",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c": "OR",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c": "97201",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Phone__c": "(503) 555-1212",
+    "Engineering_Project__c.Account_License_as_Text__c": "CCB 224466",
+    "Engineering_Project__c.Property_Owner_Name__c": "Jordan Smith",
+    "Engineering_Project__c.Installation_Street_Address_1__c": "55 Oak Ave",
+    "Engineering_Project__c.Installation_City__c": "Salem",
+    "Engineering_Project__c.Installation_State__c": "Oregon",
+    "Engineering_Project__c.Installation_Zip_Code__c": "97301",
+    "Engineering_Project__c.AHJ__c": "City of Salem",
+    "Engineering_Project__c.Utility__c": "Portland General Electric",
+    "Engineering_Project__c.Module_Manufacturer__c": "REC",
+    "Engineering_Project__c.Module_Part_Number__c": "REC400AA",
+    "Engineering_Project__c.Module_Quantity__c": "20",
+    "Engineering_Project__c.Inverter_Manufacturer__c": "Tesla",
+    "Engineering_Project__c.Inverter_Part_Number__c": "1538000-45-A",
+    "Engineering_Project__c.Inverter_Quantity__c": "1",
+    "Engineering_Project__c.AHJ_Database__r.IBC__c": "2021",
+    "Engineering_Project__c.AHJ_Database__r.IFC__c": "2021",
+    "Engineering_Project__c.AHJ_Database__r.IRC__c": "2021",
+    "Engineering_Project__c.AHJ_Database__r.NEC__c": "2020",
+    "Engineering_Project__c.Rafter_Truss_Size__c": "2x6",
+    "Engineering_Project__c.Rafter_Truss_Spacing__c": "24\"",
+    "Engineering_Project__c.Roofing_Material__c": "Comp Shingle",
+    "Engineering_Project__c.Racking_Manufacturer__c": "IRIDG",
+    "Engineering_Project__c.Racking_Model__c": "XR100",
+    "Engineering_Project__c.Attachment_Manufacturer__c": "IRIDG",
+    "Engineering_Project__c.Attachment_Model__c": "FlashFoot2",
+    "Engineering_Project__c.Energy_Storage_Picklist__c": "No",
+}
+
+NOTES = [
+    "ALL WORK SHALL COMPLY WITH THE 2020 NEC AND LOCAL AMENDMENTS.",
+    "CONDUCTORS SHALL BE COPPER, 90C RATED, SIZED PER NEC 310.16.",
+    "CONDUIT RUN IN ATTIC SHALL BE MIN 3.5\" BELOW ROOF DECK.",
+    "PV DISCONNECT: 60A, 240V, NEMA 3R, VISIBLE OPEN, LOCKABLE.",
+    "MODULES SHALL BE BONDED PER MANUFACTURER INSTRUCTIONS.",
+    "PROVIDE WARNING LABELS PER NEC 690.13 AND 705.12.",
+    "STRING 1: (10) MODULES IN SERIES, STRING 2: (10) MODULES IN SERIES.",
+    "VERIFY ALL DIMENSIONS IN FIELD PRIOR TO INSTALLATION.",
+    "ROOF ACCESS PATHWAYS PER IFC 1204, 36\" MIN.",
+    "GROUNDING ELECTRODE CONDUCTOR #6 AWG BARE CU.",
+]
+
+FILLER_SHEETS = ["GENERAL NOTES", "STRUCTURAL DETAILS", "PLACARDS", "SAFETY PLAN", "ATTACHMENT DETAIL"]
+
+
+def _title_block(project, sheet_title, sheet_number, total):
+    return "\n".join([
+        project["Engineering_Project__c.Customer__r.Name"].upper(),
+        project["Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c"],
+        "{}, {} {}".format(
+            project["Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c"],
+            project["Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c"],
+            project["Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c"],
+        ),
+        project["Engineering_Project__c.Customer__r.GRDS_Customer_Phone__c"],
+        f"LIC# {project['Engineering_Project__c.Account_License_as_Text__c']}",
+        "",
+        "PROJECT:",
+        project["Engineering_Project__c.Property_Owner_Name__c"].upper(),
+        project["Engineering_Project__c.Installation_Street_Address_1__c"],
+        "{}, OR {}".format(
+            project["Engineering_Project__c.Installation_City__c"],
+            project["Engineering_Project__c.Installation_Zip_Code__c"],
+        ),
+        "",
+        "SHEET TITLE:",
+        sheet_title,
+        f"SHEET {sheet_number} OF {total}",
+    ])
+
+
+def _cover_body(project, kw):
+    return "\n".join([
+        "PHOTOVOLTAIC SYSTEM - PROJECT INFORMATION",
+        f"AHJ: {project['Engineering_Project__c.AHJ__c']}",
+        f"Utility: {project['Engineering_Project__c.Utility__c']}",
+        f"DC SIZE: {kw:.3f} KW",
+        "MODULE:",
+        f"({project['Engineering_Project__c.Module_Quantity__c']}) "
+        f"{project['Engineering_Project__c.Module_Manufacturer__c']} "
+        f"{project['Engineering_Project__c.Module_Part_Number__c']}",
+        "INVERTER:",
+        f"({project['Engineering_Project__c.Inverter_Quantity__c']}) "
+        f"{project['Engineering_Project__c.Inverter_Manufacturer__c'].upper()} "
+        f"{project['Engineering_Project__c.Inverter_Part_Number__c']}",
+        "CODES: IBC {0} IFC {0} IRC {0} NEC {1}".format(
+            project["Engineering_Project__c.AHJ_Database__r.IBC__c"],
+            project["Engineering_Project__c.AHJ_Database__r.NEC__c"],
+        ),
+        "SHEET INDEX: PV-1 COVER, PV-2 SITE PLAN, PV-3 ELECTRICAL, PV-4 SPEC SHEET",
+    ])
+
+
+def _site_plan_body():
+    return "\n".join([
+        "ROOF PLAN / ARRAY LAYOUT",
+        "(E) MAIN SERVICE PANEL",
+        "(N) PV DISCONNECT",
+        "FIRE SETBACK 36\"",
+    ])
+
+
+def _structural_body(project):
+    return "\n".join([
+        "STRUCTURAL / ATTACHMENT DATA",
+        "ROOF SURFACE TYPE: " + project["Engineering_Project__c.Roofing_Material__c"].upper(),
+        "RAFTER: {} @ {} O.C.".format(
+            project["Engineering_Project__c.Rafter_Truss_Size__c"],
+            project["Engineering_Project__c.Rafter_Truss_Spacing__c"],
+        ),
+        "TYPE OF RACKING",
+        "IRONRIDGE " + project["Engineering_Project__c.Racking_Model__c"],
+        "TYPE OF ATTACHMENT",
+        "IRONRIDGE " + project["Engineering_Project__c.Attachment_Model__c"],
+    ])
+
+
+def _electrical_body(imp):
+    return "\n".join([
+        "SINGLE LINE DIAGRAM",
+        "MODULE ELECTRICAL DATA",
+        "VMP",
+        "33.9 V",
+        "IMP",
+        f"{imp:.2f} A",
+        "INVERTER SPECIFICATIONS",
+        "MAX CURRENT PER MPPT (IMP) 13A",
+    ])
+
+
+def _spec_body(project, imp):
+    return "\n".join([
+        "SOLAR MODULE SPECIFICATIONS",
+        f"VMP 33.9 V IMP {imp:.2f} A VOC 40.1 V ISC 13.41 A",
+        "TEMPERATURE COEFFICIENT PMAX -0.26%/C",
+        "",
+        _structural_body(project),
+    ])
+
+
+def sheet_plan(pages):
+    """(title, kind) for each page: cover, site plan, electrical, spec sheet, then filler/repeat sheets."""
+    plan = [("PV-1 COVER SHEET", "cover"), ("PV-2 SITE PLAN", "site plan"),
+            ("PV-3 ELECTRICAL SINGLE LINE DIAGRAM", "electrical"), ("PV-4 SPEC SHEET", "spec sheet")]
+    for n in range(len(plan) + 1, pages + 1):
+        plan.append((f"PV-{n} {FILLER_SHEETS[n % len(FILLER_SHEETS)]}", "other"))
+    return plan[:pages]
+
+
+def write_planset(pdf_path, pages, project=PROJECT, seed=0, imp=12.5):
+    rng = random.Random(seed)
+    watt = 400
+    kw = watt * int(project["Engineering_Project__c.Module_Quantity__c"]) / 1000.0
+    width, height = PAGE_SIZE
+    title_x = width * TITLE_BLOCK_X
+    doc = fitz.open()
+    for number, (title, kind) in enumerate(sheet_plan(pages), start=1):
+        page = doc.new_page(width=width, height=height)
+        if kind == "cover":
+            body = _cover_body(project, kw)
+        elif kind == "site plan":
+            body = _site_plan_body()
+        elif kind == "electrical":
+            body = _electrical_body(imp)
+        elif kind == "spec sheet":
+            body = _spec_body(project, imp)
+        else:
+            body = "\n".join(rng.choice(NOTES) for _ in range(60))
+        page.insert_text((36, 48), body, fontsize=FONT_SIZE)
+        page.insert_text((title_x + 10, 48), _title_block(project, title, number, pages), fontsize=FONT_SIZE)
+        page.draw_line((title_x, 0), (title_x, height))
+    doc.save(pdf_path, garbage=3, deflate=True)
+    doc.close()
+
+
+def write_csv(csv_path, project=PROJECT):
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Field", "Value"])
+        for field, value in project.items():
+            writer.writerow([field, value])
+
+
+def write_project(out_dir, name, pages, project=PROJECT, seed=0):
+    """Write `<name>.pdf` and `<name>.csv` (the batch.py pairing) and return both paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    pdf_path = os.path.join(out_dir, f"{name}.pdf")
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    write_planset(pdf_path, pages, project, seed=seed)
+    write_csv(csv_path, project)
+    return csv_path, pdf_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic plansets and matching CSVs.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--pages", type=int, nargs="+", default=[4, 40, 400])
+    parser.add_argument("--projects", type=int, default=1, help="Projects to write per page count")
+    args = parser.parse_args(argv)
+    for pages in args.pages:
+        for i in range(args.projects):
+            csv_path, pdf_path = write_project(args.out_dir, f"synthetic_{pages}p_{i:03d}", pages, seed=i)
+            print(pdf_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
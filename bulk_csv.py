@@ -0,0 +1,253 @@
+"""
+Wide-format bulk CSV ingestion: one row per Engineering_Project__c.
+
+A Salesforce export can hold hundreds of projects in a single file, one
+column per field (the column names are the `Field` names of the per-project
+CSV). Instead of normalizing each project's values one by one inside the
+checks, the whole export is normalized column by column with pandas string
+operations, which run as Arrow kernels over the ASCII values:
+
+    projects = load_bulk_csv("export.csv")        # {project key: ProjectData}
+    csv_data = projects["PRJ-0001"]
+    review_project(csv_data, pdf_path="PRJ-0001.pdf")
+
+Each ProjectData holds the same fields and compiled addresses that
+load_csv_data would give for that project. Its `normalized` dict carries the
+CSV side of every check (normalize_string, normalize_phone_number,
+normalize_state, alias mapping, ...), so the per-project checks only do the
+planset side. Arrow's regex classes and case mapping are not Python's outside
+ASCII (NBSP is no regex space to Arrow, "İ" and final sigma lowercase
+differently), so the few values with a non-ASCII character go through the
+qc_core normalizer itself.
+
+pandas is imported here and nowhere on the per-project path; this module is
+only loaded when a bulk export is actually reviewed.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from qc_core import ABBR_TO_FULL, CHECK_REGISTRY, ProjectData, is_numeric, normalize_string
+from timing import ensure_timer
+
+# Columns tried, in order, as the project key when none is given
+KEY_COLUMNS = ("project", "Engineering_Project__c.Name", "Name", "Id")
+
+PROJECT_ADDRESS_PARTS = (
+    "Engineering_Project__c.Installation_Street_Address_1__c",
+    "Engineering_Project__c.Installation_Street_Address_2__c",
+    "Engineering_Project__c.Installation_City__c",
+    "Engineering_Project__c.Installation_State__c",
+    "Engineering_Project__c.Installation_Zip_Code__c",
+)
+
+CUSTOMER_ADDRESS_PARTS = (
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_2__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c",
+)
+
+# Python's \s within ASCII (str.strip() and re agree on it); Arrow's \s leaves out \x0b and \x1c-\x1f
+ASCII_SPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+
+# ASCII strings float() accepts, i.e. qc_core.is_numeric, as one regex (float() does not strip \x1c-\x1f)
+_DIGITS = r'[0-9](?:_?[0-9])*'
+_FLOAT_SPACE = r'[\t\n\x0b\x0c\r ]*'
+NUMERIC_PATTERN = (
+    rf'(?i)^{_FLOAT_SPACE}[+-]?(?:(?:(?:{_DIGITS})?\.{_DIGITS}|{_DIGITS}\.?)(?:[eE][+-]?{_DIGITS})?'
+    rf'|inf|infinity|nan){_FLOAT_SPACE}$'
+)
+
+
+def _objects(values):
+    # One conversion to Python objects; iterating an Arrow-backed Series goes element by element
+    return values.to_numpy(dtype=object, na_value=None)
+
+
+def _by_ascii(values, arrow_op, python_op):
+    """arrow_op over the all-ASCII values of a Series of strings, python_op on each of the others."""
+    ascii_values = values.str.isascii().to_numpy(dtype=bool)
+    if ascii_values.all():
+        return arrow_op(values)
+    converted = arrow_op(values[ascii_values])
+    combined = np.empty(len(values), dtype=object)
+    combined[ascii_values] = _objects(converted)
+    combined[~ascii_values] = [python_op(value) for value in _objects(values[~ascii_values])]
+    return pd.Series(combined, index=values.index).astype(converted.dtype)
+
+
+# ----------------------------
+# Column versions of the qc_core normalizers (same results, one call per column)
+# ----------------------------
+def normalize_string_column(values):
+    """normalize_string over a Series of strings."""
+    return _by_ascii(
+        values,
+        lambda ascii_values: (ascii_values.str.replace(r'<[^>]+>', '', regex=True)
+                                          .str.replace(f'[{ASCII_SPACE}.,"]', '', regex=True)
+                                          .str.lower()),
+        normalize_string,
+    )
+
+
+def normalize_phone_column(values):
+    """normalize_phone_number over a Series of strings."""
+    return values.str.replace(r'[^0-9]', '', regex=True)
+
+
+def normalize_dimension_column(values):
+    """normalize_dimension over a Series of strings."""
+    # Only "X" lowercases to a kept character, so Arrow's case mapping is safe here
+    return values.str.lower().str.replace(r'[^0-9x]', '', regex=True)
+
+
+def strip_column(values):
+    """str.strip() over a Series of strings."""
+    return _by_ascii(values, lambda ascii_values: ascii_values.str.strip(ASCII_SPACE), str.strip)
+
+
+def normalize_state_column(values):
+    """normalize_state over a Series of strings: abbreviations become lowercase full names."""
+    lowered = _by_ascii(values, lambda ascii_values: ascii_values.str.strip(ASCII_SPACE).str.lower(),
+                        lambda value: value.strip().lower())
+    return lowered.map(ABBR_TO_FULL).fillna(lowered)
+
+
+def apply_alias_column(values, aliases):
+    """apply_alias over a Series of strings."""
+    normalized = normalize_string_column(values)
+    return normalized.map(aliases).fillna(normalized)
+
+
+def compile_address_column(df, parts):
+    """compile_project_address / compile_customer_address for every row: the non-empty parts joined by ", "."""
+    compiled = pd.Series("", index=df.index, dtype="str")
+    for column in parts:
+        if column not in df:
+            continue
+        part = strip_column(df[column].fillna(""))
+        joined = compiled.where(compiled.eq(""), compiled + ", ") + part
+        compiled = joined.where(part.ne(""), compiled)
+    return compiled
+
+
+# ----------------------------
+# Per-mode CSV side (mirrors qc_core.CSV_PREPARERS)
+# ----------------------------
+def _address_components(df, check):
+    street, city, state, zipc = (df[field].fillna("") if field in df else pd.Series("", index=df.index, dtype="str")
+                                 for field in check.address)
+    columns = [
+        normalize_string_column(street),
+        normalize_string_column(city),
+        normalize_string_column(normalize_state_column(state)),
+        normalize_string_column(zipc),
+    ]
+    rows = zip(*(_objects(column) for column in columns))
+    return pd.Series([tuple(c for c in row if c) for row in rows], index=df.index, dtype=object)
+
+
+def _label_components(values, check):
+    split = values.str.split(check.split.pattern, regex=True)
+    counts = split.str.len().to_numpy()
+    normalized = _objects(normalize_string_column(split.explode().astype("str")))
+    bounds = np.cumsum(counts)
+    return pd.Series(
+        [tuple(normalized[end - count:end]) for count, end in zip(counts, bounds)],
+        index=values.index, dtype=object,
+    )
+
+
+def _text_values(values, check):
+    numeric = _objects(_by_ascii(values, lambda ascii_values: ascii_values.str.match(NUMERIC_PATTERN), is_numeric))
+    rows = zip(numeric, _objects(values), _objects(normalize_string_column(values)))
+    return pd.Series(
+        [(True, raw) if is_number else (False, norm) for is_number, raw, norm in rows],
+        index=values.index, dtype=object,
+    )
+
+
+COLUMN_PREPARERS = {
+    "quantity": lambda values, check: values,
+    "contractor_name": lambda values, check: normalize_string_column(values),
+    "phone": lambda values, check: normalize_phone_column(values),
+    "label_value": lambda values, check: normalize_string_column(values),
+    "dimension": lambda values, check: normalize_dimension_column(values),
+    "next_line_alias": lambda values, check: apply_alias_column(values, check.aliases),
+    "alias_in_text": lambda values, check: apply_alias_column(values, check.aliases),
+    "label_any": _label_components,
+    "text": _text_values,
+}
+
+
+def normalized_columns(df, checks=None):
+    """{check name: Series of FieldCheck.csv_value} for every check whose field has a value, over the whole export."""
+    columns = {}
+    for check in (checks or CHECK_REGISTRY).values():
+        if check.field not in df:
+            continue
+        values = df[check.field].dropna()
+        values = values[values.ne("")]
+        if check.mode == "address":
+            columns[check.name] = _address_components(df, check).loc[values.index]
+        else:
+            columns[check.name] = COLUMN_PREPARERS[check.mode](values, check)
+    return columns
+
+
+def _project_keys(df, key):
+    if key is None:
+        key = next((column for column in KEY_COLUMNS if column in df), None)
+    if key is None:
+        return pd.Series([f"row-{i + 1}" for i in range(len(df))], index=df.index)
+    if key not in df:
+        raise KeyError(f"Bulk CSV has no {key!r} column")
+    keys = strip_column(df[key].fillna(""))
+    duplicated = sorted(set(keys[keys.duplicated()]))
+    if duplicated:
+        raise ValueError(f"Duplicate project keys in bulk CSV: {', '.join(duplicated[:10])}")
+    if keys.eq("").any():
+        raise ValueError(f"Bulk CSV rows without a {key!r} value: {', '.join(str(i + 2) for i in keys.index[keys.eq('')][:10])}")
+    return keys
+
+
+def read_bulk_frame(csv_source):
+    """The export as a DataFrame of strings (NA where a cell is empty), with stripped column names."""
+    # pandas' default NA markers are qc_core.CSV_NA_VALUES, so empty cells match the Field/Value reader
+    df = pd.read_csv(csv_source, dtype=str, encoding="utf-8-sig")
+    df.columns = df.columns.str.strip()
+    return df.reset_index(drop=True)
+
+
+def load_bulk_csv(csv_source, key=None, timer=None):
+    """
+    Read a wide export (path or file-like) into {project key: ProjectData}, in
+    file order. The key is the `key` column, else the first of KEY_COLUMNS
+    present, else "row-<n>".
+    """
+    timer = ensure_timer(timer)
+    with timer.stage("bulk.read"):
+        df = read_bulk_frame(csv_source)
+        keys = _project_keys(df, key)
+    with timer.stage("bulk.normalize"):
+        df["Compiled_Project_Address"] = compile_address_column(df, PROJECT_ADDRESS_PARTS)
+        df["Compiled_Customer_Address"] = compile_address_column(df, CUSTOMER_ADDRESS_PARTS)
+        normalized = normalized_columns(df)
+    with timer.stage("bulk.projects"):
+        # Same shape as load_csv_data: empty cells are absent, compiled addresses always present
+        fields = [{} for _ in range(len(df))]
+        for field in df.columns:
+            for row, value in enumerate(_objects(df[field])):
+                if value is not None:
+                    fields[row][field] = value
+        prepared = [{} for _ in range(len(df))]
+        for name, column in normalized.items():
+            for row, value in zip(column.index, column.to_numpy(dtype=object)):
+                prepared[row][name] = value
+        projects = OrderedDict(
+            (project, ProjectData(fields[row], prepared[row])) for row, project in enumerate(_objects(keys))
+        )
+    return projects
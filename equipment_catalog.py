@@ -0,0 +1,289 @@
+"""
+Local module / inverter catalog keyed by part number.
+
+The DC System Size check and the TESLA MCI CHECK need a module's STC
+wattage and Imp. Without a catalog the wattage is guessed from digit runs in
+the part number and Imp is scraped off the planset. With one, both come from
+the datasheet values entered once:
+
+    catalog = catalog_from_env()               # None when there is no catalog file
+    match = catalog.module("REC400AA PURE-R")  # CatalogMatch or None
+    match.entry.stc_w, match.entry.imp, match.how
+
+The catalog is a CSV (or a SQLite database with an `equipment` table) with
+the columns
+
+    kind,manufacturer,part_number,stc_w,vmp,imp,voc,isc,ac_w
+
+where kind is "module" or "inverter" and empty cells are unknown values.
+Part numbers are normalized (upper case, letters and digits only) into a
+radix trie per kind, so a Salesforce part number with a trailing color or
+frame suffix ("REC400AA-BLK") still finds its base entry by longest prefix,
+and a truncated one finds the single entry it starts. Lookups are memoized.
+
+QC_EQUIPMENT_CATALOG names the file (default: equipment_catalog.csv next to
+this module, when present; "off" disables the catalog). No catalog file ships
+with the tool, so the catalog is off until one is provided. The file is loaded
+once per process and again only after it changes on disk; a review resolves it
+once (one stat()) and passes it to its lookups.
+"""
+import csv
+import os
+import re
+import sqlite3
+from functools import lru_cache
+from stat import S_ISREG
+from typing import NamedTuple, Optional
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "equipment_catalog.csv")
+
+CATALOG_COLUMNS = ("kind", "manufacturer", "part_number", "stc_w", "vmp", "imp", "voc", "isc", "ac_w")
+_NUMERIC_COLUMNS = ("stc_w", "vmp", "imp", "voc", "isc", "ac_w")
+
+# A prefix / completion match must cover at least this many normalized
+# characters, so "REC" alone never stands for a whole product line
+MIN_PREFIX = 6
+
+# Memoized (kind, part number) lookups per catalog
+LOOKUP_CACHE_SIZE = 4096
+
+_PART_CLEAN = re.compile(r'[^A-Z0-9]')
+
+
+def normalize_part_number(part_number):
+    return _PART_CLEAN.sub('', str(part_number).upper())
+
+
+class CatalogEntry(NamedTuple):
+    kind: str
+    manufacturer: str
+    part_number: str
+    stc_w: Optional[float] = None
+    vmp: Optional[float] = None
+    imp: Optional[float] = None
+    voc: Optional[float] = None
+    isc: Optional[float] = None
+    ac_w: Optional[float] = None
+
+
+class CatalogMatch(NamedTuple):
+    entry: CatalogEntry
+    how: str  # "exact", "prefix" (catalog part + suffix) or "completion" (truncated part number)
+
+
+class _Node:
+    __slots__ = ("edges", "entry", "count")
+
+    def __init__(self, entry=None):
+        self.edges = None  # first char -> (edge label, child node); None for leaves
+        self.entry = entry
+        self.count = 0  # entries in this subtree
+
+
+class PartTrie:
+    """
+    Radix trie: every edge holds a whole run of characters, so N part numbers
+    take at most 2N nodes whatever their length.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+
+    def __len__(self):
+        return self.root.count
+
+    def insert(self, key, entry):
+        """Add `entry` under `key` (a normalized part number); a later entry for the same key wins."""
+        node = self.root
+        path = [node]
+        while True:
+            if not key:
+                added = node.entry is None
+                node.entry = entry
+                break
+            if node.edges is None:
+                node.edges = {}
+            edge = node.edges.get(key[0])
+            if edge is None:
+                node.edges[key[0]] = (key, _Node(entry))
+                path.append(node.edges[key[0]][1])
+                added = True
+                break
+            label, child = edge
+            shared = 1
+            while shared < len(label) and shared < len(key) and label[shared] == key[shared]:
+                shared += 1
+            if shared < len(label):
+                # Split the edge where the new key leaves it
+                middle = _Node()
+                middle.edges = {label[shared]: (label[shared:], child)}
+                middle.count = child.count
+                node.edges[key[0]] = (label[:shared], middle)
+                child = middle
+            node = child
+            path.append(node)
+            key = key[shared:]
+        if added:
+            for visited in path:
+                visited.count += 1
+
+    def get(self, key):
+        node, inside_edge = self._walk(key)
+        return node.entry if node is not None and not inside_edge else None
+
+    def longest_prefix(self, key, min_length=0):
+        """(entry, length) for the longest stored key that `key` starts with, or (None, 0)."""
+        best, best_length = None, 0
+        node, depth = self.root, 0
+        while node is not None:
+            if node.entry is not None and depth >= min_length:
+                best, best_length = node.entry, depth
+            if depth == len(key) or node.edges is None:
+                break
+            edge = node.edges.get(key[depth])
+            if edge is None or not key.startswith(edge[0], depth):
+                break
+            node, depth = edge[1], depth + len(edge[0])
+        return best, best_length
+
+    def only_completion(self, key):
+        """The entry of the one stored key starting with `key`, or None when there are none or several."""
+        node, _ = self._walk(key)
+        if node is None or node.count != 1:
+            return None
+        while node.entry is None:
+            node = next(iter(node.edges.values()))[1]
+        return node.entry
+
+    def _walk(self, key):
+        """
+        (node, inside_edge): the node reached by reading `key` - the node below
+        when `key` ends inside an edge, with inside_edge True - or (None, False).
+        """
+        node = self.root
+        while key:
+            edge = node.edges.get(key[0]) if node.edges else None
+            if edge is None:
+                return None, False
+            label, child = edge
+            if key.startswith(label):
+                node, key = child, key[len(label):]
+            elif label.startswith(key):
+                return child, True
+            else:
+                return None, False
+        return node, False
+
+
+class EquipmentCatalog:
+    """Module and inverter entries, one PartTrie per kind, with memoized lookups."""
+
+    def __init__(self, entries=()):
+        self.tries = {"module": PartTrie(), "inverter": PartTrie()}
+        for entry in entries:
+            key = normalize_part_number(entry.part_number)
+            if key and entry.kind in self.tries:
+                self.tries[entry.kind].insert(key, entry)
+        self.lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup)
+
+    def __len__(self):
+        return sum(len(trie) for trie in self.tries.values())
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a catalog CSV, or a SQLite database (.db / .sqlite / .sqlite3) with an `equipment` table."""
+        if path.lower().endswith((".db", ".sqlite", ".sqlite3")):
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                cursor = conn.execute("SELECT * FROM equipment")
+                columns = [column[0] for column in cursor.description]
+                rows = [dict(zip(_columns(columns), row)) for row in cursor]
+            finally:
+                conn.close()
+        else:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                reader.fieldnames = _columns(reader.fieldnames or [])
+                rows = list(reader)
+        return cls(_entry(row) for row in rows)
+
+    def _lookup(self, kind, part_number):
+        key = normalize_part_number(part_number)
+        trie = self.tries.get(kind)
+        if not key or trie is None:
+            return None
+        entry = trie.get(key)
+        if entry is not None:
+            return CatalogMatch(entry, "exact")
+        entry, _ = trie.longest_prefix(key, min_length=MIN_PREFIX)
+        if entry is not None:
+            return CatalogMatch(entry, "prefix")
+        if len(key) >= MIN_PREFIX:
+            entry = trie.only_completion(key)
+            if entry is not None:
+                return CatalogMatch(entry, "completion")
+        return None
+
+    def module(self, part_number) -> Optional[CatalogMatch]:
+        return self.lookup("module", part_number)
+
+    def inverter(self, part_number) -> Optional[CatalogMatch]:
+        return self.lookup("inverter", part_number)
+
+
+def _number(value):
+    if value is None or str(value).strip() == "":
+        return None
+    return float(str(value).replace(",", ""))
+
+
+def _columns(names):
+    return [str(name).strip().lower() for name in names]
+
+
+def _entry(row):
+    missing = [column for column in ("kind", "part_number") if not str(row.get(column) or "").strip()]
+    if missing:
+        raise ValueError(f"Equipment catalog row without {', '.join(missing)}: {row}")
+    return CatalogEntry(
+        kind=str(row["kind"]).strip().lower(),
+        manufacturer=str(row.get("manufacturer") or "").strip(),
+        part_number=str(row["part_number"]).strip(),
+        **{column: _number(row.get(column)) for column in _NUMERIC_COLUMNS},
+    )
+
+
+def catalog_file():
+    """(path, os.stat_result) of the catalog file from QC_EQUIPMENT_CATALOG, or (None, None) when it is off or absent."""
+    path = os.environ.get("QC_EQUIPMENT_CATALOG", DEFAULT_CATALOG)
+    if not path or path.lower() == "off":
+        return None, None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return (path, stat) if S_ISREG(stat.st_mode) else (None, None)
+
+
+@lru_cache(maxsize=4)
+def _load(path, mtime_ns, size):
+    return EquipmentCatalog.from_file(path)
+
+
+def catalog_stamp():
+    """Identifies the catalog file's current contents ("" without one), for result cache keys."""
+    path, stat = catalog_file()
+    if path is None:
+        return ""
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def catalog_from_env():
+    """
+    The process-wide catalog (loaded on first use, reloaded when the file
+    changes), or None. Each call stats the file; call it once per review.
+    """
+    path, stat = catalog_file()
+    if path is None:
+        return None
+    return _load(path, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,155 @@
+"""
+Approximate lookup of CSV values in the planset text.
+
+An exact substring test turns one mistyped or mis-read character ("Sunny Day
+Solr LLC") into a hard ❌, and finding the line a value sits on means a scan
+of every line. NgramIndex keeps an inverted index from character trigrams to
+the lines of the normalized planset text they occur on, so a lookup only
+touches the 2-line windows that share trigrams with the value:
+
+    ngrams = NgramIndex(index.normalized_lines)
+    ngrams.first_containing("sunnydaysolarllc")      # window (line) index, or None
+    near = ngrams.near_match("sunnydaysolrllc")      # NearMatch or None
+    near.line, near.distance, near.score
+
+Candidates for a near match are ranked by shared trigrams (a window within k
+edits of the value shares at least len(grams) - 3k of them), and only the
+best few are scored with an edit distance that gives up past MAX_EDITS. The
+values are normalized like the exact checks (normalize_string drops spaces
+and punctuation), so distances count the characters that matter.
+"""
+import heapq
+from typing import NamedTuple, Optional
+
+NGRAM = 3
+
+# A near match needs at least this share of the value's characters right ...
+MIN_SCORE = 0.85
+# ... and at most this many edits, however long the value
+MAX_EDITS = 3
+
+# Candidate windows scored with the edit distance per lookup
+TOP_K = 5
+
+
+class NearMatch(NamedTuple):
+    line: Optional[int]  # first line of the matching 2-line window (None when not looked up in the index)
+    distance: int  # edits between the value and the closest part of the window
+    score: float  # 1 - distance / len(value)
+
+
+def ngrams(text):
+    """The distinct character trigrams of `text` (the text itself when shorter)."""
+    if len(text) < NGRAM:
+        return {text} if text else set()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def allowed_edits(value):
+    """Edits a near match of `value` may have: none for short values, MAX_EDITS at most."""
+    return min(MAX_EDITS, int(len(value) * (1 - MIN_SCORE) + 1e-9))
+
+
+def substring_distance(value, text, max_edits):
+    """
+    Fewest edits turning `value` into some substring of `text`, or None when
+    that takes more than max_edits (Sellers' algorithm: the edit distance with
+    a free start and end anywhere in `text`). Stops at the first exact hit.
+    """
+    m = len(value)
+    if m == 0:
+        return 0
+    column = list(range(m + 1))
+    best = column[m]
+    for ch in text:
+        previous_diagonal = column[0]  # free start anywhere in text: row 0 stays 0
+        for i in range(1, m + 1):
+            cost = previous_diagonal if value[i - 1] == ch else previous_diagonal + 1
+            previous_diagonal = column[i]
+            column[i] = min(cost, column[i] + 1, column[i - 1] + 1)
+        if column[m] < best:
+            best = column[m]
+            if best == 0:
+                return 0
+    return best if best <= max_edits else None
+
+
+class NgramIndex:
+    """
+    Trigram -> line postings over a list of normalized lines. Each trigram of
+    the joined lines is filed under the line it starts on, so a value inside
+    the 2-line window at line i has all its trigrams filed under i or i + 1.
+    """
+
+    def __init__(self, normalized_lines):
+        self.lines = list(normalized_lines)
+        self.postings = {}
+        stream = "".join(self.lines)
+        last = len(stream) - NGRAM + 1
+        start = 0
+        for i, line in enumerate(self.lines):
+            end = start + len(line)
+            for gram in {stream[j:j + NGRAM] for j in range(start, min(end, last))}:
+                self.postings.setdefault(gram, []).append(i)
+            start = end
+
+    def window(self, i):
+        """Line i joined with the line after it."""
+        return self.lines[i] + (self.lines[i + 1] if i + 1 < len(self.lines) else "")
+
+    def _windows_with(self, gram):
+        lines = self.postings.get(gram, ())
+        return set(lines).union(i - 1 for i in lines if i > 0)
+
+    def _by_rarity(self, value):
+        return sorted(ngrams(value), key=lambda gram: len(self.postings.get(gram, ())))
+
+    def first_containing(self, value, stop=None):
+        """
+        Index of the first window (below `stop`) containing `value` verbatim,
+        or None. Only windows holding the value's rarest trigram are tested.
+        """
+        stop = len(self.lines) if stop is None else min(stop, len(self.lines))
+        if not value:
+            return 0 if stop > 0 else None
+        if len(value) < NGRAM:
+            candidates = range(stop)
+        else:
+            candidates = sorted(i for i in self._windows_with(self._by_rarity(value)[0]) if i < stop)
+        for i in candidates:
+            if value in self.window(i):
+                return i
+        return None
+
+    def candidates(self, value, max_edits, k=TOP_K):
+        """Up to k window indices sharing the most trigrams with `value`, best first."""
+        grams = self._by_rarity(value)
+        # q-gram lemma: each edit destroys at most NGRAM of the value's trigrams, so
+        # a window within max_edits holds `needed` of them - and so at least one of
+        # the rarest len(grams) - needed + 1
+        needed = max(1, len(grams) - NGRAM * max_edits)
+        seeds = set()
+        for gram in grams[:len(grams) - needed + 1]:
+            seeds.update(self._windows_with(gram))
+        ranked = []
+        for i in seeds:
+            window = self.window(i)
+            shared = sum(1 for gram in grams if gram in window)
+            if shared >= needed:
+                ranked.append((shared, -i))
+        return [-neg_i for _, neg_i in heapq.nlargest(k, ranked)]
+
+    def near_match(self, value, k=TOP_K) -> Optional[NearMatch]:
+        """The closest window within allowed_edits(value) of `value`, or None."""
+        max_edits = allowed_edits(value)
+        if max_edits == 0:
+            return None
+        best = None
+        for i in self.candidates(value, max_edits, k):
+            bound = max_edits if best is None else best.distance - 1
+            if bound < 0:
+                break
+            distance = substring_distance(value, self.window(i), bound)
+            if distance is not None and (best is None or distance < best.distance):
+                best = NearMatch(i, distance, 1 - distance / len(value))
+        return best
@@ -0,0 +1,524 @@
+"""
+Per-review resource budgets, and the watchdog process pool that enforces them.
+
+Some vendor plansets are pathological: sheets with hundreds of thousands of
+vector-drawn characters, or text that keeps normalize_states_in_text and the
+Imp regexes busy for minutes. Every review runs under explicit budgets:
+
+    QC_MAX_PAGES        pages read (classified, extracted); later pages are ignored      default 1000
+    QC_MAX_PAGE_CHARS   characters kept per page, text and word boxes                    default 200000
+    QC_CHECK_BUDGET_S   seconds one check may run                                        default 30
+    QC_REVIEW_BUDGET_S  seconds one review may run                                       default 300
+
+(0 disables a budget). The page and character caps and the review deadline
+are applied inside the review by a ResourceBudget, passed like MemoryBudget:
+a check that would start after the deadline is not run. A check that is
+already running cannot be stopped from inside the process - a regex is one C
+call - so reviews run on ReviewWatchdog worker processes. Workers report
+every stage start and end (see timing.set_stage_listener); a worker stuck in
+a check for longer than its budget, or in any stage well past the review
+deadline, is killed and replaced, and the review is run again on the fresh
+worker with that check (or the whole planset) skipped.
+
+Checks that hit a budget come back as ⚠️ rows (BUDGET_EXCEEDED status) and
+every other result is returned as usual; the hits are listed in
+review["budget"] / the batch record's "budget".
+
+    with ReviewWatchdog(workers=4) as watchdog:
+        record = watchdog.submit(review_pair, pair).result()
+        for kind, payload in watchdog.stream(iter_review, csv_data, pdf_path=path):
+            ...
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+from timing import set_stage_listener
+
+DEFAULT_MAX_PAGES = 1000
+DEFAULT_MAX_PAGE_CHARS = 200_000
+DEFAULT_CHECK_BUDGET_S = 30
+DEFAULT_REVIEW_BUDGET_S = 300
+
+# Status prefix of every row a budget stopped (a ⚠️, so it counts as missing)
+BUDGET_EXCEEDED = "⚠️ Budget exceeded"
+
+# ResourceBudget.skipped key for "do not open the planset at all"
+PLANSET = "planset"
+
+# A worker still busy this long after the review deadline is stuck in one call
+KILL_GRACE_S = 10.0
+
+POLL_S = 0.25
+
+# Timer stages of the module checks (extra.<label>[.<step>]), see qc_core.module_details
+EXTRA_CHECK_LABELS = ("DC System Size Check", "TESLA MCI CHECK", "Module Spec Check")
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def review_workers():
+    """Watchdog workers of the UI (QC_REVIEW_WORKERS, default: CPU count)."""
+    return int(_env_number("QC_REVIEW_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def stage_check_label(stage):
+    """The check label a timer stage belongs to (check.<label>, extra.<label>[.<step>]), or None."""
+    group, _, rest = stage.partition(".")
+    if group == "check":
+        return rest
+    if group == "extra":
+        for label in EXTRA_CHECK_LABELS:
+            if rest == label or rest.startswith(label + "."):
+                return label
+    return None
+
+
+class WorkerFailed(RuntimeError):
+    """A watchdog worker died while reviewing (e.g. killed by the OOM killer), or was stopped for good."""
+
+
+class ResourceBudget:
+    """
+    Limits for one review, and what hit them. `skipped` maps check labels (or
+    PLANSET) the watchdog stopped to their (status, explanation). The review
+    clock starts when the budget is created.
+    """
+
+    def __init__(self, max_pages=DEFAULT_MAX_PAGES, max_page_chars=DEFAULT_MAX_PAGE_CHARS,
+                 check_s=DEFAULT_CHECK_BUDGET_S, review_s=DEFAULT_REVIEW_BUDGET_S):
+        self.max_pages = max_pages
+        self.max_page_chars = max_page_chars
+        self.check_s = check_s
+        self.review_s = review_s
+        self.started = time.time()
+        self.skipped = {}  # label or PLANSET -> (status, explanation)
+        self.hits = []  # {"budget", "where", "detail"}
+        self._seen = set()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_pages=int(_env_number("QC_MAX_PAGES", DEFAULT_MAX_PAGES)),
+            max_page_chars=int(_env_number("QC_MAX_PAGE_CHARS", DEFAULT_MAX_PAGE_CHARS)),
+            check_s=_env_number("QC_CHECK_BUDGET_S", DEFAULT_CHECK_BUDGET_S),
+            review_s=_env_number("QC_REVIEW_BUDGET_S", DEFAULT_REVIEW_BUDGET_S),
+        )
+
+    def hit(self, budget, where, detail):
+        if (budget, where) not in self._seen:
+            self._seen.add((budget, where))
+            self.hits.append({"budget": budget, "where": where, "detail": detail})
+
+    @property
+    def planset_skipped(self):
+        return PLANSET in self.skipped
+
+    def page_limit(self, page_count):
+        """How many of a planset's pages may be read."""
+        if self.max_pages and page_count > self.max_pages:
+            self.hit("pages", "planset", f"{page_count} pages, only the first {self.max_pages} were read")
+            return self.max_pages
+        return page_count
+
+    def limit_text(self, page_number, text):
+        """A page's text cut to max_page_chars, at a line break."""
+        if not self.max_page_chars or len(text) <= self.max_page_chars:
+            return text
+        self.hit("page_chars", f"page {page_number}", f"only the first {self.max_page_chars} characters were read")
+        cut = text.rfind("\n", 0, self.max_page_chars) + 1
+        return text[:cut or self.max_page_chars]
+
+    def limit_words(self, page_number, words):
+        """A page's words (tuples with the text at [4]) up to max_page_chars characters in all."""
+        if not self.max_page_chars:
+            return words
+        total = 0
+        for count, word in enumerate(words):
+            total += len(word[4]) + 1
+            if total > self.max_page_chars:
+                self.hit("page_chars", f"page {page_number}", f"only the first {self.max_page_chars} characters were read")
+                return words[:count]
+        return words
+
+    def expired(self):
+        return bool(self.review_s) and time.time() - self.started > self.review_s
+
+    def stop_reason(self, label):
+        """(status, explanation) when the check `label` must not run, else None."""
+        if label in self.skipped:
+            return self.skipped[label]
+        if PLANSET in self.skipped:
+            return self.skipped[PLANSET]
+        if self.expired():
+            self.hit("review", label, f"not run, the review was past its {self.review_s:g} s budget")
+            return (
+                f"{BUDGET_EXCEEDED}: review over {self.review_s:g} s",
+                f"The review ran out of its {self.review_s:g} s time budget before this check; check it manually.",
+            )
+        return None
+
+    def stop_check(self, label, seconds):
+        self.skipped[label] = (
+            f"{BUDGET_EXCEEDED}: check stopped after {seconds:.0f} s",
+            f"Stopped by the watchdog (budget {self.check_s:g} s per check, {self.review_s:g} s per review); "
+            "check it manually.",
+        )
+        self.hit("check", label, f"stopped after {seconds:.1f} s, worker replaced")
+
+    def stop_planset(self, where, seconds):
+        self.skipped[PLANSET] = (
+            f"{BUDGET_EXCEEDED}: planset not read",
+            f"Reading the planset was stopped by the watchdog {seconds:.0f} s into the review "
+            f"(budget {self.review_s:g} s); check it manually.",
+        )
+        self.hit("review", where, f"stopped {seconds:.1f} s into the review, worker replaced; planset skipped")
+
+    def as_dict(self):
+        return {
+            "max_pages": self.max_pages,
+            "max_page_chars": self.max_page_chars,
+            "check_s": self.check_s,
+            "review_s": self.review_s,
+            "elapsed_s": round(time.time() - self.started, 3),
+            "hits": list(self.hits),
+        }
+
+
+def _worker_main(conn):
+    """Watchdog worker: run jobs until told to stop, reporting every timer stage."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the parent's to handle
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            conn.send(message)
+
+    set_stage_listener(lambda stage, started: send(("stage", stage, started)))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        job_id, fn, args, kwargs, budget, streaming = job
+        try:
+            result = fn(*args, budget=budget, **kwargs)
+            if streaming:
+                for event in result:
+                    send(("event", job_id, event))
+                result = None
+            send(("result", job_id, result))
+        except BaseException as e:
+            tb = traceback.format_exc()
+            try:
+                send(("error", job_id, e, tb))
+            except Exception:  # the exception itself does not pickle
+                send(("error", job_id, WorkerFailed(f"{type(e).__name__}: {e}"), tb))
+
+
+class _RemoteTraceback(Exception):
+    def __str__(self):
+        return self.args[0]
+
+
+class _Job:
+    def __init__(self, fn, args, kwargs, events=None):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.events = events  # queue.Queue of streamed messages; None for submit()
+        self.future = Future()
+        self.budget = None
+        self.cancelled = False
+
+
+class _Worker:
+    def __init__(self, context, daemon):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=daemon)
+        self.process.start()
+        child_conn.close()
+        self.job = None
+        self.job_id = 0
+        self.job_started = 0.0  # time.monotonic() the job was handed to this worker
+        self.stages = {}  # open stage -> time.monotonic() it started
+
+
+class ReviewWatchdog:
+    """
+    A pool of `workers` review processes, each started on first need. A
+    monitor thread hands out jobs, relays their results and kills and replaces
+    a worker that overruns its job's ResourceBudget (new budgets come from
+    `budget_factory`, called as each job first starts). Jobs are called as
+    fn(*args, budget=budget, **kwargs) in the worker.
+    """
+
+    def __init__(self, workers=None, budget_factory=ResourceBudget.from_env, daemon=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.budget_factory = budget_factory
+        self.daemon = daemon
+        # Not fork: the parent may be running threads (Streamlit, asyncio, this monitor)
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool = []
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = multiprocessing.Pipe(duplex=False)
+        self._closed = False
+        self._next_id = 0
+        self.kills = 0
+        self._monitor = threading.Thread(target=self._run, name="review-watchdog", daemon=True)
+        self._monitor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def submit(self, fn, *args, **kwargs):
+        """concurrent.futures.Future of fn's result; WorkerFailed when its worker dies."""
+        return self._enqueue(_Job(fn, args, kwargs)).future
+
+    def stream(self, fn, *args, **kwargs):
+        """
+        Yield the items of the generator fn(...) as the worker produces them.
+        After a worker is replaced, the rerun's events already yielded are
+        skipped. Closing the generator early (a Streamlit rerun abandoning the
+        page) abandons the job: a worker still running it is killed, so it
+        does not keep a worker busy with a review nobody reads.
+        """
+        job = self._enqueue(_Job(fn, args, kwargs, events=queue.Queue()))
+        yielded = replay = 0
+        finished = False
+        try:
+            while True:
+                kind, payload = job.events.get()
+                if kind == "event":
+                    if replay:
+                        replay -= 1
+                        continue
+                    yielded += 1
+                    yield payload
+                elif kind == "restart":
+                    replay = yielded
+                elif kind == "done":
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise payload
+        finally:
+            job.cancelled = True
+            if not finished:
+                self._wake_w.send(None)  # the monitor stops the job
+
+    def shutdown(self):
+        """Stop every worker; jobs not finished yet fail with WorkerFailed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake_w.send(None)
+        self._monitor.join()
+
+    def _enqueue(self, job):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The review watchdog is shut down")
+            self._pending.append(job)
+        self._wake_w.send(None)
+        return job
+
+    # ----------------------------
+    # Monitor thread
+    # ----------------------------
+    def _run(self):
+        try:
+            while not self._closed:
+                self._dispatch()
+                conns = [worker.conn for worker in self._pool if worker.job is not None]
+                for conn in wait(conns + [self._wake_r], timeout=POLL_S):
+                    if conn is self._wake_r:
+                        self._wake_r.recv()
+                        continue
+                    worker = next(w for w in self._pool if w.conn is conn)
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError):
+                        self._lost(worker)
+                        continue
+                    self._receive(worker, message)
+                self._abandon()
+                self._enforce()
+        finally:
+            self._closed = True
+            self._stop_all()
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                worker = next((w for w in self._pool if w.job is None), None)
+                if worker is None and len(self._pool) >= self.workers:
+                    return
+                job = self._pending.popleft()
+            if job.cancelled:
+                self._fail(job, WorkerFailed("Review abandoned"))
+                continue
+            if job.budget is None:  # first run, not a retry
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                job.budget = self.budget_factory()
+            if worker is None:
+                worker = _Worker(self._context, self.daemon)
+                self._pool.append(worker)
+            self._next_id += 1
+            worker.job, worker.job_id, worker.job_started, worker.stages = job, self._next_id, time.monotonic(), {}
+            try:
+                worker.conn.send((worker.job_id, job.fn, job.args, job.kwargs, job.budget, job.events is not None))
+            except OSError:  # the idle worker had died; the job goes to a new one
+                self._remove(worker)
+                with self._lock:
+                    self._pending.appendleft(job)
+            except Exception as e:  # arguments that do not pickle
+                worker.job = None
+                self._fail(job, e)
+
+    def _receive(self, worker, message):
+        kind = message[0]
+        if kind == "stage":
+            _, stage, started = message
+            if started:
+                worker.stages[stage] = time.monotonic()
+            else:
+                worker.stages.pop(stage, None)
+            return
+        job = worker.job
+        if message[1] != worker.job_id:
+            return
+        if kind == "event":
+            if not job.cancelled:
+                job.events.put(("event", message[2]))
+            return
+        worker.job, worker.stages = None, {}
+        if kind == "result":
+            if job.events is not None:
+                job.events.put(("done", None))
+            job.future.set_result(message[2])
+        else:
+            _, _, error, tb = message
+            error.__cause__ = _RemoteTraceback(f'\n"""\n{tb}"""')
+            self._fail(job, error)
+
+    def _abandon(self):
+        """Kill the workers still running a streamed job whose reader went away."""
+        for worker in list(self._pool):
+            job = worker.job
+            if job is not None and job.cancelled:
+                worker.process.kill()
+                self._remove(worker)
+                self._fail(job, WorkerFailed("Review abandoned"))
+
+    def _enforce(self):
+        """
+        Kill workers whose job overran its budget, and run the job again without
+        what overran: the check open longest past check_s, else (once past the
+        review deadline) the open check or the whole planset.
+        """
+        now = time.monotonic()
+        for worker in list(self._pool):
+            job = worker.job
+            if job is None:
+                continue
+            budget = job.budget
+            checks = sorted(
+                ((now - started, label) for label, started in
+                 ((stage_check_label(stage), started) for stage, started in worker.stages.items())
+                 if label is not None),
+                reverse=True,
+            )
+            # A rerun gets KILL_GRACE_S too, to report what is left
+            overdue = (budget.review_s and time.time() - budget.started > budget.review_s + KILL_GRACE_S
+                       and now - worker.job_started > KILL_GRACE_S)
+            if checks and (overdue or budget.check_s and checks[0][0] > budget.check_s):
+                seconds, label = checks[0]
+                budget.stop_check(label, seconds)
+            elif overdue and not budget.planset_skipped:
+                stage = min(worker.stages, key=worker.stages.get) if worker.stages else "pdf"
+                budget.stop_planset(stage, time.time() - budget.started)
+            elif overdue:
+                # Nothing is left to skip
+                self._kill(worker)
+                self._fail(job, WorkerFailed(f"Review stuck {time.time() - budget.started:.0f} s, stopped by the watchdog"))
+                continue
+            else:
+                continue
+            self._kill(worker)
+            self._retry(job)
+
+    def _kill(self, worker):
+        self.kills += 1
+        worker.process.kill()
+        self._remove(worker)
+
+    def _remove(self, worker):
+        worker.process.join()
+        worker.conn.close()
+        self._pool.remove(worker)
+
+    def _retry(self, job):
+        if job.cancelled:
+            self._fail(job, WorkerFailed("Review abandoned"))
+            return
+        if job.events is not None:
+            job.events.put(("restart", None))
+        with self._lock:
+            self._pending.appendleft(job)
+
+    def _lost(self, worker):
+        job = worker.job
+        self._remove(worker)
+        if job is not None:
+            self._fail(job, WorkerFailed(f"Review worker exited with code {worker.process.exitcode}"))
+
+    def _fail(self, job, error):
+        if job.events is not None:
+            job.events.put(("error", error))
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    def _stop_all(self):
+        with self._lock:
+            pending, self._pending = list(self._pending), deque()
+        for job in pending:
+            if not job.future.cancel() or job.events is not None:
+                self._fail(job, WorkerFailed("The review watchdog was shut down"))
+        for worker in self._pool:
+            if worker.job is not None:
+                worker.process.kill()
+                self._fail(worker.job, WorkerFailed("The review watchdog was shut down"))
+            else:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+        for worker in self._pool:
+            worker.process.join()
+            worker.conn.close()
+        self._pool = []
@@ -0,0 +1,202 @@
+"""
+Memory-bounded planset ingestion.
+
+Large uploads are spooled to a temp file in chunks and opened with
+fitz.open(path), so the planset is never held as yet another bytes object
+next to the upload buffer. During extraction MemoryBudget samples the process
+RSS after every page, drops MuPDF's cached page resources (fonts, decoded
+images) and raises MemoryBudgetExceeded once the configured cap is crossed.
+
+    budget = MemoryBudget.from_env()
+    with spool_upload(pdf_file) as (pdf_path, pdf_digest):
+        review = review_project(csv_data, pdf_path=pdf_path, memory=budget)
+    budget.as_dict()  # {"budget_bytes": ..., "start_rss_bytes": ..., "peak_rss_bytes": ...}
+
+Configuration (environment, in MB): QC_MEMORY_BUDGET_MB caps the process RSS
+(0 disables the cap), QC_SPOOL_THRESHOLD_MB is the upload size above which
+the planset is spooled to disk.
+"""
+import glob
+import hashlib
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+DEFAULT_MEMORY_BUDGET_MB = 2048
+DEFAULT_SPOOL_THRESHOLD_MB = 16
+CHUNK_SIZE = 1 * MB
+
+# Extracted planset text of each review (review["pdf_text_path"]), served by the "Download PDF Text" button
+TEXT_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "qc-review-text")
+TEXT_SPOOL_MAX_AGE_S = 24 * 60 * 60
+
+
+def _env_mb(name, default):
+    try:
+        return int(float(os.environ.get(name, default)) * MB)
+    except ValueError:
+        return int(default * MB)
+
+
+def memory_budget_bytes():
+    return _env_mb("QC_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET_MB)
+
+
+def spool_threshold_bytes():
+    return _env_mb("QC_SPOOL_THRESHOLD_MB", DEFAULT_SPOOL_THRESHOLD_MB)
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None when it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # Only the lifetime peak is available here: kB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if peak > 1 << 32 else peak * 1024
+    return None
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+class MemoryBudget:
+    """
+    Process RSS cap for one review. The RSS is that of the whole process (all
+    sessions of a Streamlit server, or one batch worker), which is what the
+    container's OOM killer sees. max_bytes=0 only records the peak.
+    """
+
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        self.exceeded_at = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(memory_budget_bytes())
+
+    def check(self, where=""):
+        rss = current_rss()
+        if rss is None:
+            return
+        if self.peak_rss is None or rss > self.peak_rss:
+            self.peak_rss = rss
+        if self.max_bytes and rss > self.max_bytes:
+            self.exceeded_at = where
+            raise MemoryBudgetExceeded(
+                f"Memory budget exceeded{f' at {where}' if where else ''}: "
+                f"RSS {rss / MB:.0f} MB > {self.max_bytes / MB:.0f} MB"
+            )
+
+    def release_page(self, where=""):
+        """Call after a page object has been dropped: frees MuPDF's page cache, then checks the cap."""
+        fitz.TOOLS.store_shrink(100)
+        self.check(where)
+
+    def as_dict(self):
+        return {
+            "budget_bytes": self.max_bytes,
+            "start_rss_bytes": self.start_rss,
+            "peak_rss_bytes": self.peak_rss,
+            "exceeded_at": self.exceeded_at,
+        }
+
+
+@contextmanager
+def spool_upload(upload, chunk_size=CHUNK_SIZE, suffix=".pdf"):
+    """
+    Copy a file-like upload to a temp file in chunks, hashing as it goes.
+    Yields (path, sha256 hex digest); the file is removed on exit.
+    """
+    digest = hashlib.sha256()
+    upload.seek(0)
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="qc-upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: upload.read(chunk_size), b""):
+                digest.update(chunk)
+                f.write(chunk)
+        upload.seek(0)
+        yield path, digest.hexdigest()
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def sha256_upload(upload, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file-like upload, read in chunks."""
+    digest = hashlib.sha256()
+    upload.seek(0)
+    for chunk in iter(lambda: upload.read(chunk_size), b""):
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file on disk, read in chunks."""
+    with open(path, "rb") as f:
+        return sha256_upload(f, chunk_size)
+
+
+def _prune_text_spool(max_age_s=TEXT_SPOOL_MAX_AGE_S):
+    cutoff = time.time() - max_age_s
+    for path in glob.glob(os.path.join(TEXT_SPOOL_DIR, "*.txt")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def spool_text(text, key=None):
+    """
+    Write extracted text to the text spool (once per key, by default the text
+    itself) and return its path.
+    """
+    os.makedirs(TEXT_SPOOL_DIR, exist_ok=True)
+    name = hashlib.sha256((text if key is None else key).encode("utf-8")).hexdigest()[:32]
+    path = os.path.join(TEXT_SPOOL_DIR, f"{name}.txt")
+    try:
+        os.utime(path)  # still in use: not pruned for another TEXT_SPOOL_MAX_AGE_S
+        return path
+    except FileNotFoundError:
+        pass
+    _prune_text_spool()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_spooled_text(path):
+    """The text spool_text wrote to `path`."""
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def read_spooled(path):
+    """Zero-argument callable returning the file's bytes, for deferred downloads."""
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
@@ -0,0 +1,188 @@
+"""
+Persistent per-page extraction cache (SQLite).
+
+Revised plansets usually change only a few sheets, so everything extracted
+from a page is stored under a fingerprint of that page: the SHA-256 of its
+decoded content stream, rotation, page, media and crop boxes and font list, plus
+EXTRACTOR_VERSION. A revision then pays extraction cost only for the pages
+whose content actually changed; unchanged pages are read back from disk.
+
+Per page the cache holds the classification signal, the extracted text, the
+word boxes and the per-page views (normalized lines and anchor hits). Entries
+older than max_age_s (by last access) are dropped, then the least recently
+used ones until the file's payload is under max_bytes.
+
+    cache = PageCache.from_env()       # None when QC_PAGE_CACHE_DIR=off
+    pages = PlansetPages(doc, cache=cache)
+    ...
+    cache.stats()  # {"hits": ..., "misses": ..., "entries": ..., "bytes": ...}
+
+Configuration (environment): QC_PAGE_CACHE_DIR (directory, or "off"),
+QC_PAGE_CACHE_MB (size cap) and QC_PAGE_CACHE_DAYS (age cap).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Bump whenever page text extraction, word boxes, normalize_string or the
+# anchor tables change, so stale page entries are never read back.
+EXTRACTOR_VERSION = "3"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "qc-review")
+DEFAULT_MAX_MB = 512
+DEFAULT_MAX_DAYS = 30
+
+DB_NAME = "page_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (key, field)
+);
+CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def page_fingerprint(page, extractor_version=EXTRACTOR_VERSION):
+    """Cache key for a fitz page: hash of what its extracted text depends on."""
+    digest = hashlib.sha256()
+    digest.update(page.read_contents())
+    # The crop box origin shifts every word box even when the text and page size are equal
+    digest.update(repr((page.rotation, tuple(page.rect), tuple(page.mediabox), tuple(page.cropbox))).encode())
+    for font in page.get_fonts():
+        digest.update(repr(font[1:]).encode())  # ext, type, basefont, name, encoding - not the xref
+    return f"{digest.hexdigest()}|{extractor_version}"
+
+
+class PageCache:
+    """
+    SQLite-backed cache of per-page extraction results, shared by threads and
+    processes (WAL mode). Writes are buffered and committed by flush().
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 max_age_s=DEFAULT_MAX_DAYS * 24 * 60 * 60):
+        self.directory = directory
+        self.path = os.path.join(directory, DB_NAME)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = set()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        # A cache sent to another process (a watchdog worker) opens the same database there
+        return {"directory": self.directory, "max_bytes": self.max_bytes, "max_age_s": self.max_age_s}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"], state["max_bytes"], state["max_age_s"])
+
+    @classmethod
+    def from_env(cls):
+        directory = os.environ.get("QC_PAGE_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if not directory or directory.lower() == "off":
+            return None
+        max_mb = float(os.environ.get("QC_PAGE_CACHE_MB", DEFAULT_MAX_MB))
+        max_days = float(os.environ.get("QC_PAGE_CACHE_DAYS", DEFAULT_MAX_DAYS))
+        return cls(directory, int(max_mb * 1024 * 1024), max_days * 24 * 60 * 60)
+
+    def _connection(self):
+        # One connection per process; a forked batch worker must not reuse its parent's
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key, field):
+        """Cached value for (page key, field), or None."""
+        with self._lock:
+            if (key, field) in self._pending:
+                self.hits += 1
+                return self._pending[(key, field)]
+            conn = self._connection()
+            row = conn.execute("SELECT value FROM pages WHERE key = ? AND field = ?", (key, field)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched.add((key, field))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, field, value):
+        with self._lock:
+            self._pending[(key, field)] = value
+
+    def flush(self):
+        """Commit buffered writes, access times and the hit/miss counters, then evict."""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            rows = []
+            for (key, field), value in self._pending.items():
+                payload = json.dumps(value, separators=(",", ":"))
+                rows.append((key, field, payload, len(payload), now, now))
+            touched = [(now, key, field) for key, field in self._touched]
+            self._pending.clear()
+            self._touched.clear()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.executemany("UPDATE pages SET accessed = ? WHERE key = ? AND field = ?", touched)
+                conn.executemany(
+                    "INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    [("hits", self.hits), ("misses", self.misses)],
+                )
+                self.hits = self.misses = 0
+                self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM pages WHERE accessed < ?", (now - self.max_age_s,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, field, size in conn.execute("SELECT key, field, size FROM pages ORDER BY accessed"):
+            doomed.append((key, field))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM pages WHERE key = ? AND field = ?", doomed)
+
+    def stats(self):
+        """Lifetime hit/miss counts (including unflushed ones) and the current size."""
+        with self._lock:
+            conn = self._connection()
+            counts = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            return {
+                "hits": counts.get("hits", 0) + self.hits,
+                "misses": counts.get("misses", 0) + self.misses,
+                "entries": entries,
+                "bytes": size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM pages")
+                conn.execute("DELETE FROM stats")
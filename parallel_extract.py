@@ -0,0 +1,177 @@
+"""
+Parallel page-range extraction for very large plansets.
+
+PyMuPDF documents are not thread-safe, so a large planset is split into
+contiguous page ranges and every range is read in a separate worker process
+with its own fitz handle. The per-page results come back keyed by page
+number and are merged in page order: PlansetPages.prefetch drops them into
+its per-page memo (and the page cache), extract_pdf_text_parallel joins the
+page texts once.
+
+    extractor = ParallelExtractor.from_env(pdf_path, page_count)  # None below the threshold
+    pages = PlansetPages(doc, parallel=extractor)
+    pages.pages_for(REVIEW_SHEETS)   # classification signals read on all workers
+
+Small plansets stay serial: starting the work on several processes only pays
+off once there are QC_PARALLEL_PAGES (default 200, 0 disables) pages to
+read. QC_EXTRACT_WORKERS sets the number of worker processes (default: CPU
+count). The pool is created on first use and shared by every review in the
+process. Processes that are themselves pool workers (batch.py) always
+extract serially - they are already one project per core.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+DEFAULT_PARALLEL_PAGES = 200
+
+# Page fields a worker can read (see extract_page_range)
+PAGE_FIELDS = ("signal", "text", "words", "fingerprint")
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def parallel_threshold():
+    try:
+        return int(os.environ.get("QC_PARALLEL_PAGES", DEFAULT_PARALLEL_PAGES))
+    except ValueError:
+        return DEFAULT_PARALLEL_PAGES
+
+
+def extract_workers():
+    try:
+        return int(os.environ.get("QC_EXTRACT_WORKERS", 0)) or os.cpu_count() or 1
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def page_ranges(page_numbers, parts):
+    """Split sorted page numbers into at most `parts` contiguous, evenly sized chunks."""
+    page_numbers = sorted(page_numbers)
+    parts = max(1, min(parts, len(page_numbers)))
+    size, extra = divmod(len(page_numbers), parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append(page_numbers[start:stop])
+        start = stop
+    return [chunk for chunk in ranges if chunk]
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def extract_page_range(source, page_numbers, fields, signal_words):
+    """
+    Worker entry point: open the planset (a path or PDF bytes) and read
+    `fields` for each page. Returns {page number: {field: value}}, with
+    values in their page cache form (words as {"rect", "words"[, "derotation"]} lists).
+    """
+    from planset_pages import PlansetPages
+
+    doc = _open(source)
+    try:
+        pages = PlansetPages(doc, signal_words)
+        out = {}
+        for n in page_numbers:
+            entry = {}
+            if "fingerprint" in fields:
+                entry["fingerprint"] = pages.fingerprint(n)
+            if "signal" in fields:
+                entry["signal"] = pages.signal(n)
+            if "text" in fields:
+                entry["text"] = pages.text(n)
+            if "words" in fields:
+                page_words = pages.words(n)
+                entry["words"] = {"rect": list(page_words.rect), "words": [list(w) for w in page_words.words]}
+                if page_words.derotation is not None:
+                    entry["words"]["derotation"] = list(page_words.derotation)
+            out[n] = entry
+        return out
+    finally:
+        doc.close()
+
+
+def _shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _get_pool(workers):
+    """The shared worker pool, (re)created when a different size is asked for."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            _shutdown_pool()
+            # Not fork: the parent may be running threads (Streamlit, the review worker)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+atexit.register(_shutdown_pool)
+
+
+class ParallelExtractor:
+    """Reads page fields of one planset source (path or bytes) on a pool of worker processes."""
+
+    def __init__(self, source, workers=None, threshold=DEFAULT_PARALLEL_PAGES):
+        self.source = source
+        self.workers = workers or extract_workers()
+        self.threshold = threshold
+
+    @classmethod
+    def from_env(cls, source, page_count):
+        """An extractor for `source`, or None when the planset should be read serially."""
+        threshold = parallel_threshold()
+        workers = extract_workers()
+        if not source or threshold <= 0 or workers <= 1 or page_count < threshold:
+            return None
+        if multiprocessing.current_process().daemon:  # daemonic pool workers cannot start processes
+            return None
+        return cls(source, workers, threshold)
+
+    def wants(self, page_count):
+        """True when reading `page_count` pages is worth spreading over the workers."""
+        return page_count >= self.threshold
+
+    def extract(self, page_numbers, fields, signal_words):
+        """{page number: {field: value}} for every page, in page order, read range by range in parallel."""
+        pool = _get_pool(self.workers)
+        futures = [
+            pool.submit(extract_page_range, self.source, chunk, tuple(fields), signal_words)
+            for chunk in page_ranges(page_numbers, self.workers)
+        ]
+        merged = {}
+        try:
+            for future in futures:
+                merged.update(future.result())
+        except BrokenProcessPool:
+            with _pool_lock:  # a worker died; start a fresh pool next time
+                _shutdown_pool()
+            raise
+        return merged
+
+
+def extract_pdf_text_parallel(source, workers=None):
+    """Full planset text like extract_pdf_text, read range by range on `workers` processes and joined once."""
+    with _open(source) as doc:
+        page_count = len(doc)
+    extractor = ParallelExtractor(source, workers, threshold=0)
+    entries = extractor.extract(range(1, page_count + 1), ("text",), signal_words=0)
+    return "".join(entries[n]["text"] for n in range(1, page_count + 1))
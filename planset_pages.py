@@ -0,0 +1,298 @@
+"""
+Sheet-aware, lazy page access for a planset.
+
+Instead of always reading pages 1, 3 and 4, each page is classified from a
+cheap signal (the title-block text, or the first few words of the page) as a
+cover, site plan, electrical, spec sheet or other page. Only the pages the
+checks need are then fully extracted, and every extracted page is cached so
+it is never read twice for the same document.
+
+With a MemoryBudget, each page object is dropped as soon as it has been read,
+MuPDF's page cache is flushed and the process RSS is checked against the cap.
+With a PageCache, the signal, text and word boxes of each page are looked up
+by page fingerprint first and only extracted on a miss (see page_cache.py).
+With a ParallelExtractor, reads that span many pages (classifying every page,
+fingerprinting) are split into page ranges read by worker processes (see
+parallel_extract.py).
+With a ResourceBudget, only the first max_pages pages exist as far as the
+review is concerned, and each page's text and words are cut to
+max_page_chars once read (the page cache keeps the whole page; see guard.py).
+"""
+import fitz  # PyMuPDF
+
+from page_cache import page_fingerprint
+from word_index import PageWords, page_derotation
+
+# Sheet kinds and the title-block phrases that identify them (lowercase).
+# The kind with the most hits wins; ties go to the earlier kind in this table.
+SHEET_KEYWORDS = {
+    "electrical": ("electrical", "single line", "three line", "line diagram", "wiring diagram", "sld"),
+    "spec sheet": ("spec sheet", "specification", "datasheet", "data sheet", "cut sheet"),
+    "site plan": ("site plan", "roof plan", "array layout", "plot plan", "attachment plan"),
+    "cover": ("cover sheet", "cover page", "title sheet", "vicinity map", "sheet index", "project information"),
+}
+
+# Sheet kinds the review checks read from
+REVIEW_SHEETS = ("cover", "electrical", "spec sheet")
+
+# Pages the tool has always read (1-based); still extracted when they exist so
+# plansets without recognisable title blocks keep working.
+FALLBACK_PAGES = (1, 3, 4)
+
+# Title-block candidates as fractions of the page rect: right-hand strip, then bottom strip
+TITLE_BLOCK_REGIONS = ((0.78, 0.0, 1.0, 1.0), (0.0, 0.85, 1.0, 1.0))
+
+SIGNAL_WORDS = 40
+
+
+def classify_sheet(signal_text, page_number=None):
+    """Return the sheet kind for a page's signal text."""
+    lower = signal_text.lower()
+    best_kind, best_hits = "other", 0
+    for kind, keywords in SHEET_KEYWORDS.items():
+        hits = sum(1 for keyword in keywords if keyword in lower)
+        if hits > best_hits:
+            best_kind, best_hits = kind, hits
+    if best_kind == "other" and page_number == 1:
+        return "cover"
+    return best_kind
+
+
+def _region_rect(rect, region):
+    x0, y0, x1, y1 = region
+    return fitz.Rect(
+        rect.x0 + rect.width * x0, rect.y0 + rect.height * y0,
+        rect.x0 + rect.width * x1, rect.y0 + rect.height * y1,
+    )
+
+
+def _words_text(words, limit):
+    words = sorted(words, key=lambda w: (w[5], w[6], w[7]))  # block, line, word order
+    return " ".join(w[4] for w in words[:limit])
+
+
+class PlansetPages:
+    """
+    Lazy, cached per-page text for an open fitz document. Page numbers are
+    1-based everywhere; missing pages read as "".
+    """
+
+    def __init__(self, doc, signal_words=SIGNAL_WORDS, memory=None, cache=None, parallel=None, budget=None):
+        self.doc = doc
+        self.signal_words = signal_words
+        self.memory = memory
+        self.cache = cache
+        self.parallel = parallel
+        self.budget = budget
+        self._page_count = budget.page_limit(len(doc)) if budget is not None else len(doc)
+        self.truncated = set()  # pages the budget cut
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._text = {}
+        self._words = {}
+        self._signals = {}
+        self._kinds = {}
+        self._fingerprints = {}
+
+    def __len__(self):
+        return self._page_count
+
+    def fingerprint(self, page_number):
+        """Content fingerprint of a page (see page_cache.page_fingerprint), computed once."""
+        if page_number not in self._fingerprints:
+            page = self.doc.load_page(page_number - 1)
+            self._fingerprints[page_number] = page_fingerprint(page)
+            del page
+            self._release(f"page {page_number} fingerprint")
+        return self._fingerprints[page_number]
+
+    def fingerprints(self):
+        self.prefetch(range(1, len(self) + 1), ("fingerprint",))
+        return [self.fingerprint(n) for n in range(1, len(self) + 1)]
+
+    def _has(self, page_number, field):
+        if field == "fingerprint":
+            return page_number in self._fingerprints
+        if field == "signal":
+            return page_number in self._signals or page_number in self._kinds
+        if field == "text":
+            return page_number in self._text
+        return page_number in self._words
+
+    def _remember(self, page_number, field, value):
+        if field == "fingerprint":
+            self._fingerprints[page_number] = value
+        elif field == "signal":
+            self._signals[page_number] = value
+        elif field == "text":
+            self._text[page_number] = self._limit_text(page_number, value)
+        else:
+            self._words[page_number] = self._page_words(page_number, value["words"], value["rect"], value.get("derotation"))
+
+    def _limit_text(self, page_number, text):
+        if self.budget is not None:
+            limited = self.budget.limit_text(page_number, text)
+            if len(limited) < len(text):
+                self.truncated.add(page_number)
+                return limited
+        return text
+
+    def _page_words(self, page_number, words, rect, derotation=None):
+        if self.budget is not None:
+            limited = self.budget.limit_words(page_number, words)
+            if len(limited) < len(words):
+                self.truncated.add(page_number)
+                words = limited
+        return PageWords(words, rect, derotation=derotation)
+
+    def _cache_field(self, field):
+        return f"signal:{self.signal_words}" if field == "signal" else field
+
+    def prefetch(self, page_numbers, fields):
+        """
+        Read `fields` ("signal", "text", "words", "fingerprint") of many pages
+        at once on the parallel extractor. Pages already read, or found in the
+        page cache, are skipped. Does nothing without an extractor or when
+        fewer pages than its threshold are left to read.
+        """
+        if self.parallel is None:
+            return
+        page_numbers = [n for n in page_numbers if 1 <= n <= len(self)]
+        todo = {n: [f for f in fields if not self._has(n, f)] for n in page_numbers}
+        todo = {n: missing for n, missing in todo.items() if missing}
+        if not self.parallel.wants(len(todo)):
+            return
+        if self.cache is not None and any(f != "fingerprint" for f in fields):
+            # Cache lookups need the fingerprints; those are worth reading in parallel too
+            self.prefetch(todo, ("fingerprint",))
+            for n, missing in list(todo.items()):
+                for field in [f for f in missing if f != "fingerprint"]:
+                    value = self.cached(n, self._cache_field(field))
+                    if value is not None:
+                        self._remember(n, field, value)
+                        missing.remove(field)
+                if not missing:
+                    del todo[n]
+            if self.parallel is None or not self.parallel.wants(len(todo)):
+                return
+        wanted = [f for f in ("fingerprint", "signal", "text", "words") if any(f in m for m in todo.values())]
+        try:
+            entries = self.parallel.extract(todo, wanted, self.signal_words)
+        except Exception:
+            # The pages are read serially instead (a failing page then raises there)
+            self.parallel = None
+            return
+        for n, entry in entries.items():
+            for field in todo[n]:
+                self._remember(n, field, entry[field])
+                if field != "fingerprint":
+                    self.store(n, self._cache_field(field), entry[field])
+        if self.memory is not None:
+            self.memory.check("parallel extraction")
+
+    def cached(self, page_number, field):
+        """Page cache entry for this page's content, or None (also when there is no cache)."""
+        if self.cache is None:
+            return None
+        value = self.cache.get(self.fingerprint(page_number), field)
+        if value is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+        return value
+
+    def store(self, page_number, field, value):
+        if self.cache is not None:
+            self.cache.put(self.fingerprint(page_number), field, value)
+
+    def flush_cache(self):
+        if self.cache is not None:
+            self.cache.flush()
+
+    def cache_stats(self):
+        """Page cache hits/misses for this document, or None without a cache."""
+        if self.cache is None:
+            return None
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
+    def text(self, page_number):
+        if page_number not in self._text:
+            if 1 <= page_number <= len(self):
+                text = self.cached(page_number, "text")
+                if text is None:
+                    page = self.doc.load_page(page_number - 1)
+                    text = page.get_text()
+                    del page
+                    self._release(f"page {page_number}")
+                    self.store(page_number, "text", text)
+                self._text[page_number] = self._limit_text(page_number, text)
+            else:
+                self._text[page_number] = ""
+        return self._text[page_number]
+
+    def words(self, page_number):
+        """PageWords layout index of a page (None for missing pages)."""
+        if page_number not in self._words:
+            if 1 <= page_number <= len(self):
+                entry = self.cached(page_number, "words")
+                if entry is None:
+                    page = self.doc.load_page(page_number - 1)
+                    entry = {"rect": list(page.rect), "words": [list(w[:8]) for w in page.get_text("words")]}
+                    if page.rotation:
+                        entry["derotation"] = list(page_derotation(page))
+                    del page
+                    self._release(f"page {page_number} words")
+                    self.store(page_number, "words", entry)
+                self._words[page_number] = self._page_words(page_number, entry["words"], entry["rect"],
+                                                            entry.get("derotation"))
+            else:
+                self._words[page_number] = None
+        return self._words[page_number]
+
+    def _release(self, where):
+        if self.memory is not None:
+            self.memory.release_page(where)
+
+    def signal(self, page_number):
+        """
+        Cheap classification signal: title-block words, else the first words of
+        the page. Always read from the page itself, so a page classifies the
+        same whether or not its text or words were already loaded.
+        """
+        if page_number in self._signals:
+            return self._signals[page_number]
+        signal = self.cached(page_number, f"signal:{self.signal_words}")
+        if signal is None:
+            signal = self._read_signal(page_number)
+            self.store(page_number, f"signal:{self.signal_words}", signal)
+        self._signals[page_number] = signal
+        return signal
+
+    def _read_signal(self, page_number):
+        page = self.doc.load_page(page_number - 1)
+        try:
+            for region in TITLE_BLOCK_REGIONS:
+                # Regions are fractions of the displayed page; word clips are in unrotated coordinates
+                words = page.get_text("words", clip=_region_rect(page.rect, region) * page.derotation_matrix)
+                if len(words) >= 3:
+                    return _words_text(words, self.signal_words)
+            return _words_text(page.get_text("words"), self.signal_words)
+        finally:
+            del page
+            self._release(f"page {page_number} signal")
+
+    def kind(self, page_number):
+        if page_number not in self._kinds:
+            self._kinds[page_number] = classify_sheet(self.signal(page_number), page_number)
+        return self._kinds[page_number]
+
+    def kinds(self):
+        return {n: self.kind(n) for n in range(1, len(self) + 1)}
+
+    def pages_for(self, sheets=REVIEW_SHEETS, fallback_pages=FALLBACK_PAGES):
+        """Sorted page numbers whose kind is in `sheets`, plus any existing fallback pages."""
+        wanted = set(sheets)
+        self.prefetch(range(1, len(self) + 1), ("signal",))
+        selected = {n for n in fallback_pages if 1 <= n <= len(self)}
+        selected.update(n for n in range(1, len(self) + 1) if n not in selected and self.kind(n) in wanted)
+        return sorted(selected)
@@ -0,0 +1,1980 @@
+"""
+Review core for the EXPRESS QC REVIEW TOOL.
+
+Everything here is free of Streamlit so the same checks can run from the
+web UI (app.py), the batch runner (batch.py) or any other entry point.
+"""
+import csv
+import io
+import os
+import fitz  # PyMuPDF
+import queue
+import re
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import cached_property, wraps
+from typing import NamedTuple, Optional
+
+from equipment_catalog import catalog_from_env
+from fuzzy_index import NearMatch, NgramIndex, allowed_edits, substring_distance
+from guard import BUDGET_EXCEEDED
+from ingest import spool_text
+from parallel_extract import ParallelExtractor
+from planset_pages import REVIEW_SHEETS, PlansetPages
+from timing import ensure_timer
+
+
+class CheckResult(NamedTuple):
+    """
+    One row of a review: every field check, filename check and extra check is
+    one of these. Being a tuple, rows still unpack as
+    (label, field, value, status, explanation) and serialize as lists.
+    """
+    label: str
+    field: str
+    value: object
+    status: str
+    explanation: str
+
+class ModuleDetails(NamedTuple):
+    """
+    Everything the review derives from the module part number, computed once
+    per review by module_details(). The DC System Size / TESLA MCI / Module
+    Spec rows (module_check_rows) and the details the UI shows under Module
+    Part Number are both read from it.
+    """
+    part_number: str
+    quantity: Optional[int]
+    wattage: Optional[float]
+    wattage_source: str
+    expected_kw: Optional[float]  # wattage x quantity, from the CSV
+    pdf_dc_kw: Optional[float]  # 'DC SIZE' stated on the planset
+    tesla: bool
+    imp: Optional[float]
+    imp_source: Optional[str]  # "catalog", "nextline" or "inline"; None when not found
+    imp_context: str  # what the Imp was read from
+    catalog_part: Optional[str]  # describe_catalog_match() of the catalog entry, None without one
+    spec_stated: tuple  # module_spec_on_planset() rows; empty without a catalog entry
+    budget_stops: tuple = ()  # (label, status, explanation) of module checks a ResourceBudget stopped
+
+def _parse_module_quantity(value):
+    value = str(value)
+    return int(value.lstrip("0")) if value.isdigit() and value.lstrip("0") else None
+
+def module_details(csv_data, pdf_text, timer=None, budget=None):
+    """
+    Compute the ModuleDetails of a project; the planset extractors are memoized per PdfTextIndex.
+    Checks a ResourceBudget `budget` stops are not extracted and listed in budget_stops.
+    """
+    index = as_text_index(pdf_text)
+    timer = ensure_timer(timer)
+    stops = {}
+
+    def allowed(label):
+        reason = budget.stop_reason(label) if budget is not None else None
+        if reason is not None:
+            stops[label] = reason
+        return reason is None
+
+    part_number = csv_data.get("Engineering_Project__c.Module_Part_Number__c", "")
+    quantity = _parse_module_quantity(csv_data.get("Engineering_Project__c.Module_Quantity__c", ""))
+    spec = module_spec(part_number)
+    wattage, wattage_source = module_wattage(part_number, spec)
+    expected_kw = (wattage * quantity) / 1000.0 if wattage and quantity else None
+
+    pdf_dc_kw = None
+    if allowed("DC System Size Check"):
+        with timer.stage("extra.DC System Size Check"):
+            pdf_dc_kw = extract_dc_size_kw(index)
+
+    tesla = str(csv_data.get("Engineering_Project__c.Inverter_Manufacturer__c", "")).strip().lower() == "tesla"
+    imp, imp_source, imp_context = None, None, ""
+    if tesla and spec is not None and spec.entry.imp is not None:
+        # Datasheet Imp from the equipment catalog: no scraping of the planset
+        imp, imp_source, imp_context = spec.entry.imp, "catalog", describe_catalog_match(spec)
+    elif tesla and allowed("TESLA MCI CHECK"):
+        with timer.stage("extra.TESLA MCI CHECK.imp_nextline"):
+            strict_val, strict_context, strict_value_line = extract_module_imp_by_nextline(index)
+        if strict_val is not None:
+            imp, imp_source, imp_context = strict_val, "nextline", f"{strict_context} → {strict_value_line}"
+        else:
+            with timer.stage("extra.TESLA MCI CHECK.imp_inline"):
+                imp = extract_module_imp_from_pdf(index)
+            if imp is not None:
+                imp_source = "inline"
+
+    spec_stated = ()
+    if spec is not None and allowed("Module Spec Check"):
+        with timer.stage("extra.Module Spec Check"):
+            spec_stated = tuple(module_spec_on_planset(spec.entry, index))
+
+    return ModuleDetails(
+        part_number=part_number,
+        quantity=quantity,
+        wattage=wattage,
+        wattage_source=wattage_source,
+        expected_kw=expected_kw,
+        pdf_dc_kw=pdf_dc_kw,
+        tesla=tesla,
+        imp=imp,
+        imp_source=imp_source,
+        imp_context=imp_context,
+        catalog_part=describe_catalog_match(spec) if spec is not None else None,
+        spec_stated=spec_stated,
+        budget_stops=tuple((label, status, explanation) for label, (status, explanation) in stops.items()),
+    )
+
+# TESLA MCI allowable module Imp (A)
+TESLA_MCI_MAX_IMP = 13
+
+IMP_SOURCES = {
+    "catalog": "Equipment catalog ({context})",
+    "nextline": "Strict 'IMP' next-line (`{context}`)",
+    "inline": "Inline module spec",
+}
+
+def module_check_rows(details):
+    """The DC System Size / TESLA MCI / Module Spec CheckResults for a ModuleDetails (no planset access)."""
+    rows = []
+    stopped = {label: (status, explanation) for label, status, explanation in details.budget_stops}
+    # ---- DC System Size Check ----
+    total_kw, dc_pdf = details.expected_kw, details.pdf_dc_kw
+    if total_kw is not None and "DC System Size Check" in stopped:
+        rows.append(CheckResult("DC System Size Check", "-", "-", *stopped["DC System Size Check"]))
+    elif total_kw is not None and dc_pdf is not None:
+        dc_status = "✅" if abs(total_kw - dc_pdf) < 0.01 else f"❌ Expected DC System Size (CSV) {total_kw:.3f} kW vs PDF {dc_pdf:.3f} kW"
+        rows.append(CheckResult(
+            "DC System Size Check", "-", "-", dc_status,
+            f"Expected DC System Size (CSV) `{total_kw:.3f} kW` vs PDF `DC Size: {dc_pdf:.3f} kW`"
+            f" | Module: {details.wattage:g} W, from {details.wattage_source}"
+        ))
+    elif total_kw is not None:
+        rows.append(CheckResult(
+            "DC System Size Check", "-", "-", "⚠️ DC Size not found in PDF",
+            "No 'DC SIZE' pattern found (e.g., 'DC SIZE: 7.000 KW')."
+        ))
+    # else: not enough info to compute, skip
+
+    # ---- TESLA MCI CHECK ----
+    if details.tesla and "TESLA MCI CHECK" in stopped:
+        rows.append(CheckResult("TESLA MCI CHECK", "Module Imp (A)", "-", *stopped["TESLA MCI CHECK"]))
+    elif details.tesla and details.imp is not None:
+        if details.imp > TESLA_MCI_MAX_IMP:
+            tesla_status = f"❌ Module Imp = {details.imp:g} A (Above {TESLA_MCI_MAX_IMP})"
+        else:
+            tesla_status = f"✅ Module Imp = {details.imp:g} A (OK)"
+        source = IMP_SOURCES[details.imp_source].format(context=details.imp_context)
+        rows.append(CheckResult(
+            "TESLA MCI CHECK", "Module Imp (A)", "-", tesla_status,
+            f"{source}. MCI allowable module Imp: {TESLA_MCI_MAX_IMP} A."
+        ))
+    elif details.tesla:
+        rows.append(CheckResult(
+            "TESLA MCI CHECK", "Module Imp (A)", "-", "⚠️ Could not extract module Imp",
+            "No isolated 'IMP' line and no acceptable inline module spec found."
+        ))
+
+    # ---- Module Spec Check (catalog values stated on the planset) ----
+    if details.catalog_part is not None and "Module Spec Check" in stopped:
+        rows.append(CheckResult("Module Spec Check", "Module Part Number", details.part_number, *stopped["Module Spec Check"]))
+    elif details.spec_stated:
+        missing = [f"{name} {value:g} {unit}" for name, value, unit, found in details.spec_stated if not found]
+        if missing:
+            spec_status = f"⚠️ Not found in PDF: {', '.join(missing)}"
+        else:
+            spec_status = "✅ " + ", ".join(f"{name} {value:g} {unit}" for name, value, unit, _ in details.spec_stated)
+        rows.append(CheckResult(
+            "Module Spec Check", "Module Part Number", details.part_number, spec_status,
+            f"Looked for the datasheet values of {details.catalog_part} in PDF text."
+        ))
+    return rows
+
+def compute_extra_checks(csv_data, pdf_text, timer=None):
+    """
+    The extra audit rows for one project, as module_check_rows returns them:
+    DC System Size Check, TESLA MCI CHECK (Tesla modules only) and Module Spec
+    Check (modules found in the equipment catalog), each when there is enough
+    CSV data to run it.
+    """
+    return module_check_rows(module_details(csv_data, pdf_text, timer=timer))
+
+def check_filename_for_special_chars(filename):
+    """
+    Check if the filename contains any disallowed special characters.
+    Returns a tuple: (status, explanation)
+    """
+    disallowed = ",!@#$%^&*'"
+    if any(char in filename for char in disallowed):
+        return (
+            "❌ Invalid characters in filename",
+            f"Filename `{filename}` contains one or more of the following disallowed characters: {disallowed}"
+        )
+    return ("✅", f"Filename `{filename}` is clean.")
+
+def normalize_string(s):
+    s = re.sub(r'<[^>]+>', '', str(s))  # Remove HTML tags
+    return re.sub(r'[\s.,"]', '', s).lower()  # Remove whitespace, punctuation, quotes, lowercase
+
+def normalize_phone_number(phone):
+    return re.sub(r'[^0-9]', '', str(phone))
+
+def normalize_dimension(value):
+    value = str(value).lower().replace('"', '').replace('”', '').replace('“', '').replace(' ', '')
+    value = re.sub(r'[^0-9x]', '', value)
+    return value
+
+def extract_pdf_text(doc):
+    return "".join(page.get_text() for page in doc)
+
+# Label anchors collected in one pass over the planset lines (lowercase substrings).
+# Adding a label here makes it available to every check at no extra scan cost.
+ANCHOR_LABELS = (
+    "ahj:",
+    "utility:",
+    "type of racking",
+    "type of attachment",
+    "roof surface type:",
+    "dc size",
+    "module:",
+    "inverter:",
+    "imp",
+    "solar module specifications",
+)
+
+# Anchors that must be the whole line once punctuation/whitespace is removed.
+# Each form must contain one of ANCHOR_LABELS, since only lines with a label hit are checked.
+LINE_ANCHORS = {
+    "imp line": ("imp", "impp"),  # allow 'IMPP' as some datasheets use Impp
+}
+
+# Zero-width lookahead so overlapping labels on the same line are all reported
+ANCHOR_PATTERN = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(ANCHOR_LABELS, key=len, reverse=True))) + "))"
+)
+
+class AnchorHit(NamedTuple):
+    label: str
+    line: int  # 0-based index into PdfTextIndex.lines
+    pos: int  # character offset of the label within the line
+    page: Optional[int]
+    page_line: Optional[int]
+    value: str  # rest of the line after the label, stripped
+    next_value: str  # the following line, stripped ("" on the last line)
+
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+class PdfTextIndex:
+    """
+    Derived views of one planset's text, built once per document and shared by
+    every check. Each view is computed on first use and then reused, so a review
+    costs one pass per view instead of one pass per field.
+    `words` optionally maps page numbers to the PageWords layout index of that
+    page (see word_index.py); it is empty when only the text is known.
+    """
+
+    def __init__(self, text, page_starts=None, words=None):
+        self.text = text or ""
+        # Sorted (first_line_index, page_number) pairs; empty when page numbers are unknown
+        self.page_starts = page_starts or []
+        self.words = words or {}
+        # Per-page views (see page_views) that normalized_lines/anchors are assembled from
+        self._page_views = None
+        self._page_indexes = {}
+        # Set by extract_pdf_data
+        self.reviewed_pages = None
+        self.cover_page = 1
+        self.page_fingerprints = None
+        self.page_cache_stats = None
+        # Results of the @extracted_once planset extractors, by function name
+        self._extracted = {}
+
+    @classmethod
+    def from_pages(cls, pages, words=None, views=None):
+        """
+        Build from (page_number, page_text) pairs, remembering where each page starts.
+        `views` maps page numbers to page_views() results (e.g. from the page cache);
+        they are used when every page's lines stand alone, i.e. each page but the
+        last ends with a line break.
+        """
+        page_starts = []
+        line_count = 0
+        open_line = False  # previous page text did not end with a line break
+        joined = False  # previous page's last line may run into this page's first
+        for page_number, page_text in pages:
+            if not page_text:
+                continue
+            if joined:
+                views = None
+            page_starts.append((line_count - 1 if open_line else line_count, page_number))
+            page_line_count = len(page_text.splitlines())
+            line_count += page_line_count - 1 if open_line else page_line_count
+            open_line = not page_text.endswith(("\n", "\r"))
+            joined = not page_text.endswith("\n")
+        index = cls("".join(text for _, text in pages), page_starts, words)
+        if views is not None and all(number in views for _, number in page_starts):
+            index._page_views = [(start, views[number]) for start, number in page_starts]
+        return index
+
+    @cached_property
+    def _page_start_lines(self):
+        return [start for start, _ in self.page_starts]
+
+    def page_of_line(self, line_index):
+        """Return (page_number, 1-based line within that page), or (None, None)."""
+        if not self.page_starts:
+            return None, None
+        pos = bisect_right(self._page_start_lines, line_index) - 1
+        if pos < 0:
+            return None, None
+        start, page_number = self.page_starts[pos]
+        return page_number, line_index - start + 1
+
+    def page_line_range(self, page_number):
+        """Return (start, end) line indices of a page; (0, 0) if it is not in the index."""
+        for pos, (start, number) in enumerate(self.page_starts):
+            if number == page_number:
+                end = self.page_starts[pos + 1][0] if pos + 1 < len(self.page_starts) else len(self.lines)
+                return start, end
+        return 0, 0
+
+    @cached_property
+    def lines(self):
+        return self.text.splitlines()
+
+    @cached_property
+    def lower_lines(self):
+        return [line.lower() for line in self.lines]
+
+    @cached_property
+    def normalized_lines(self):
+        if self._page_views is not None:
+            return [line for _, views in self._page_views for line in views["normalized_lines"]]
+        return [normalize_string(line) for line in self.lines]
+
+    @cached_property
+    def normalized_text(self):
+        return normalize_string(self.text)
+
+    @cached_property
+    def ngram_index(self):
+        """Trigram index over normalized_lines, looked up by 2-line window (see fuzzy_index.py)."""
+        return NgramIndex(self.normalized_lines)
+
+    def near_match(self, normalized_value):
+        """(NearMatch, original 2-line block) for the closest near miss of a normalized value, or None."""
+        near = self.ngram_index.near_match(normalized_value)
+        if near is None:
+            return None
+        return near, " ".join(self.lines[near.line:near.line + 2]).strip()
+
+    @cached_property
+    def numbers(self):
+        """Every number written in the text, as floats (thousands separators dropped)."""
+        return {float(n) for n in NUMBER_PATTERN.findall(self.text.replace(",", ""))}
+
+    @cached_property
+    def phone_digits(self):
+        return normalize_phone_number(self.text)
+
+    @cached_property
+    def dimension_text(self):
+        return normalize_dimension(self.text)
+
+    @cached_property
+    def address_lines(self):
+        # State abbreviations expanded, then normalized - once per line
+        return [normalize_string(normalize_states_in_text(line)) for line in self.lines]
+
+    @cached_property
+    def address_text(self):
+        return "".join(self.address_lines)
+
+    @cached_property
+    def anchors(self):
+        """Every ANCHOR_LABELS / LINE_ANCHORS hit, by label, in document order."""
+        table = {label: [] for label in ANCHOR_LABELS}
+        table.update({label: [] for label in LINE_ANCHORS})
+        if self._page_views is not None:
+            for start, views in self._page_views:
+                for label, line, pos, value in views["anchors"]:
+                    table[label].append(self._hit(label, start + line, pos, value))
+            return table
+        lines = self.lines
+        n = len(lines)
+        for i, lower in enumerate(self.lower_lines):
+            hit_on_line = False
+            for m in ANCHOR_PATTERN.finditer(lower):
+                label = m.group(1)
+                hit_on_line = True
+                end = m.start() + len(label)
+                table[label].append(self._hit(label, i, m.start(), lines[i][end:]))
+            if hit_on_line:
+                compact = re.sub(r'[^a-z0-9]', '', lower)
+                for label, forms in LINE_ANCHORS.items():
+                    if compact in forms:
+                        table[label].append(self._hit(label, i, 0, ""))
+        return table
+
+    def _hit(self, label, i, pos, rest):
+        page, page_line = self.page_of_line(i)
+        next_value = self.lines[i + 1].strip() if i + 1 < len(self.lines) else ""
+        return AnchorHit(label, i, pos, page, page_line, rest.strip(), next_value)
+
+    def hits(self, label):
+        return self.anchors.get(label.lower(), [])
+
+    def line_index_with_keyword(self, keyword, start=0):
+        keyword = keyword.lower()
+        if keyword in self.anchors:
+            for hit in self.anchors[keyword]:
+                if hit.line >= start:
+                    return hit.line
+            return None
+        lower_lines = self.lower_lines
+        for i in range(start, len(lower_lines)):
+            if keyword in lower_lines[i]:
+                return i
+        return None
+
+    def line_with_keyword(self, keyword):
+        i = self.line_index_with_keyword(keyword)
+        return self.lines[i].strip() if i is not None else ""
+
+    def line_after_keyword(self, keyword):
+        i = self.line_index_with_keyword(keyword)
+        # Only a hit with a following line counts, as in get_line_after_keyword
+        while i is not None and i + 1 >= len(self.lines):
+            i = self.line_index_with_keyword(keyword, i + 1)
+        return self.lines[i + 1].strip() if i is not None else ""
+
+    def page_index(self, page_number):
+        """A PdfTextIndex over just one page of this one (built once per page)."""
+        if page_number not in self._page_indexes:
+            start, end = self.page_line_range(page_number)
+            page_text = "".join(line + "\n" for line in self.lines[start:end])
+            words = {page_number: self.words[page_number]} if page_number in self.words else None
+            self._page_indexes[page_number] = PdfTextIndex.from_pages([(page_number, page_text)], words)
+        return self._page_indexes[page_number]
+
+    def layout_value(self, label, direction="auto", pages=None, alone=False):
+        """
+        The value laid out next to `label` in the page word boxes ("right",
+        "below", or "auto" for right-then-below), from the first page that has
+        one. "" when no page has a layout index or the label has no value.
+        """
+        for page_number in (sorted(self.words) if pages is None else pages):
+            page_words = self.words.get(page_number)
+            if page_words is not None:
+                value = page_words.value_for(label, direction, alone=alone)
+                if value:
+                    return value
+        return ""
+
+def page_views(page_text):
+    """
+    The per-page pieces of PdfTextIndex kept in the page cache: normalized lines
+    and anchor hits as [label, line, pos, value] with page-relative line numbers.
+    """
+    page_index = PdfTextIndex(page_text)
+    return {
+        "normalized_lines": page_index.normalized_lines,
+        "anchors": [[hit.label, hit.line, hit.pos, hit.value] for hits in page_index.anchors.values() for hit in hits],
+    }
+
+def _cached_page_views(pages, page_number):
+    if page_number in pages.truncated:
+        # Views of a page cut by the budget are not the page's; they are not cached
+        return page_views(pages.text(page_number))
+    views = pages.cached(page_number, "views")
+    if views is None:
+        views = page_views(pages.text(page_number))
+        pages.store(page_number, "views", views)
+    return views
+
+def as_text_index(pdf_text):
+    """Accept either raw planset text or an already built PdfTextIndex."""
+    if isinstance(pdf_text, PdfTextIndex):
+        return pdf_text
+    return PdfTextIndex(pdf_text)
+
+def contractor_name_match(value, pdf_text, normalized_value=None):
+    index = as_text_index(pdf_text)
+    if normalized_value is None:
+        normalized_value = normalize_string(value)
+    lines = index.lines
+    # 2-line blocks; normalize_string drops whitespace so the joined block
+    # normalizes to the concatenation of the two normalized lines. The trigram
+    # index only tests the blocks holding the name's rarest trigram.
+    i = index.ngram_index.first_containing(normalized_value, stop=len(lines) - 2)
+    if i is not None:
+        block = " ".join(lines[i:i+2])
+        return True, block.strip()
+    return False, None
+
+class AddressMatch(NamedTuple):
+    line: int  # 0-based index of the first matched line in PdfTextIndex.lines
+    span: int  # number of lines joined to make the match (1-3)
+    page: Optional[int]
+    page_line: Optional[int]
+    block: str
+
+class AddressMatcher:
+    """
+    Looks for every non-empty address component (street, city, full state name,
+    zip) inside a 1-, 2- or 3-line window of the planset. Windows are built by
+    concatenating the index's cached per-line normalized text, so no line is
+    state-expanded or normalized more than once per document.
+    """
+
+    def __init__(self, street, city, state, zipc):
+        self.components = address_components(street, city, state, zipc)
+
+    @classmethod
+    def from_components(cls, components):
+        """Matcher for already normalized components (see address_components)."""
+        matcher = cls.__new__(cls)
+        matcher.components = list(components)
+        return matcher
+
+    def search(self, pdf_text):
+        """Return the first AddressMatch (same scan order as block_candidates) or None."""
+        index = as_text_index(pdf_text)
+        components = self.components
+        # A window can only match if the whole document contains every component
+        if not all(comp in index.address_text for comp in components):
+            return None
+
+        lines = index.lines
+        norm = index.address_lines
+        n = len(norm)
+        for i in range(n):
+            block_norm = ""
+            has_text = False
+            for span in (1, 2, 3):
+                j = i + span - 1
+                if j >= n:
+                    break
+                block_norm += norm[j]
+                has_text = has_text or bool(lines[j].strip())
+                if has_text and all(comp in block_norm for comp in components):
+                    page, page_line = index.page_of_line(i)
+                    block = " ".join(lines[i:i+span]).strip()
+                    return AddressMatch(i, span, page, page_line, block)
+        return None
+
+def address_components(street, city, state, zipc):
+    """The normalized, non-empty address components an AddressMatcher looks for."""
+    components = [
+        normalize_string(street),
+        normalize_string(city),
+        normalize_string(normalize_state(state)),  # full state name
+        normalize_string(zipc),
+    ]
+    return [c for c in components if c]  # drop empties
+
+def contractor_address_match(address_dict, pdf_text):
+    matcher = AddressMatcher(
+        address_dict.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c", ""),
+        address_dict.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c", ""),
+        address_dict.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c", ""),
+        address_dict.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c", ""),
+    )
+    return matcher.search(pdf_text)
+
+def project_address_match(address_dict, pdf_text):
+    matcher = AddressMatcher(
+        address_dict.get("Engineering_Project__c.Installation_Street_Address_1__c", ""),
+        address_dict.get("Engineering_Project__c.Installation_City__c", ""),
+        address_dict.get("Engineering_Project__c.Installation_State__c", ""),
+        address_dict.get("Engineering_Project__c.Installation_Zip_Code__c", ""),
+    )
+    return matcher.search(pdf_text)
+
+def describe_address_match(match):
+    if match is None or match.page is None:
+        return ""
+    return f" | Found on page {match.page}, line {match.page_line}: '{match.block}'"
+
+def extract_module_wattage(part_number):
+    part_number = str(part_number).upper()
+    # Find all 3 or 4-digit numbers
+    matches = re.findall(r'(\d{3,4})(?=[^\d]|$)', part_number)
+    # Define realistic wattage range
+    valid_wattage_range = range(250, 800)  # Adjust as needed
+    # Try to find a number preceded by 'W' or 'WT' (optional)
+    prefix_match = re.search(r'(?:W|WT)(\d{3,4})(?=[^\d]|$)', part_number)
+    if prefix_match:
+        wattage = int(prefix_match.group(1))
+        if wattage in valid_wattage_range:
+            return wattage
+    # Otherwise, return the last valid number in the string
+    for num in reversed(matches):
+        wattage = int(num)
+        if wattage in valid_wattage_range:
+            return wattage
+    return None
+
+def module_spec(part_number):
+    """Equipment catalog match (see equipment_catalog.py) for a module part number, or None."""
+    if not part_number:
+        return None
+    catalog = catalog_from_env()
+    return catalog.module(part_number) if catalog is not None else None
+
+def describe_catalog_match(match):
+    entry = match.entry
+    name = " ".join(part for part in (entry.manufacturer, entry.part_number) if part)
+    return name if match.how == "exact" else f"{name}, {match.how} match"
+
+def module_wattage(part_number, spec):
+    """
+    (STC watts, source): the equipment catalog's rating when it lists the module
+    (`spec`, the module_spec() already looked up), else guessed from the part number.
+    """
+    if spec is not None and spec.entry.stc_w:
+        return spec.entry.stc_w, f"the equipment catalog ({describe_catalog_match(spec)})"
+    return extract_module_wattage(part_number), "the part number"
+
+# Datasheet values cross-checked against the planset: (entry field, label, unit)
+MODULE_SPEC_VALUES = (("vmp", "Vmp", "V"), ("imp", "Imp", "A"), ("voc", "Voc", "V"), ("isc", "Isc", "A"))
+
+def module_spec_on_planset(entry, pdf_text):
+    """(label, value, unit, found) for each catalog value of the module, found when the planset text states it."""
+    numbers = as_text_index(pdf_text).numbers
+    stated = []
+    for field, label, unit in MODULE_SPEC_VALUES:
+        value = getattr(entry, field)
+        if value is not None:
+            # The planset may round the datasheet value to one decimal
+            stated.append((label, value, unit, value in numbers or round(value, 1) in numbers))
+    return stated
+
+def extracted_once(extractor):
+    """
+    Memoize a planset extractor on the PdfTextIndex it reads, so the review,
+    the UI and any later caller share one result per document. Raw text
+    builds a fresh index, so it is extracted each time.
+    """
+    @wraps(extractor)
+    def wrapper(pdf_text):
+        index = as_text_index(pdf_text)
+        name = extractor.__name__
+        if name not in index._extracted:
+            index._extracted[name] = extractor(index)
+        return index._extracted[name]
+    return wrapper
+
+DC_SIZE_PATTERN = re.compile(r'DC SIZE[:\s\-]*([\d.]+)\s*KW', re.IGNORECASE)
+
+@extracted_once
+def extract_dc_size_kw(pdf_text):
+    index = as_text_index(pdf_text)
+    lines = index.lines
+    for hit in index.hits("dc size"):
+        # The value may wrap onto the following lines, e.g. 'DC SIZE:' / '7.2 KW'
+        window = [lines[hit.line][hit.pos:]]
+        j = hit.line + 1
+        while j < len(lines) and sum(1 for part in window if part.strip()) < 3:
+            window.append(lines[j])
+            j += 1
+        match = DC_SIZE_PATTERN.match("\n".join(window))
+        if match:
+            try:
+                return float(match.group(1))
+            except ValueError:
+                return None
+    return None
+
+@extracted_once
+def extract_module_imp_by_nextline(pdf_text: str):
+    """
+    Strict mode: find a line that contains only 'IMP' or 'IMPP' (ignoring punctuation/whitespace),
+    then take the next non-empty line and parse the first number as the value (amps).
+    Returns (value_float, context_line, value_line) or (None, None, None).
+    """
+    index = as_text_index(pdf_text)
+    lines = index.lines
+
+    # 'imp line' anchors are lines that are only 'IMP'/'IMPP' once punctuation is removed
+    for hit in index.hits("imp line"):
+        i = hit.line
+        # find the next non-empty line
+        j = i + 1
+        while j < len(lines) and not lines[j].strip():
+            j += 1
+        if j < len(lines):
+            value_line = lines[j].strip()
+            # parse first numeric like 13 or 13.56 possibly followed by 'A'
+            m = re.search(r'([0-9]+(?:\.[0-9]+)?)', value_line.replace(',', ''))
+            if m:
+                try:
+                    return float(m.group(1)), lines[i].rstrip(), value_line
+                except Exception:
+                    pass
+
+    # Text order can separate the 'IMP' cell from its value; fall back to the value laid out under it
+    for label in ("imp", "impp"):
+        value_line = index.layout_value(label, "below", alone=True)
+        m = re.search(r'([0-9]+(?:\.[0-9]+)?)', value_line.replace(',', ''))
+        if m:
+            return float(m.group(1)), label.upper(), value_line
+    return None, None, None
+
+@extracted_once
+def extract_module_imp_from_pdf(pdf_text: str) -> Optional[float]:
+    """
+    Prefer the module spec line (e.g., 'VMP 32.1 V IMP 13.56 A VOC 38.6 V ISC 14.32 A').
+    Avoid inverter/MPPT lines like 'MAX CURRENT PER MPPT (IMP) 13A'.
+    Also accepts 'Impp' (datasheet tables) as a synonym.
+    """
+    index = as_text_index(pdf_text)
+    # Every line mentioning IMP/IMPP, once each, from the anchor table
+    imp_lines = list(dict.fromkeys(index.lines[hit.line].strip() for hit in index.hits("imp")))
+    # Candidate lines: must contain IMP/IMPP and at least one of VMP/VOC/ISC (module spec context)
+    module_ctx_candidates = []
+    for ln in imp_lines:
+        lower = ln.lower()
+        if ("imp" in lower or "impp" in lower) and any(k in lower for k in ("vmp", "voc", "isc")):
+            # exclude obvious inverter/MPPT/inverter spec lines
+            if "mppt" in lower or "max current per mppt" in lower or "inverter specifications" in lower:
+                continue
+            module_ctx_candidates.append(ln)
+
+    # Search in high-confidence candidates first
+    imp_pattern = re.compile(r'(?i)\bimpp?\b[^0-9\-]{0,20}([0-9]+(?:\.[0-9]+)?)')
+    for ln in module_ctx_candidates:
+        m = imp_pattern.search(ln)
+        if m:
+            try:
+                return float(m.group(1))
+            except Exception:
+                pass
+
+    # Secondary strategy: search the block after 'SOLAR MODULE SPECIFICATIONS'
+    block = ""
+    spec_hits = index.hits("solar module specifications")
+    if spec_hits:
+        following = (ln.strip() for ln in index.lines[spec_hits[0].line:])
+        block = "\n".join([ln for ln in following if ln][:6])  # look a few non-empty lines forward
+    if block:
+        m = imp_pattern.search(block)
+        if m:
+            try:
+                return float(m.group(1))
+            except Exception:
+                pass
+
+    # Fallback: any IMP line, but explicitly skip inverter/MPPT lines
+    for ln in imp_lines:
+        lower = ln.lower()
+        if ("imp" in lower or "impp" in lower) and not ("mppt" in lower or "max current per mppt" in lower or "inverter" in lower):
+            m = imp_pattern.search(ln)
+            if m:
+                try:
+                    return float(m.group(1))
+                except Exception:
+                    pass
+
+    return None
+# State mapping dictionary
+STATE_MAP = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca",
+    "colorado": "co", "connecticut": "ct", "delaware": "de", "florida": "fl", "georgia": "ga",
+    "hawaii": "hi", "idaho": "id", "illinois": "il", "indiana": "in", "iowa": "ia",
+    "kansas": "ks", "kentucky": "ky", "louisiana": "la", "maine": "me", "maryland": "md",
+    "massachusetts": "ma", "michigan": "mi", "minnesota": "mn", "mississippi": "ms",
+    "missouri": "mo", "montana": "mt", "nebraska": "ne", "nevada": "nv", "new hampshire": "nh",
+    "new jersey": "nj", "new mexico": "nm", "new york": "ny", "north carolina": "nc",
+    "north dakota": "nd", "ohio": "oh", "oklahoma": "ok", "oregon": "or", "pennsylvania": "pa",
+    "rhode island": "ri", "south carolina": "sc", "south dakota": "sd", "tennessee": "tn",
+    "texas": "tx", "utah": "ut", "vermont": "vt", "virginia": "va", "washington": "wa",
+    "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy"
+}
+
+QUANTITY_PATTERN = re.compile(r'\((\d+)\)')
+
+def extract_cover_values(index, contractor_name_csv, page=1):
+    """
+    Module/inverter quantities (the '(N)' on the line after 'MODULE:' / 'INVERTER:')
+    and the contractor name line, read from one page of a PdfTextIndex.
+    Returns (module_qty, inverter_qty, contractor_name).
+    """
+    start, end = index.page_line_range(page)
+
+    def quantity(label):
+        qty = None
+        for hit in index.hits(label):
+            # Last hit on the page with a following line on the same page wins
+            if start <= hit.line and hit.line + 1 < end:
+                match = QUANTITY_PATTERN.search(hit.next_value)
+                if match:
+                    qty = match.group(1)
+        if qty is None:
+            # '(N)' laid out under or beside the label but not next in text order
+            match = QUANTITY_PATTERN.search(index.layout_value(label, "below", pages=(page,)))
+            if match:
+                qty = match.group(1)
+        return qty
+
+    contractor_name = ""
+    normalized_contractor_csv = normalize_string(contractor_name_csv)
+    normalized_lines = index.normalized_lines
+    for i in range(end - 1, start - 1, -1):
+        if normalized_contractor_csv in normalized_lines[i]:
+            contractor_name = index.lines[i].strip()
+            break
+
+    return quantity("module:"), quantity("inverter:"), contractor_name
+
+def extract_pdf_line_values(doc, contractor_name_csv):
+    pages = doc if isinstance(doc, PlansetPages) else PlansetPages(doc)
+    first_page_index = PdfTextIndex.from_pages([(1, pages.text(1))])
+    module_qty, inverter_qty, contractor_name = extract_cover_values(first_page_index, contractor_name_csv)
+    return module_qty, inverter_qty, contractor_name, pages.text(3)
+
+def extract_csv_fields(df):
+    """Field -> Value dict from a pandas DataFrame of a Field/Value CSV."""
+    df.columns = df.columns.str.strip()
+    df = df.dropna(subset=["Field", "Value"])
+    df = df.set_index("Field")["Value"].to_dict()
+    return df
+
+# pandas.read_csv's default NA markers: a row whose Field or Value is one of
+# these is dropped, exactly as extract_csv_fields' dropna would
+CSV_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+@contextmanager
+def _csv_text(csv_source):
+    """Text stream over a CSV path or a text/binary file-like; a UTF-8 BOM is skipped."""
+    if isinstance(csv_source, (str, os.PathLike)):
+        with open(csv_source, newline="", encoding="utf-8-sig") as f:
+            yield f
+    elif isinstance(csv_source.read(0), bytes):
+        text = io.TextIOWrapper(csv_source, encoding="utf-8-sig", newline="")
+        try:
+            yield text
+        finally:
+            text.detach()  # leave the caller's buffer open
+    else:
+        yield csv_source
+
+def read_field_value_csv(csv_source):
+    """
+    Field -> Value dict from a Field/Value CSV (path or file-like), read row by
+    row with the csv module. Gives the same dict as pd.read_csv followed by
+    extract_csv_fields without importing pandas: header names are stripped,
+    rows with an NA Field or Value are skipped and a repeated Field keeps its
+    last value.
+    """
+    with _csv_text(csv_source) as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        for column in ("Field", "Value"):
+            if column not in header:
+                raise KeyError(f"CSV has no {column!r} column")
+        field_col, value_col = header.index("Field"), header.index("Value")
+        data = {}
+        for row in reader:
+            if len(row) <= max(field_col, value_col):
+                continue
+            field, value = row[field_col], row[value_col]
+            if field in CSV_NA_VALUES or value in CSV_NA_VALUES:
+                continue
+            data[field] = value
+    return data
+
+def compile_project_address(data):
+    street1 = str(data.get("Engineering_Project__c.Installation_Street_Address_1__c", "")).strip()
+    street2 = str(data.get("Engineering_Project__c.Installation_Street_Address_2__c", "")).strip()
+    city = str(data.get("Engineering_Project__c.Installation_City__c", "")).strip()
+    state = str(data.get("Engineering_Project__c.Installation_State__c", "")).strip()
+    zip_code = str(data.get("Engineering_Project__c.Installation_Zip_Code__c", "")).strip()
+    address_parts = [street1]
+    if street2:
+        address_parts.append(street2)
+    address_parts.extend([city, state, zip_code])
+    return ", ".join([part for part in address_parts if part])
+
+def compile_customer_address(data):
+    street1 = str(data.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c", "")).strip()
+    street2 = str(data.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_2__c", "")).strip()
+    city = str(data.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c", "")).strip()
+    state = str(data.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c", "")).strip()
+    zip_code = str(data.get("Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c", "")).strip()
+    address_parts = [street1]
+    if street2:
+        address_parts.append(street2)
+    address_parts.extend([city, state, zip_code])
+    return ", ".join([part for part in address_parts if part])
+
+def is_numeric(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def get_line_after_keyword(text, keyword):
+    return as_text_index(text).line_after_keyword(keyword)
+
+def get_line_with_keyword(text, keyword):
+    return as_text_index(text).line_with_keyword(keyword)
+
+def apply_alias(value, alias_dict):
+    normalized_value = normalize_string(value)
+    return alias_dict.get(normalized_value, normalized_value)
+# Add DC
+STATE_MAP.update({
+    "district of columbia": "dc"
+})
+
+ABBR_TO_FULL = {abbr: full for full, abbr in STATE_MAP.items()}
+
+# Word-boundary regex for all two-letter abbreviations, compiled once
+STATE_ABBR_PATTERN = re.compile(
+    r'(?<![A-Za-z])(' + '|'.join(map(re.escape, sorted(ABBR_TO_FULL, key=len, reverse=True))) + r')(?![A-Za-z])',
+    re.IGNORECASE,
+)
+
+def normalize_state(state_str: str) -> str:
+    """Return the full state name in lowercase (e.g., 'ca' -> 'california', 'California' -> 'california')."""
+    s = str(state_str).strip().lower()
+    if not s:
+        return ""
+    if s in STATE_MAP:
+        return s  # already full name
+    # If it's an abbreviation, map to full
+    full = ABBR_TO_FULL.get(s)
+    return full if full else s
+
+def normalize_states_in_text(text: str) -> str:
+    """
+    Replace standalone 2-letter state abbreviations in free text with full names
+    using word boundaries, BEFORE general normalization.
+    Example: 'Portland, OR 97201' -> 'Portland, oregon 97201'
+    """
+    if not text:
+        return text
+    return STATE_ABBR_PATTERN.sub(_expand_state_abbr, text)
+
+def _expand_state_abbr(m):
+    return ABBR_TO_FULL[m.group(1).lower()]
+
+def block_candidates(lines):
+    """Yield 1-, 2-, and 3-line joined blocks to be robust to line wrapping."""
+    n = len(lines)
+    for i in range(n):
+        for span in (1, 2, 3):
+            if i + span <= n:
+                block = " ".join(lines[i:i+span]).strip()
+                if block:
+                    yield block    
+
+def normalize_state(state_str):
+    s = str(state_str).strip().lower()
+    if not s:
+        return ""
+    if s in STATE_MAP:
+        return s  # already full name
+    for full, abbr in STATE_MAP.items():
+        if s == abbr:
+            return full
+    return s
+
+RACKING_ALIASES = {
+    "chiko": "chiko",
+    "ejot": "ejot",
+    "iridg": "ironridge",
+    "k2": "k2",
+    "pegso": "pegasus",
+    "rftch": "rooftech",
+    "s5": "s-5!",
+    "snrac": "snapnrack",
+    "sunmo": "sunmodo",
+    "unirc": "unirac"
+}
+
+ATTACHMENT_ALIASES = RACKING_ALIASES.copy()
+
+INVERTER_ALIASES = {
+    "anker": "anker",
+    "aps": "aps",
+    "enp": "enphase",
+    "frons": "fronius",
+    "goodw": "goodwe",
+    "hoymi": "hoymiles",
+    "nep": "nep",
+    "solak": "sol-ark",
+    "soled": "solaredge",
+    "tesla": "tesla",
+    "tigo": "tigo"
+}
+
+CUSTOMER_ADDRESS_FIELDS = (
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Line_1__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_City__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_State__c",
+    "Engineering_Project__c.Customer__r.GRDS_Customer_Address_Zip__c",
+)
+
+PROJECT_ADDRESS_FIELDS = (
+    "Engineering_Project__c.Installation_Street_Address_1__c",
+    "Engineering_Project__c.Installation_City__c",
+    "Engineering_Project__c.Installation_State__c",
+    "Engineering_Project__c.Installation_Zip_Code__c",
+)
+
+ESS_ENABLED = ("Engineering_Project__c.Energy_Storage_Picklist__c", "yes")
+
+# Declarative check table, in display order. Keys:
+#   field    - CSV field the value comes from
+#   category - UI section the result is shown in
+#   mode     - how the value is compared (see CHECK_MODES); "text" is the default
+#   label    - planset anchor label for the label_value / next_line_alias / label_any modes
+#   aliases  - alias table applied to the CSV value
+#   split    - regex splitting the CSV value into alternatives (label_any)
+#   source   - which extracted planset value a "quantity" check compares against
+#   address  - the four CSV fields an "address" check reads
+#   requires - (field, value) that must hold in the CSV for the check to run
+#   layout   - where the value sits relative to `label` on the sheet ("right", "below" or
+#              "auto"); the word-box layout is read as a second look when the text order
+#              does not match
+#   fuzzy    - a value a few characters off (see fuzzy_index.py) is reported as
+#              "≈ near match" with a confidence instead of ❌
+CHECK_TABLE = {
+    "Contractor Name": {"field": "Engineering_Project__c.Customer__r.Name", "category": "CONTRACTOR DETAILS", "mode": "contractor_name", "fuzzy": True},
+    "Contractor Address": {"field": "Compiled_Customer_Address", "category": "CONTRACTOR DETAILS", "mode": "address", "address": CUSTOMER_ADDRESS_FIELDS},
+    "Contractor Phone Number": {"field": "Engineering_Project__c.Customer__r.GRDS_Customer_Phone__c", "category": "CONTRACTOR DETAILS", "mode": "phone"},
+    "Contractor License Number": {"field": "Engineering_Project__c.Account_License_as_Text__c", "category": "CONTRACTOR DETAILS"},
+    "Property Owner": {"field": "Engineering_Project__c.Property_Owner_Name__c", "category": "PROPERTY", "fuzzy": True},
+    "Project Address": {"field": "Compiled_Project_Address", "category": "PROPERTY", "mode": "address", "address": PROJECT_ADDRESS_FIELDS},
+    "AHJ": {"field": "Engineering_Project__c.AHJ__c", "category": "PROPERTY", "mode": "label_value", "label": "AHJ:", "layout": "auto", "fuzzy": True},
+    "Utility": {"field": "Engineering_Project__c.Utility__c", "category": "PROPERTY", "mode": "label_value", "label": "Utility:", "layout": "auto", "fuzzy": True},
+    "Module Manufacturer": {"field": "Engineering_Project__c.Module_Manufacturer__c", "category": "EQUIPMENT"},
+    "Module Part Number": {"field": "Engineering_Project__c.Module_Part_Number__c", "category": "EQUIPMENT"},
+    "Module Quantity": {"field": "Engineering_Project__c.Module_Quantity__c", "category": "EQUIPMENT", "mode": "quantity", "source": "module_qty"},
+    "Inverter Manufacturer": {"field": "Engineering_Project__c.Inverter_Manufacturer__c", "category": "EQUIPMENT", "mode": "alias_in_text", "aliases": INVERTER_ALIASES},
+    "Inverter Part Number": {"field": "Engineering_Project__c.Inverter_Part_Number__c", "category": "EQUIPMENT"},
+    "Inverter Quantity": {"field": "Engineering_Project__c.Inverter_Quantity__c", "category": "EQUIPMENT", "mode": "quantity", "source": "inverter_qty"},
+    "IBC": {"field": "Engineering_Project__c.AHJ_Database__r.IBC__c", "category": "PROPERTY"},
+    "IFC": {"field": "Engineering_Project__c.AHJ_Database__r.IFC__c", "category": "PROPERTY"},
+    "IRC": {"field": "Engineering_Project__c.AHJ_Database__r.IRC__c", "category": "PROPERTY"},
+    "NEC": {"field": "Engineering_Project__c.AHJ_Database__r.NEC__c", "category": "PROPERTY"},
+    "Rafter/Truss Size": {"field": "Engineering_Project__c.Rafter_Truss_Size__c", "category": "PROPERTY", "mode": "dimension"},
+    "Rafter/Truss Spacing": {"field": "Engineering_Project__c.Rafter_Truss_Spacing__c", "category": "PROPERTY", "mode": "dimension"},
+    "Roofing Material": {"field": "Engineering_Project__c.Roofing_Material__c", "category": "PROPERTY", "mode": "label_any", "label": "roof surface type:", "split": r'[/|,]', "layout": "auto"},
+    "Racking Manufacturer": {"field": "Engineering_Project__c.Racking_Manufacturer__c", "category": "EQUIPMENT", "mode": "next_line_alias", "label": "type of racking", "aliases": RACKING_ALIASES, "layout": "below"},
+    "Racking Model": {"field": "Engineering_Project__c.Racking_Model__c", "category": "EQUIPMENT"},
+    "Attachment Manufacturer": {"field": "Engineering_Project__c.Attachment_Manufacturer__c", "category": "EQUIPMENT", "mode": "next_line_alias", "label": "type of attachment", "aliases": ATTACHMENT_ALIASES, "layout": "below"},
+    "Attachment Model": {"field": "Engineering_Project__c.Attachment_Model__c", "category": "EQUIPMENT"},
+    "ESS Battery Manufacturer": {"field": "Engineering_Project__c.ESS_Battery_Manufacturer__c", "category": "EQUIPMENT", "requires": ESS_ENABLED},
+    "ESS Battery Model": {"field": "Engineering_Project__c.ESS_Battery_Model__c", "category": "EQUIPMENT", "requires": ESS_ENABLED},
+    "ESS Battery Quantity": {"field": "Engineering_Project__c.ESS_Battery_Quantity__c", "category": "EQUIPMENT", "requires": ESS_ENABLED},
+    "ESS Inverter Manufacturer": {"field": "Engineering_Project__c.ESS_Inverter_Manufacturer__c", "category": "EQUIPMENT", "requires": ESS_ENABLED},
+    "ESS Inverter Model": {"field": "Engineering_Project__c.ESS_Inverter_Model__c", "category": "EQUIPMENT", "requires": ESS_ENABLED},
+    "ESS Inverter Quantity": {"field": "Engineering_Project__c.ESS_Inverter_Quantity__c", "category": "EQUIPMENT", "requires": ESS_ENABLED},
+}
+
+NEAR_MATCH = "≈"
+
+def _near_match_result(near, block, explanation):
+    """(status, explanation) for a fuzzy check whose value was only found a few characters off."""
+    return (f"{NEAR_MATCH} near match ({near.score:.0%}) (PDF: {block})",
+            f"{explanation} | Near match: '{block}' ({near.distance} edit(s), {near.score:.0%} confidence)")
+
+def _near_in_values(normalized_value, pdf_values):
+    """The closest of `pdf_values` (raw strings) within the allowed edits of normalized_value, as (NearMatch, value)."""
+    max_edits = allowed_edits(normalized_value)
+    best = None
+    for pdf_value in pdf_values:
+        distance = substring_distance(normalized_value, normalize_string(pdf_value), max_edits) if max_edits else None
+        if distance is not None and (best is None or distance < best[0].distance):
+            best = NearMatch(None, distance, 1 - distance / len(normalized_value)), pdf_value
+    return best
+
+def _parse_quantity(value):
+    return int(str(value).lstrip("0")) if str(value).isdigit() else value
+
+def _check_quantity(check, value, csv_data, index, pdf_values):
+    pdf_value = pdf_values.get(check.source)
+    try:
+        csv_val_int = _parse_quantity(value)
+        pdf_val_int = _parse_quantity(pdf_value)
+        status = "✅" if csv_val_int == pdf_val_int else f"❌ (PDF: {pdf_value})"
+    except Exception:
+        status = f"❌ (PDF: {pdf_value})"
+    return status, f"Compared: CSV='{value}' vs PDF='{pdf_value}'"
+
+def _check_contractor_name(check, value, csv_data, index, pdf_values):
+    normalized_value = check.csv_value(value, csv_data)
+    match, matched_line = contractor_name_match(value, index, normalized_value)
+    status = "✅" if match else f"❌ (PDF: Not Found)"
+    explanation = f"Looked for normalized name '{value}' in PDF text"
+    if matched_line:
+        explanation += f" | Matched Line: '{matched_line}'"
+    elif check.fuzzy:
+        near = index.near_match(normalized_value)
+        if near:
+            return _near_match_result(*near, explanation)
+    return status, explanation
+
+def _check_phone(check, value, csv_data, index, pdf_values):
+    normalized_value = check.csv_value(value, csv_data)
+    status = "✅" if normalized_value in index.phone_digits else f"❌ (PDF: Not Found)"
+    return status, f"Looked for normalized phone '{value}' in PDF text"
+
+def _layout_match(check, index, matches):
+    """The check's value read from the word-box layout if it satisfies `matches`, else None."""
+    if not check.layout:
+        return None
+    layout_value = index.layout_value(check.label, check.layout)
+    if layout_value and matches(normalize_string(layout_value)):
+        return layout_value
+    return None
+
+def _check_label_value(check, value, csv_data, index, pdf_values):
+    pdf_value = index.line_with_keyword(check.label)
+    pdf_value = pdf_value.split(check.label)[-1].strip()
+    normalized_value = check.csv_value(value, csv_data)
+    normalized_pdf_value = normalize_string(pdf_value)
+    if normalized_value not in normalized_pdf_value:
+        layout_value = _layout_match(check, index, lambda text: normalized_value in text)
+        if layout_value:
+            return "✅", f"Compared: CSV='{value}' vs PDF='{layout_value}' (beside '{check.label}' on the sheet)"
+        if check.fuzzy:
+            layout_values = [index.layout_value(check.label, check.layout)] if check.layout else []
+            near = _near_in_values(normalized_value, [pdf_value] + [v for v in layout_values if v])
+            if near:
+                return _near_match_result(*near, f"Compared: CSV='{value}' vs PDF='{pdf_value}'")
+    status = "✅" if normalized_value in normalized_pdf_value else f"❌ (PDF: {pdf_value})"
+    return status, f"Compared: CSV='{value}' vs PDF='{pdf_value}'"
+
+def _check_dimension(check, value, csv_data, index, pdf_values):
+    normalized_value = check.csv_value(value, csv_data)
+    found = normalized_value in index.dimension_text
+    status = "✅" if found else f"❌ (PDF: Not Found)"
+    return status, f"Looked for normalized '{value}' in PDF text"
+
+def _check_next_line_alias(check, value, csv_data, index, pdf_values):
+    pdf_value = index.line_after_keyword(check.label)
+    normalized_value = check.csv_value(value, csv_data)
+    normalized_pdf_value = normalize_string(pdf_value)
+    if normalized_value not in normalized_pdf_value:
+        layout_value = _layout_match(check, index, lambda text: normalized_value in text)
+        if layout_value:
+            return "✅", (f"Compared (with alias): CSV='{value}' → '{normalized_value}' vs PDF='{layout_value}' "
+                         f"(under '{check.label}' on the sheet)")
+    status = "✅" if normalized_value in normalized_pdf_value else f"❌ (PDF: {pdf_value})"
+    return status, f"Compared (with alias): CSV='{value}' → '{normalized_value}' vs PDF='{pdf_value}'"
+
+def _check_alias_in_text(check, value, csv_data, index, pdf_values):
+    normalized_value = check.csv_value(value, csv_data)
+    found = normalized_value in index.normalized_text
+    status = "✅" if found else f"❌ (PDF: Not Found)"
+    return status, f"Looked for alias '{normalized_value}' in PDF text"
+
+def _check_label_any(check, value, csv_data, index, pdf_values):
+    pdf_value = index.line_with_keyword(check.label)
+    normalized_pdf_value = normalize_string(pdf_value)
+    components = check.csv_value(value, csv_data)
+    match_found = any(comp in normalized_pdf_value for comp in components)
+    if not match_found:
+        layout_value = _layout_match(check, index, lambda text: any(comp in text for comp in components))
+        if layout_value:
+            return "✅", f"Compared: CSV='{value}' vs PDF='{layout_value}' (beside '{check.label}' on the sheet)"
+    status = "✅" if match_found else f"❌ (PDF: {pdf_value})"
+    return status, f"Compared: CSV='{value}' vs PDF='{pdf_value}'"
+
+def _check_address(check, value, csv_data, index, pdf_values):
+    matcher = AddressMatcher.from_components(check.csv_value(value, csv_data))
+    match = matcher.search(index)
+    status = "✅" if match else f"❌ (PDF: Not Found)"
+    return status, "Checked each address component with state normalization" + describe_address_match(match)
+
+def _check_text(check, value, csv_data, index, pdf_values):
+    numeric, normalized_value = check.csv_value(value, csv_data)
+    if numeric:
+        found = normalized_value in index.text
+        status = "✅" if found else f"❌ (PDF: Not Found)"
+        return status, f"Looked for numeric value '{value}' in PDF text"
+    found = normalized_value in index.normalized_text
+    status = "✅" if found else f"❌ (PDF: Not Found)"
+    explanation = f"Looked for normalized value '{value}' in PDF text"
+    if not found and check.fuzzy:
+        near = index.near_match(normalized_value)
+        if near:
+            return _near_match_result(*near, explanation)
+    return status, explanation
+
+CHECK_MODES = {
+    "quantity": _check_quantity,
+    "contractor_name": _check_contractor_name,
+    "phone": _check_phone,
+    "label_value": _check_label_value,
+    "dimension": _check_dimension,
+    "next_line_alias": _check_next_line_alias,
+    "alias_in_text": _check_alias_in_text,
+    "label_any": _check_label_any,
+    "address": _check_address,
+    "text": _check_text,
+}
+
+def _prepare_value(check, value, csv_data):
+    return value
+
+def _prepare_alias(check, value, csv_data):
+    return apply_alias(value, check.aliases)
+
+def _prepare_components(check, value, csv_data):
+    return tuple(normalize_string(comp) for comp in check.split.split(value))
+
+def _prepare_address(check, value, csv_data):
+    return tuple(address_components(*(csv_data.get(field, "") for field in check.address)))
+
+def _prepare_text(check, value, csv_data):
+    # Numbers are looked up verbatim in the text, anything else normalized
+    if is_numeric(value):
+        return True, str(value)
+    return False, normalize_string(value)
+
+# The CSV side of each mode: what its check compares against the planset,
+# computed from the CSV value alone (see FieldCheck.csv_value)
+CSV_PREPARERS = {
+    "quantity": _prepare_value,
+    "contractor_name": lambda check, value, csv_data: normalize_string(value),
+    "phone": lambda check, value, csv_data: normalize_phone_number(value),
+    "label_value": lambda check, value, csv_data: normalize_string(value),
+    "dimension": lambda check, value, csv_data: normalize_dimension(value),
+    "next_line_alias": _prepare_alias,
+    "alias_in_text": _prepare_alias,
+    "label_any": _prepare_components,
+    "address": _prepare_address,
+    "text": _prepare_text,
+}
+
+# What each mode's result depends on, for revision diffs (see check_evidence):
+#   contains - a ✅ found inside one page stays ✅ while that page is unchanged
+#   label    - decided by the first hit of the check's label, i.e. by the pages up to it
+#   cover    - compares the values read from the cover page (the first page classified as one, else page 1)
+MODE_EVIDENCE = {
+    "quantity": "cover",
+    "contractor_name": "contains",
+    "phone": "contains",
+    "label_value": "label",
+    "dimension": "contains",
+    "next_line_alias": "label",
+    "alias_in_text": "contains",
+    "label_any": "label",
+    "address": "contains",
+    "text": "contains",
+}
+
+class FieldCheck:
+    """One compiled entry of CHECK_TABLE. Calling run() never branches on the label."""
+
+    def __init__(self, name, field, category=None, mode="text", label=None, aliases=None,
+                 split=None, source=None, address=None, requires=None, layout=None, fuzzy=False):
+        self.name = name
+        self.field = field
+        self.category = category
+        self.mode = mode
+        self.label = label
+        self.aliases = dict(aliases or {})
+        self.split = re.compile(split) if split else None
+        self.source = source
+        self.address = tuple(address or ())
+        self.requires = requires
+        self.layout = layout
+        self.fuzzy = fuzzy
+        self.evidence = MODE_EVIDENCE[mode]
+        self._prepare = CSV_PREPARERS[mode]
+        self._run = CHECK_MODES[mode]
+
+    def applies(self, csv_data):
+        if not self.requires:
+            return True
+        field, expected = self.requires
+        return str(csv_data.get(field, "")).lower() == expected
+
+    def csv_value(self, value, csv_data):
+        """
+        The normalized CSV side of this check. Taken from csv_data.normalized
+        when bulk ingestion already computed it for the whole export (see
+        ProjectData), otherwise computed from the value here.
+        """
+        normalized = getattr(csv_data, "normalized", None)
+        if normalized is not None and self.name in normalized:
+            return normalized[self.name]
+        return self._prepare(self, value, csv_data)
+
+    def run(self, value, csv_data, index, pdf_values):
+        """Return (status, explanation) for a non-empty CSV value."""
+        return self._run(self, value, csv_data, index, pdf_values)
+
+class ProjectData(dict):
+    """
+    csv_data of one project from a bulk export: the field -> value dict plus
+    `normalized`, {check name: FieldCheck.csv_value} precomputed for the whole
+    export, so the checks only do the planset side. Compares equal to (and can
+    be used as) a plain csv_data dict.
+    """
+
+    def __init__(self, fields=(), normalized=None):
+        super().__init__(fields)
+        self.normalized = normalized
+
+def build_check_registry(table):
+    return {name: FieldCheck(name, **spec) for name, spec in table.items()}
+
+CHECK_REGISTRY = build_check_registry(CHECK_TABLE)
+
+CHECK_CATEGORIES = {}
+for _check in CHECK_REGISTRY.values():
+    CHECK_CATEGORIES.setdefault(_check.category, []).append(_check.name)
+
+_GENERIC_CHECKS = {}
+
+def get_check(label, field):
+    """Registry check for a label; labels not in the table get the generic text comparison."""
+    check = CHECK_REGISTRY.get(label)
+    if check is None:
+        check = _GENERIC_CHECKS.get(label)
+        if check is None:
+            check = _GENERIC_CHECKS[label] = FieldCheck(label, field)
+    return check
+
+def compare_fields(csv_data, pdf_text, fields_to_check, module_qty_pdf, inverter_qty_pdf, contractor_name_pdf, timer=None,
+                   budget=None):
+    """
+    Run the registry check for every (label, field) in fields_to_check.
+    Returns CheckResult rows in fields_to_check order.
+    Each check is timed as a "check.<label>" stage on `timer`; checks a
+    ResourceBudget `budget` stops are not run and get its ⚠️ status instead.
+    """
+    index = as_text_index(pdf_text)
+    timer = ensure_timer(timer)
+    pdf_values = cover_pdf_values(module_qty_pdf, inverter_qty_pdf, contractor_name_pdf)
+    return [_check_row(csv_data, label, field, index, pdf_values, timer, budget)
+            for label, field in fields_to_check.items()]
+
+def _check_row(csv_data, label, field, index, pdf_values, timer, budget=None):
+    value = csv_data.get(field, "")
+    if not value:
+        return CheckResult(label, field, value, "⚠️ Missing in CSV", "")
+    reason = budget.stop_reason(label) if budget is not None else None
+    if reason is not None:
+        return CheckResult(label, field, value, *reason)
+    with timer.stage(f"check.{label}"):
+        status, explanation = get_check(label, field).run(value, csv_data, index, pdf_values)
+    return CheckResult(label, field, value, status, explanation)
+
+def early_check_rows(csv_data, fields_to_check, prefix, done=(), timer=None, budget=None):
+    """
+    The compare_fields rows already final on `prefix`, a PdfTextIndex over the
+    leading reviewed pages (see extract_pdf_data's `progress`): cover checks once
+    the cover page has been read, and checks that pass. The checks take the
+    first match in page order, so a ✅ on the pages read so far is the same ✅
+    on the whole planset; anything else may still change and waits for it, as
+    do address checks. Labels in `done` are skipped.
+    """
+    if not prefix.text.endswith("\n"):
+        return []  # the last line read may go on in the next page's text
+    timer = ensure_timer(timer)
+    read = {number for _, number in prefix.page_starts}
+    pdf_values = None
+    if prefix.cover_page in read:
+        contractor_name_csv = csv_data.get("Engineering_Project__c.Customer__r.Name", "")
+        pdf_values = cover_pdf_values(*extract_cover_values(prefix, contractor_name_csv, prefix.cover_page))
+    rows = []
+    for label, field in fields_to_check.items():
+        if label in done or not csv_data.get(field, ""):
+            continue
+        check = get_check(label, field)
+        if check.evidence == "cover":
+            if pdf_values is not None:
+                rows.append(_check_row(csv_data, label, field, prefix, pdf_values, timer, budget))
+            continue
+        if check.mode == "address":
+            continue  # an earlier match window may run on into the next page
+        if check.mode == "next_line_alias" and (
+                prefix.line_index_with_keyword(check.label, len(prefix.lines) - 1) is not None):
+            continue  # the line after the label is on a page not read yet
+        row = _check_row(csv_data, label, field, prefix, pdf_values or {}, timer, budget)
+        if row.status.startswith(("✅", BUDGET_EXCEEDED)):
+            rows.append(row)
+    return rows
+
+def cover_pdf_values(module_qty_pdf, inverter_qty_pdf, contractor_name_pdf):
+    """The extracted cover values keyed by the CHECK_TABLE `source` names."""
+    return {
+        "module_qty": module_qty_pdf,
+        "inverter_qty": inverter_qty_pdf,
+        "contractor_name": contractor_name_pdf,
+    }
+
+def check_evidence(check, row, csv_data, index, pdf_values):
+    """
+    Planset pages a compare_fields row depends on: a sorted list of page numbers,
+    or None when it may depend on any reviewed page. Rows missing in the CSV
+    depend on no page. A passing contains check depends only on the first page
+    it passes on; a failing one depends on every reviewed page.
+    """
+    label, field, value, status, explanation = row
+    if not value:
+        return []
+    if not index.page_starts:
+        return None
+    if check.evidence == "cover":
+        return [index.cover_page]
+    if not str(status).startswith("✅"):
+        return None
+    if check.evidence == "contains":
+        for _, page_number in index.page_starts:
+            page_status, _ = check.run(value, csv_data, index.page_index(page_number), pdf_values)
+            if page_status.startswith("✅"):
+                return [page_number]
+        return None
+    # "label": pages up to the first text hit and, when the layout was read, the first laid-out value
+    last_pages = [hit.page for hit in index.hits(check.label)[:1] if hit.page is not None]
+    if check.layout:
+        for page_number in sorted(index.words):
+            page_words = index.words[page_number]
+            if page_words is not None and page_words.value_for(check.label, check.layout):
+                last_pages.append(page_number)
+                break
+    if not last_pages:
+        return None
+    return list(range(1, max(last_pages) + 1))
+
+class EvidenceBox(NamedTuple):
+    page: int  # 1-based page number
+    x0: float  # box in PDF points, origin top-left (PageWords coordinates)
+    y0: float
+    x1: float
+    y1: float
+
+# Planset labels the extra checks point at (they have no CSV value of their own)
+EXTRA_EVIDENCE_LABELS = {
+    "DC System Size Check": "dc size",
+    "TESLA MCI CHECK": "imp",
+}
+
+# Runs of value words shorter than this only count when the value is one word
+MIN_EVIDENCE_WORDS = 2
+
+def _words_box(page_number, words):
+    return EvidenceBox(
+        page_number,
+        min(w.x0 for w in words), min(w.y0 for w in words), max(w.x1 for w in words), max(w.y1 for w in words),
+    )
+
+def _value_runs(value):
+    """Consecutive runs of the value's words, longest (and then leftmost) first."""
+    tokens = [token for token in str(value).split() if re.sub(r'[^A-Za-z0-9]', '', token)]
+    shortest = 1 if len(tokens) == 1 else MIN_EVIDENCE_WORDS
+    for length in range(len(tokens), shortest - 1, -1):
+        for start in range(len(tokens) - length + 1):
+            yield " ".join(tokens[start:start + length])
+
+def locate_evidence(index, pages, value=None, label=None, direction="auto", label_first=False):
+    """
+    EvidenceBox on the first of `pages` (numbers with a PageWords layout in
+    index.words) showing the CSV value - the longest run of its words found -
+    or `label` with the value laid out next to it; None when neither is there.
+    """
+    def by_value():
+        if not value:
+            return None
+        for run in _value_runs(value):
+            for page_number in pages:
+                hits = index.words[page_number].find(run)
+                if hits:
+                    return _words_box(page_number, hits[0].words)
+        return None
+
+    def by_label():
+        if not label:
+            return None
+        for page_number in pages:
+            page_words = index.words[page_number]
+            for hit in page_words.find(label):
+                value_words = []
+                if direction in ("right", "auto"):
+                    value_words = page_words.right_of(hit)
+                if not value_words and direction in ("below", "auto"):
+                    value_words = page_words.below(hit)
+                return _words_box(page_number, hit.words + tuple(value_words))
+        return None
+
+    if label_first:
+        return by_label() or by_value()
+    return by_value() or by_label()
+
+def evidence_boxes(csv_data, fields_to_check, extra_checks, index):
+    """
+    {label: EvidenceBox} pointing at the planset text each check was matched
+    against, or for a failed check where the value was expected: label checks
+    at their label and value, the rest at the CSV value itself (its longest run
+    of words, so a near match or partial address still lands), cover
+    quantities on the cover page only. Rows with nothing to point at are left out.
+    """
+    pages = sorted(n for n, page_words in index.words.items() if page_words is not None)
+    boxes = {}
+    for label, field in fields_to_check.items():
+        value = csv_data.get(field, "")
+        if not value:
+            continue
+        check = get_check(label, field)
+        box = locate_evidence(
+            index,
+            [n for n in pages if n == index.cover_page] if check.evidence == "cover" else pages,
+            value=value,
+            label=check.label,
+            direction=check.layout or "auto",
+            label_first=check.evidence == "label",
+        )
+        if box is not None:
+            boxes[label] = box
+    for label, field, value, status, explanation in extra_checks:
+        box = locate_evidence(index, pages, value=value if value != "-" else None,
+                              label=EXTRA_EVIDENCE_LABELS.get(label))
+        if box is not None:
+            boxes[label] = box
+    return boxes
+
+FIELDS_TO_CHECK = {check.name: check.field for check in CHECK_REGISTRY.values() if not check.requires}
+
+ESS_FIELDS_TO_CHECK = {check.name: check.field for check in CHECK_REGISTRY.values() if check.requires == ESS_ENABLED}
+
+def build_fields_to_check(csv_data):
+    return {check.name: check.field for check in CHECK_REGISTRY.values() if check.applies(csv_data)}
+
+def load_csv_data(csv_source, timer=None):
+    """Read a Field/Value CSV (path or file-like) and add the compiled addresses."""
+    timer = ensure_timer(timer)
+    with timer.stage("csv.read"):
+        csv_data = read_field_value_csv(csv_source)
+    csv_data["Compiled_Project_Address"] = compile_project_address(csv_data)
+    csv_data["Compiled_Customer_Address"] = compile_customer_address(csv_data)
+    return csv_data
+
+def extract_pdf_data(doc, csv_data, sheets=REVIEW_SHEETS, timer=None, memory=None, page_cache=None,
+                     fingerprints=False, budget=None, progress=None):
+    """
+    Pull the planset values the checks need from an open fitz document (or a
+    PlansetPages over one). Only pages classified as one of `sheets` (plus the
+    legacy pages 1, 3 and 4 when present) are fully extracted, one page at a
+    time; with a MemoryBudget (see ingest.py) each page is released as soon as
+    it has been read, and with a PageCache (see page_cache.py) pages seen before
+    are not extracted again. With fingerprints=True every page's content
+    fingerprint is recorded on index.page_fingerprints (for revision diffs).
+    A ResourceBudget (see guard.py) caps the pages read and the characters
+    kept per page.
+    The cover quantities and contractor name are read from the first page
+    classified as the cover sheet (index.cover_page, else page 1).
+    With a `progress` callable, the reviewed pages are read in runs that double
+    the pages read (1, 2, 4, ...); after each run but the last it is called with
+    a PdfTextIndex over the pages read so far (see early_check_rows).
+    Returns (module_qty, inverter_qty, contractor_name, index) where index is a
+    PdfTextIndex over the reviewed pages.
+    """
+    timer = ensure_timer(timer)
+    pages = doc if isinstance(doc, PlansetPages) else PlansetPages(doc, memory=memory, cache=page_cache, budget=budget)
+    try:
+        with timer.stage("pdf.classify_pages"):
+            page_numbers = pages.pages_for(sheets)
+            cover_page = next((n for n in page_numbers if pages.kind(n) == "cover"), 1)
+        with timer.stage("pdf.word_index"):
+            pages.prefetch(page_numbers, ("words", "text"))
+        words, texts = {}, []
+        views = {} if pages.cache is not None else None
+        while len(texts) < len(page_numbers):
+            run = page_numbers[len(texts):2 * len(texts) or 1] if progress is not None else page_numbers
+            with timer.stage("pdf.word_index"):
+                words.update((n, pages.words(n)) for n in run)
+            with timer.stage("pdf.extract_text"):
+                texts.extend((n, pages.text(n)) for n in run)
+                if views is not None:
+                    views.update((n, _cached_page_views(pages, n)) for n in run)
+            if len(texts) < len(page_numbers):
+                prefix = PdfTextIndex.from_pages(list(texts), dict(words), views and dict(views))
+                prefix.cover_page = cover_page
+                progress(prefix)
+        with timer.stage("pdf.extract_text"):
+            index = PdfTextIndex.from_pages(texts, words, views)
+        if fingerprints:
+            with timer.stage("pdf.fingerprint"):
+                index.page_fingerprints = pages.fingerprints()
+    finally:
+        if pages.cache is not None:
+            with timer.stage("pdf.page_cache_flush"):
+                pages.flush_cache()
+    index.reviewed_pages = page_numbers
+    index.cover_page = cover_page
+    index.page_cache_stats = pages.cache_stats()
+    if memory is not None:
+        memory.check("pdf.extract_text")
+    contractor_name_csv = csv_data.get("Engineering_Project__c.Customer__r.Name", "")
+    with timer.stage("pdf.cover_values"):
+        module_qty_pdf, inverter_qty_pdf, contractor_name_pdf = extract_cover_values(
+            index, contractor_name_csv, index.cover_page)
+    return module_qty_pdf, inverter_qty_pdf, contractor_name_pdf, index
+
+def review_rows(review):
+    """Every CheckResult of a finished review: filename checks, field comparison, then extra checks."""
+    return review["filename_checks"] + review["comparison"] + review["extra_checks"]
+
+def count_statuses(items):
+    """
+    Return (match_count, mismatch_count, missing_count, near_count) for
+    (label, field, value, status, explanation) rows.
+    """
+    match_count = sum(1 for _, _, _, status, _ in items if str(status).startswith("✅"))
+    mismatch_count = sum(1 for _, _, _, status, _ in items if str(status).startswith("❌"))
+    missing_count = sum(1 for _, _, _, status, _ in items if str(status).startswith("⚠️"))
+    near_count = sum(1 for _, _, _, status, _ in items if str(status).startswith(NEAR_MATCH))
+    return match_count, mismatch_count, missing_count, near_count
+
+def filename_check_rows(csv_filename=None, pdf_filename=None):
+    filename_checks = []
+    if csv_filename:
+        status, explanation = check_filename_for_special_chars(csv_filename)
+        filename_checks.append(CheckResult("CSV Filename Check", "-", "-", status, explanation))
+    if pdf_filename:
+        status, explanation = check_filename_for_special_chars(pdf_filename)
+        filename_checks.append(CheckResult("PDF Filename Check", "-", "-", status, explanation))
+    return filename_checks
+
+def _open_pdf(pdf_bytes, pdf_path, timer):
+    with timer.stage("pdf.open"):
+        if pdf_path is not None:
+            return fitz.open(pdf_path)
+        return fitz.open(stream=pdf_bytes, filetype="pdf")
+
+def _planset_pages(doc, pdf_bytes, pdf_path, memory=None, page_cache=None, budget=None):
+    # Large plansets are read range by range on worker processes (QC_PARALLEL_PAGES)
+    parallel = ParallelExtractor.from_env(pdf_path if pdf_path is not None else pdf_bytes, len(doc))
+    return PlansetPages(doc, memory=memory, cache=page_cache, parallel=parallel, budget=budget)
+
+def _open_and_extract(csv_data, pdf_bytes, pdf_path, timer, memory=None, page_cache=None, fingerprints=False,
+                      budget=None, progress=None):
+    if budget is not None and budget.planset_skipped:
+        # The watchdog gave up on reading this planset: every check gets the budget's ⚠️ row
+        index = PdfTextIndex("")
+        index.reviewed_pages = []
+        index.page_fingerprints = [] if fingerprints else None
+        return None, None, None, index
+    with _open_pdf(pdf_bytes, pdf_path, timer) as doc:
+        pages = _planset_pages(doc, pdf_bytes, pdf_path, memory, page_cache, budget)
+        return extract_pdf_data(pages, csv_data, timer=timer, memory=memory, fingerprints=fingerprints, budget=budget,
+                                progress=progress)
+
+def iter_review(csv_data, pdf_bytes=None, pdf_path=None, csv_filename=None, pdf_filename=None, timer=None,
+                memory=None, page_cache=None, evidence=False, budget=None):
+    """
+    Run every check for one project, yielding (kind, payload) events as results
+    become available so a UI can draw them progressively:
+
+        ("filename", row)   filename checks, immediately
+        ("check", row)      compare_fields rows; CSV-missing fields come first,
+                            then, while the PDF is still being extracted, the
+                            rows already final on the pages read so far (cover
+                            checks, passing checks; see early_check_rows)
+        ("extracted", path) once extraction finishes: where the planset text was
+                            spooled (review["pdf_text_path"]; small enough to stream
+                            from a watchdog worker, unlike the PdfTextIndex)
+        ("module", details) the ModuleDetails, right after extraction
+        ("evidence", boxes) {label: EvidenceBox} for the checks that have one,
+                            before the remaining rows
+        ("extra", row)      module_check_rows of those details
+        ("done", review)    the same dict review_project returns
+
+    Rows are CheckResults. The UI, downloads and batch exports read only these
+    events and the finished review dict (see review_rows).
+
+    PDF extraction runs on a background worker thread. Pass pdf_path rather
+    than pdf_bytes for large plansets, and a MemoryBudget as `memory` to cap
+    and report the process RSS; its record is included as review["memory"].
+    With a PageCache, unchanged pages of a revised planset are read from the
+    cache; this review's page cache hits/misses are review["page_cache"].
+    With evidence=True the review also records the page fingerprints and the
+    pages each check's result depends on, so it can be the `previous` of
+    review_revision.
+    With a ResourceBudget (see guard.py) the planset is read within its page
+    and character caps, checks it stops get a ⚠️ row instead of running, and
+    its hits are review["budget"].
+    """
+    timer = ensure_timer(timer)
+    fields_to_check = build_fields_to_check(csv_data)
+    rows = {}
+    prefixes = queue.Queue()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        extraction = executor.submit(
+            _open_and_extract, csv_data, pdf_bytes, pdf_path, timer, memory, page_cache, evidence, budget,
+            prefixes.put)
+        extraction.add_done_callback(lambda _: prefixes.put(None))
+
+        filename_checks = filename_check_rows(csv_filename, pdf_filename)
+        for row in filename_checks:
+            yield "filename", row
+
+        for label, field in fields_to_check.items():
+            value = csv_data.get(field, "")
+            if not value:
+                rows[label] = CheckResult(label, field, value, "⚠️ Missing in CSV", "")
+                yield "check", rows[label]
+
+        # Checks already settled by the first pages run while the rest is read
+        for prefix in iter(prefixes.get, None):
+            for row in early_check_rows(csv_data, fields_to_check, prefix, rows, timer, budget):
+                rows[row.label] = row
+                yield "check", row
+
+        module_qty_pdf, inverter_qty_pdf, contractor_name_pdf, index = extraction.result()
+
+    with timer.stage("review.spool_text"):
+        # The text is kept on disk, not in the (cached) review
+        text_path = spool_text(index.text)
+    yield "extracted", text_path
+
+    details = module_details(csv_data, index, timer=timer, budget=budget)
+    yield "module", details
+    extra_checks = module_check_rows(details)
+    with timer.stage("review.locate"):
+        boxes = evidence_boxes(csv_data, fields_to_check, extra_checks, index)
+    yield "evidence", boxes
+
+    for label, field in fields_to_check.items():
+        if label in rows:
+            continue
+        rows[label] = compare_fields(
+            csv_data, index, {label: field}, module_qty_pdf, inverter_qty_pdf, contractor_name_pdf, timer=timer,
+            budget=budget,
+        )[0]
+        yield "check", rows[label]
+
+    for row in extra_checks:
+        yield "extra", row
+
+    review = {
+        "csv_data": csv_data,
+        "fields_to_check": fields_to_check,
+        "filename_checks": filename_checks,
+        "comparison": [rows[label] for label in fields_to_check],
+        "extra_checks": extra_checks,
+        "module": details,
+        "evidence_boxes": boxes,
+        "pdf_text_path": text_path,
+        "timings": timer.as_dict(),
+        "memory": memory.as_dict() if memory is not None else None,
+        "page_cache": index.page_cache_stats,
+        "budget": budget.as_dict() if budget is not None else None,
+    }
+    if evidence:
+        pdf_values = cover_pdf_values(module_qty_pdf, inverter_qty_pdf, contractor_name_pdf)
+        with timer.stage("review.evidence"):
+            review.update(_evidence_record(csv_data, fields_to_check, rows, index, pdf_values))
+        review["timings"] = timer.as_dict()
+    yield "done", review
+
+def _evidence_record(csv_data, fields_to_check, rows, index, pdf_values):
+    return {
+        "evidence": {
+            label: check_evidence(get_check(label, field), rows[label], csv_data, index, pdf_values)
+            for label, field in fields_to_check.items()
+        },
+        "page_fingerprints": index.page_fingerprints,
+        "reviewed_pages": index.reviewed_pages,
+    }
+
+def replay_review(review):
+    """Yield the iter_review events for an already finished review (e.g. from the cache)."""
+    for row in review["filename_checks"]:
+        yield "filename", row
+    yield "extracted", review["pdf_text_path"]
+    yield "module", review["module"]
+    yield "evidence", review["evidence_boxes"]
+    for row in review["comparison"]:
+        yield "check", row
+    for row in review["extra_checks"]:
+        yield "extra", row
+    yield "done", review
+
+def review_project(csv_data, pdf_bytes=None, pdf_path=None, csv_filename=None, pdf_filename=None, timer=None,
+                   memory=None, page_cache=None, evidence=False, budget=None):
+    """
+    Run every check for one project. Pass the planset either as bytes or as a path.
+    Returns a dict with the filename checks, field comparison, extra checks,
+    the ModuleDetails they were computed from, the path of the extracted text on the text spool (pdf_text_path, see
+    ingest.spool_text), the per-stage timings, the memory record, the page cache hits/misses and the resource budget
+    hits.
+    """
+    for kind, payload in iter_review(csv_data, pdf_bytes, pdf_path, csv_filename, pdf_filename, timer, memory,
+                                     page_cache, evidence, budget):
+        if kind == "done":
+            return payload
+
+def changed_pages(previous_fingerprints, fingerprints):
+    """1-based numbers of the pages whose content differs, including pages added or removed."""
+    count = max(len(previous_fingerprints), len(fingerprints))
+    return [
+        n for n in range(1, count + 1)
+        if n > len(previous_fingerprints) or n > len(fingerprints) or previous_fingerprints[n - 1] != fingerprints[n - 1]
+    ]
+
+def status_changes(previous_rows, rows):
+    """[{label, before, after, explanation}] for every label whose status differs (before/after None if absent)."""
+    before = {row[0]: row for row in previous_rows}
+    after = {row[0]: row for row in rows}
+    changes = []
+    for label in list(after) + [label for label in before if label not in after]:
+        old, new = before.get(label), after.get(label)
+        old_status = old[3] if old else None
+        new_status = new[3] if new else None
+        if old_status != new_status:
+            changes.append({
+                "label": label,
+                "before": old_status,
+                "after": new_status,
+                "explanation": new[4] if new else old[4],
+            })
+    return changes
+
+def review_revision(previous, csv_data, pdf_bytes=None, pdf_path=None, csv_filename=None, pdf_filename=None,
+                    timer=None, memory=None, page_cache=None, budget=None):
+    """
+    Review a revised planset against `previous`, the review of the earlier
+    revision recorded with evidence=True (freshly, or from a cache).
+
+    Pages are compared by content fingerprint. Only checks whose evidence lies
+    on a changed page that is (or was) reviewed, or whose CSV value changed,
+    are run again through compare_fields / module_details; every other row
+    is reused. When no reviewed page changed and the CSV is the same, the
+    planset is not extracted at all, unless the previous review's spooled text
+    has since been pruned. Rows a ResourceBudget stopped last time
+    are always run again.
+
+    Returns the review_project dict (with evidence, so it can be the next
+    revision's `previous`) plus review["diff"]:
+        changed_pages   pages whose content changed
+        rechecked       labels that were evaluated again
+        reused          number of rows taken from `previous`
+        changes         status_changes() between the two revisions
+    """
+    if previous.get("evidence") is None or previous.get("page_fingerprints") is None:
+        raise ValueError("The previous review was not recorded with evidence=True")
+    timer = ensure_timer(timer)
+    fields_to_check = build_fields_to_check(csv_data)
+    previous_rows = {row[0]: row for row in previous["comparison"]}
+    csv_changed = csv_data != previous["csv_data"]
+
+    if budget is not None and budget.planset_skipped:
+        # The watchdog gave up on reading this planset: nothing can be compared, every check gets a ⚠️ row
+        review = review_project(csv_data, pdf_bytes, pdf_path, csv_filename, pdf_filename, timer, memory, page_cache,
+                                evidence=True, budget=budget)
+        rows = review["comparison"] + review["extra_checks"]
+        review["diff"] = {
+            "changed_pages": [],
+            "rechecked": [row[0] for row in rows],
+            "reused": 0,
+            "changes": status_changes(previous["comparison"] + previous["extra_checks"], rows),
+        }
+        return review
+
+    with _open_pdf(pdf_bytes, pdf_path, timer) as doc:
+        pages = _planset_pages(doc, pdf_bytes, pdf_path, memory, page_cache, budget)
+        with timer.stage("pdf.fingerprint"):
+            fingerprints = pages.fingerprints()
+        changed = changed_pages(previous["page_fingerprints"], fingerprints)
+        relevant = set()
+        if changed:
+            with timer.stage("pdf.classify_pages"):
+                reviewed = set(previous["reviewed_pages"]) | set(pages.pages_for(REVIEW_SHEETS))
+            relevant = reviewed.intersection(changed)
+
+        def affected(label, field):
+            previous_row = previous_rows.get(label)
+            if previous_row is None or csv_data.get(field, "") != previous_row[2]:
+                return True
+            if str(previous_row[3]).startswith(BUDGET_EXCEEDED):
+                return True
+            evidence_pages = previous["evidence"].get(label)
+            if evidence_pages is None:
+                return bool(relevant)
+            return any(n in changed for n in evidence_pages)
+
+        recheck = {label: field for label, field in fields_to_check.items() if affected(label, field)}
+        recheck_extras = (bool(relevant) or csv_changed
+                          or any(str(row[3]).startswith(BUDGET_EXCEEDED) for row in previous["extra_checks"]))
+
+        # The previous text may have been pruned from the spool; then the pages are read again for it
+        text_pruned = not os.path.exists(previous["pdf_text_path"])
+        index = None
+        if recheck or recheck_extras or text_pruned:
+            module_qty_pdf, inverter_qty_pdf, contractor_name_pdf, index = extract_pdf_data(
+                pages, csv_data, timer=timer, fingerprints=True, budget=budget)
+            pdf_values = cover_pdf_values(module_qty_pdf, inverter_qty_pdf, contractor_name_pdf)
+        elif page_cache is not None:
+            pages.flush_cache()
+
+    rows = dict(previous_rows)
+    evidence = dict(previous["evidence"])
+    if recheck:
+        for row in compare_fields(csv_data, index, recheck, module_qty_pdf, inverter_qty_pdf, contractor_name_pdf,
+                                  timer=timer, budget=budget):
+            rows[row[0]] = row
+        with timer.stage("review.evidence"):
+            evidence.update(_evidence_record(csv_data, recheck, rows, index, pdf_values)["evidence"])
+    details = module_details(csv_data, index, timer=timer, budget=budget) if recheck_extras else previous["module"]
+    extra_checks = module_check_rows(details) if recheck_extras else previous["extra_checks"]
+    comparison = [rows[label] for label in fields_to_check]
+    # Reused rows keep their evidence box unless its page changed; the others are located again
+    extra_labels = {row[0] for row in extra_checks}
+    boxes = {
+        label: box for label, box in previous["evidence_boxes"].items()
+        if (label in fields_to_check and label not in recheck or label in extra_labels and not recheck_extras)
+        and box.page not in changed
+    }
+    if index is not None:
+        with timer.stage("review.locate"):
+            boxes.update(evidence_boxes(
+                csv_data,
+                {label: field for label, field in fields_to_check.items() if label not in boxes},
+                [row for row in extra_checks if row[0] not in boxes],
+                index,
+            ))
+
+    rechecked = list(recheck) + ([row[0] for row in extra_checks] if recheck_extras else [])
+    text_path = previous["pdf_text_path"]
+    if index is not None:
+        with timer.stage("review.spool_text"):
+            text_path = spool_text(index.text)
+    review = {
+        "csv_data": csv_data,
+        "fields_to_check": fields_to_check,
+        "filename_checks": filename_check_rows(csv_filename, pdf_filename),
+        "comparison": comparison,
+        "extra_checks": extra_checks,
+        "module": details,
+        "evidence_boxes": boxes,
+        "pdf_text_path": text_path,
+        "timings": timer.as_dict(),
+        "memory": memory.as_dict() if memory is not None else None,
+        "page_cache": index.page_cache_stats if index is not None else pages.cache_stats(),
+        "budget": budget.as_dict() if budget is not None else None,
+        "evidence": {label: evidence.get(label) for label in fields_to_check},
+        "page_fingerprints": fingerprints,
+        "reviewed_pages": index.reviewed_pages if index is not None else previous["reviewed_pages"],
+        "diff": {
+            "changed_pages": changed,
+            "rechecked": rechecked,
+            "reused": len(comparison) + len(extra_checks) - len(rechecked),
+            "changes": status_changes(previous["comparison"] + previous["extra_checks"], comparison + extra_checks),
+        },
+    }
+    return review
@@ -0,0 +1,116 @@
+"""
+In-memory result cache for reviews.
+
+Streamlit reruns the whole script on every widget interaction. The cache keys a
+finished review by the SHA-256 of the uploaded CSV and PDF bytes (plus the file
+names, RULESET_VERSION and the equipment catalog file version), so a rerun with the same uploads skips the planset
+parsing and every check.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from equipment_catalog import catalog_stamp
+
+# Bump whenever a check or extractor changes so stale cached results are not served.
+RULESET_VERSION = "6"
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def review_cache_key(csv_bytes, pdf_bytes, csv_filename="", pdf_filename="", ruleset_version=RULESET_VERSION):
+    return review_cache_key_for_digests(
+        sha256_bytes(csv_bytes), sha256_bytes(pdf_bytes), csv_filename, pdf_filename, ruleset_version
+    )
+
+
+def review_cache_key_for_digests(csv_digest, pdf_digest, csv_filename="", pdf_filename="",
+                                 ruleset_version=RULESET_VERSION):
+    """Same key as review_cache_key, from SHA-256 hex digests (e.g. of a spooled upload)."""
+    return "|".join([
+        csv_digest,
+        pdf_digest,
+        csv_filename or "",
+        pdf_filename or "",
+        ruleset_version,
+        catalog_stamp(),
+    ])
+
+
+def _review_size(review):
+    """Rough size in bytes of a review dict's rows (its planset text is on the text spool, not in the dict)."""
+    size = 0
+    for key in ("filename_checks", "comparison", "extra_checks"):
+        for row in review.get(key, []):
+            size += sum(len(str(part)) for part in row)
+    return size
+
+
+def _copy_review(review):
+    return {k: (list(v) if isinstance(v, list) else v) for k, v in review.items()}
+
+
+class ReviewCache:
+    """
+    Thread-safe LRU cache of review dicts, bounded both by entry count and by
+    the approximate total size of the cached rows.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def get(self, key):
+        """Return a copy of the cached review (so callers may append to its lists) or None."""
+        with self._lock:
+            review = self._entries.get(key)
+            if review is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy_review(review)
+
+    def put(self, key, review):
+        size = _review_size(review)
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = review
+            self._sizes[key] = size
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+
+    def get_or_compute(self, key, compute):
+        review = self.get(key)
+        if review is None:
+            review = compute()
+            self.put(key, review)
+            review = _copy_review(review)
+        return review
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
@@ -0,0 +1,458 @@
+"""
+Local HTTP JSON service for the EXPRESS QC REVIEW TOOL.
+
+Lets other tools submit reviews by machine. Jobs go into a bounded queue and
+run on a pool of worker processes (the same review_pair the batch runner
+uses, on a ReviewWatchdog, see guard.py). When the queue is full, submissions
+are refused with HTTP 429 so a burst cannot oversubscribe the machine.
+Uploads are streamed to a per-job folder on disk chunk by chunk, so a large
+planset is never held in memory.
+
+Usage:
+    python service.py [--host 127.0.0.1] [--port 8765] [--workers N] [--queue-depth N]
+                      [--memory-budget-mb MB] [--page-cache DIR|off] [--audit-log DIR|off]
+                      [--check-budget-s S] [--review-budget-s S]
+
+Endpoints (all responses are JSON):
+    POST /reviews               multipart/form-data with `csv` and `pdf` file fields,
+                                or a JSON body {"project": ..., "csv": path, "pdf": path}
+                                -> 202 {"job_id", "status", "status_url", "result_url"}
+                                -> 429 when the queue is full (Retry-After is set)
+    GET  /reviews/<id>          job status: queued | running | done | error
+    GET  /reviews/<id>/result   the batch record once finished (202 until then);
+                                "results" holds the (label, field, value, status,
+                                explanation) rows
+    GET  /health                worker count, queue depth, job counts and watchdog kills
+
+Every finished review is also appended to the audit log (see audit_log.py).
+
+    curl -F csv=@project.csv -F pdf=@planset.pdf http://127.0.0.1:8765/reviews
+"""
+import argparse
+import asyncio
+import email.message
+import email.parser
+import email.policy
+import json
+import os
+import re
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+
+from audit_log import AuditLog
+from batch import failed_record, review_pair
+from guard import ReviewWatchdog
+from ingest import CHUNK_SIZE
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_DEPTH = 16
+DEFAULT_MAX_UPLOAD_MB = 256
+DEFAULT_KEEP_JOBS = 1000
+# JSON bodies only carry paths; uploads are streamed to disk instead (see parse_multipart)
+MAX_JSON_BODY_BYTES = 1024 * 1024
+MAX_PART_HEADER_BYTES = 64 * 1024
+UPLOAD_FIELDS = {"csv": "project.csv", "pdf": "planset.pdf"}
+
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+_JOB_PATH = re.compile(r"^/reviews/([0-9a-f]{32})(/result)?$")
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._ -]")
+
+
+class RequestError(Exception):
+    """Raised while handling a request; becomes a JSON error response with this status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _safe_filename(name, default):
+    # Keep the uploaded name (the filename checks read it) but never a path
+    name = _SAFE_NAME.sub("_", os.path.basename(name or "")).strip(". ")
+    return name or default
+
+
+def _boundary(content_type):
+    message = email.message.EmailMessage(policy=email.policy.HTTP)
+    message["Content-Type"] = content_type
+    return message.get_param("boundary") if message.get_content_type() == "multipart/form-data" else None
+
+
+def parse_multipart(content_type, body, spool_dir, fields, chunk_size=CHUNK_SIZE):
+    """
+    Write the `fields` ({field name: default filename}) of a multipart/form-data
+    body (a binary file) into spool_dir, one chunk at a time, each under its
+    uploaded filename. Other fields are skipped. Returns {field name: path}.
+    """
+    boundary = _boundary(content_type)
+    if not boundary:
+        raise RequestError(400, "Expected a multipart/form-data body")
+    delimiter = b"\r\n--" + boundary.encode("latin-1")
+    paths = {}
+    buffer, eof = b"\r\n", False  # the leading CRLF lets the first delimiter match like the others
+    out, reading_headers = None, False
+    try:
+        while True:
+            if not eof:
+                chunk = body.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+            if reading_headers:
+                # The buffer still starts with the CRLF that ended the delimiter line
+                end = buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if eof or len(buffer) > MAX_PART_HEADER_BYTES:
+                        raise RequestError(400, "Malformed multipart part headers")
+                    continue
+                headers = email.parser.BytesHeaderParser(policy=email.policy.HTTP).parsebytes(buffer[2:end + 4])
+                buffer, reading_headers = buffer[end + 4:], False
+                name = headers.get_param("name", header="content-disposition")
+                if name in fields and name not in paths:
+                    paths[name] = os.path.join(spool_dir, _safe_filename(headers.get_filename(), fields[name]))
+                    out = open(paths[name], "wb")
+                continue
+            # Part data (or the preamble) runs up to the next delimiter, which may straddle two chunks
+            pos = buffer.find(delimiter)
+            if pos < 0 or len(buffer) < pos + len(delimiter) + 2:
+                if eof:
+                    raise RequestError(400, "Truncated multipart body")
+                keep = len(delimiter) + 1 if pos < 0 else len(buffer) - pos
+                if out is not None and len(buffer) > keep:
+                    out.write(buffer[:-keep])
+                buffer = buffer[-keep:]
+                continue
+            if out is not None:
+                out.write(buffer[:pos])
+                out.close()
+                out = None
+            after = buffer[pos + len(delimiter):pos + len(delimiter) + 2]
+            if after == b"--":
+                return paths
+            if after != b"\r\n":
+                raise RequestError(400, "Malformed multipart delimiter")
+            buffer, reading_headers = buffer[pos + len(delimiter):], True
+    finally:
+        if out is not None:
+            out.close()
+
+
+class ReviewService:
+    """
+    Job queue, worker pool and HTTP handler. Job state lives in this process;
+    only review_pair runs in the pool, so a crashed review marks its job as an
+    error instead of taking the service down.
+    """
+
+    def __init__(self, workers=None, queue_depth=DEFAULT_QUEUE_DEPTH,
+                 max_upload_bytes=DEFAULT_MAX_UPLOAD_MB * 1024 * 1024, keep_jobs=DEFAULT_KEEP_JOBS, audit=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.max_upload_bytes = max_upload_bytes
+        self.keep_jobs = keep_jobs
+        self.audit = audit
+        self.jobs = OrderedDict()
+        self.queue = None
+        self.watchdog = None
+        self._dispatchers = []
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_depth)
+        self.watchdog = ReviewWatchdog(self.workers)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.watchdog.shutdown()
+        for job in self.jobs.values():
+            self._drop_spool(job)
+        if self.audit is not None:
+            self.audit.close()
+
+    # ----------------------------
+    # Jobs
+    # ----------------------------
+    def submit(self, project, csv_path, pdf_path, spool_dir=None):
+        """Queue one review; raises RequestError(429) when the queue is full."""
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "project": project,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "record": None,
+            "pair": (project, csv_path, pdf_path),
+            "spool_dir": spool_dir,
+        }
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._drop_spool(job)
+            raise RequestError(429, f"Review queue is full ({self.queue_depth} jobs waiting); retry later")
+        self.jobs[job["job_id"]] = job
+        self._prune_jobs()
+        return job
+
+    async def _dispatch(self):
+        while True:
+            job = await self.queue.get()
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            try:
+                record = await asyncio.wrap_future(self.watchdog.submit(review_pair, job["pair"]))
+            except Exception as e:  # the worker process died (e.g. killed by the OOM killer)
+                record = failed_record(job["pair"], e)
+            job["record"] = record
+            if self.audit is not None:
+                self.audit.append(record, source="service")
+            job["status"] = "error" if record.get("error") else "done"
+            job["finished_at"] = time.time()
+            self._drop_spool(job)
+            self.queue.task_done()
+
+    def _drop_spool(self, job):
+        if job["spool_dir"]:
+            shutil.rmtree(job["spool_dir"], ignore_errors=True)
+            job["spool_dir"] = None
+
+    def _prune_jobs(self):
+        # Forget the oldest finished jobs once more than keep_jobs are held
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in ("done", "error")]
+        for job_id in finished[:max(0, len(self.jobs) - self.keep_jobs)]:
+            del self.jobs[job_id]
+
+    def job_status(self, job):
+        return {
+            "job_id": job["job_id"],
+            "project": job["project"],
+            "status": job["status"],
+            "submitted_at": job["submitted_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "status_url": f"/reviews/{job['job_id']}",
+            "result_url": f"/reviews/{job['job_id']}/result",
+        }
+
+    def health(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "queued": self.queue.qsize(),
+            "jobs": counts,
+            "watchdog_kills": self.watchdog.kills,
+        }
+
+    # ----------------------------
+    # HTTP
+    # ----------------------------
+    async def handle(self, reader, writer):
+        headers = {}
+        body = None
+        try:
+            try:
+                method, path, headers, body = await self._read_request(reader)
+                status, payload = self.route(method, path, headers, body)
+            except RequestError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            extra = {"Retry-After": "5"} if status == 429 else {}
+            await self._write_response(writer, status, payload, extra)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise RequestError(400, "Malformed request line")
+        method, target = parts[0].upper(), parts[1]
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > self.max_upload_bytes:
+            raise RequestError(413, f"Request body exceeds {self.max_upload_bytes // (1024 * 1024)} MB")
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            if length > MAX_JSON_BODY_BYTES:
+                raise RequestError(413, f"JSON body exceeds {MAX_JSON_BODY_BYTES // 1024} KB")
+            body = await reader.readexactly(length) if length else b""
+            return method, target.split("?", 1)[0], headers, body
+        # An upload goes to disk chunk by chunk rather than into memory
+        body = tempfile.TemporaryFile(prefix="qc-request-")
+        try:
+            while length:
+                chunk = await reader.readexactly(min(length, CHUNK_SIZE))
+                body.write(chunk)
+                length -= len(chunk)
+            body.seek(0)
+        except BaseException:
+            body.close()
+            raise
+        return method, target.split("?", 1)[0], headers, body
+
+    async def _write_response(self, writer, status, payload, extra_headers):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}",
+                "Connection: close"]
+        head += [f"{name}: {value}" for name, value in extra_headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    def route(self, method, path, headers, body):
+        """(status, JSON payload) for one request; `body` is bytes, or a binary file for an upload."""
+        if path == "/health":
+            if method != "GET":
+                raise RequestError(405, "Use GET")
+            return 200, self.health()
+        if path == "/reviews":
+            if method != "POST":
+                raise RequestError(405, "Use POST")
+            return 202, self.job_status(self._submit_request(headers, body))
+        match = _JOB_PATH.match(path)
+        if match:
+            if method != "GET":
+                raise RequestError(405, "Use GET")
+            job = self.jobs.get(match.group(1))
+            if job is None:
+                raise RequestError(404, "Unknown job")
+            if not match.group(2):
+                return 200, self.job_status(job)
+            if job["record"] is None:
+                return 202, self.job_status(job)
+            return 200, job["record"]
+        raise RequestError(404, f"No route for {path}")
+
+    def _submit_request(self, headers, body):
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            return self._submit_upload(content_type, body)
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "Body must be multipart/form-data or JSON")
+        csv_path, pdf_path = request.get("csv"), request.get("pdf")
+        if not csv_path or not pdf_path:
+            raise RequestError(400, "JSON submissions need `csv` and `pdf` paths")
+        for path in (csv_path, pdf_path):
+            if not os.path.isfile(path):
+                raise RequestError(400, f"File not found: {path}")
+        project = request.get("project") or os.path.splitext(os.path.basename(csv_path))[0]
+        return self.submit(project, os.path.abspath(csv_path), os.path.abspath(pdf_path))
+
+    def _submit_upload(self, content_type, body):
+        spool_dir = tempfile.mkdtemp(prefix="qc-job-")
+        try:
+            paths = parse_multipart(content_type, body, spool_dir, UPLOAD_FIELDS)
+            if "csv" not in paths or "pdf" not in paths:
+                raise RequestError(400, "Upload both a `csv` and a `pdf` file field")
+            if paths["csv"] == paths["pdf"]:
+                raise RequestError(400, "The `csv` and `pdf` files need different names")
+        except BaseException:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+            raise
+        project = os.path.splitext(os.path.basename(paths["csv"]))[0]
+        return self.submit(project, paths["csv"], paths["pdf"], spool_dir=spool_dir)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **service_options):
+    service = ReviewService(**service_options)
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    try:
+        # A plain `kill` shuts down like Ctrl+C, so service.stop() flushes the audit log
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:  # Windows
+        pass
+    print(f"Review service on http://{host}:{port} ({service.workers} workers, queue depth {service.queue_depth})",
+          file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve QC reviews over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue-depth", type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help=f"Jobs allowed to wait before new ones get HTTP 429 (default: {DEFAULT_QUEUE_DEPTH})")
+    parser.add_argument("--max-upload-mb", type=float, default=DEFAULT_MAX_UPLOAD_MB,
+                        help=f"Largest accepted request body (default: {DEFAULT_MAX_UPLOAD_MB})")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Per-worker RSS cap in MB, 0 to disable (default: QC_MEMORY_BUDGET_MB or 2048)")
+    parser.add_argument("--page-cache", default=None,
+                        help="Page cache directory, or 'off' (default: QC_PAGE_CACHE_DIR or ~/.cache/qc-review)")
+    parser.add_argument("--audit-log", default=None,
+                        help="Audit log directory, or 'off' (default: QC_AUDIT_LOG_DIR or ~/.local/share/qc-review/audit)")
+    parser.add_argument("--check-budget-s", type=float, default=None,
+                        help="Seconds one check may run, 0 to disable (default: QC_CHECK_BUDGET_S or 30)")
+    parser.add_argument("--review-budget-s", type=float, default=None,
+                        help="Seconds one review may run, 0 to disable (default: QC_REVIEW_BUDGET_S or 300)")
+    args = parser.parse_args(argv)
+
+    # Read by MemoryBudget.from_env(), PageCache.from_env() and ResourceBudget.from_env()
+    if args.memory_budget_mb is not None:
+        os.environ["QC_MEMORY_BUDGET_MB"] = str(args.memory_budget_mb)
+    if args.check_budget_s is not None:
+        os.environ["QC_CHECK_BUDGET_S"] = str(args.check_budget_s)
+    if args.review_budget_s is not None:
+        os.environ["QC_REVIEW_BUDGET_S"] = str(args.review_budget_s)
+    if args.page_cache is not None:
+        os.environ["QC_PAGE_CACHE_DIR"] = args.page_cache
+    if args.audit_log is not None:
+        os.environ["QC_AUDIT_LOG_DIR"] = args.audit_log
+    # Split the cores between review workers for parallel page extraction (see parallel_extract.py)
+    cpus = os.cpu_count() or 1
+    os.environ.setdefault("QC_EXTRACT_WORKERS", str(max(1, cpus // (args.workers or cpus))))
+
+    try:
+        asyncio.run(serve(
+            args.host,
+            args.port,
+            workers=args.workers,
+            queue_depth=args.queue_depth,
+            max_upload_bytes=int(args.max_upload_mb * 1024 * 1024),
+            audit=AuditLog.from_env(),
+        ))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import os
+
+from audit_log import AuditLog
+
+
+def _record(n):
+    return {"project": f"P{n}", "csv": "p.csv", "pdf": "p.pdf", "error": None,
+            "results": [["Utility", "Utility__c", "PGE", "✅", ""]]}
+
+
+def _names(audit):
+    (month,) = audit.months()
+    return sorted(os.path.basename(path) for path in audit._files(month))
+
+
+def test_compaction_leaves_merged_files_alone(tmp_path):
+    audit = AuditLog(str(tmp_path), flush_rows=1, flush_s=0, compact_parts=2)
+    for n in range(3):
+        audit.append(_record(n), source="batch")
+    (first,) = [name for name in _names(audit) if name.startswith("compact-")]
+    for n in range(3, 6):
+        audit.append(_record(n), source="batch")
+    names = _names(audit)
+    assert first in names
+    assert [name.split("-")[0] for name in names] == ["compact", "compact"]
+    # A third tier-1 file fills the tier: the three become one tier-2 file
+    for n in range(6, 9):
+        audit.append(_record(n), source="batch")
+    assert [name.split("-")[0] for name in _names(audit)] == ["compact2"]
+    assert sorted(audit.dataset().to_table(columns=["project"])["project"].to_pylist()) == [f"P{n}" for n in range(9)]
+
+
+def test_manual_compact_merges_every_file(tmp_path):
+    audit = AuditLog(str(tmp_path), flush_rows=1, flush_s=0, compact_parts=2)
+    for n in range(4):
+        audit.append(_record(n), source="batch")
+    assert len(_names(audit)) == 2
+    assert audit.compact() == 2
+    assert len(_names(audit)) == 1
+    assert audit.dataset().count_rows() == 4
@@ -0,0 +1,55 @@
+"""load_bulk_csv must normalize every column exactly as the per-project checks do."""
+import csv
+import io
+
+import pytest
+
+from bulk_csv import load_bulk_csv
+from qc_core import CHECK_REGISTRY
+
+# Characters where pandas' Arrow-backed strings and Python's re/str disagree
+UNICODE_VALUES = [
+    "Sunrun\xa0Inc.",
+    "İstanbul Power",
+    "Pacific Gas & Electric",
+    "ＣＩＴＹ of Salem",
+    "Straße 12",
+    "ǅurić Solar",
+    "OR\xa0",
+    "Hanwha Q.CELLS Q.PEAK DUO",
+    "12 345",
+    "ΣΟΛΑΡ ΟΔΟΣ",
+    "１２",
+    # ASCII whitespace Python's \s and str.strip() take but Arrow's \s does not
+    "\x1c12\x0b",
+    "CA\x1f",
+    " 1_000 ",
+    ".5E3",
+    "Inf",
+    "<b>Q</b> Cells",
+]
+
+
+def _bulk_csv(values):
+    fields = sorted({check.field for check in CHECK_REGISTRY.values()} | {
+        field for check in CHECK_REGISTRY.values() if check.mode == "address" for field in check.address
+    })
+    rows = [
+        {"project": f"P{i}", **{field: values[(i + j) % len(values)] for j, field in enumerate(fields)}}
+        for i in range(len(values))
+    ]
+    out = io.StringIO()
+    writer = csv.DictWriter(out, ["project", *fields])
+    writer.writeheader()
+    writer.writerows(rows)
+    return io.StringIO(out.getvalue())
+
+
+@pytest.mark.parametrize("name", sorted(CHECK_REGISTRY))
+def test_normalized_matches_check_prepare(name):
+    check = CHECK_REGISTRY[name]
+    for project in load_bulk_csv(_bulk_csv(UNICODE_VALUES)).values():
+        if name not in project.normalized:
+            continue
+        value = project.get(check.field, "")
+        assert project.normalized[name] == check._prepare(check, value, project), (name, value)
@@ -0,0 +1,25 @@
+import os
+
+import equipment_catalog
+from qc_core import module_details
+
+
+def test_no_catalog_ships_by_default(monkeypatch):
+    monkeypatch.delenv("QC_EQUIPMENT_CATALOG", raising=False)
+    assert not os.path.exists(equipment_catalog.DEFAULT_CATALOG)
+    assert equipment_catalog.catalog_from_env() is None
+
+
+def test_review_stats_the_catalog_once(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.csv"
+    path.write_text("kind,manufacturer,part_number,stc_w,vmp,imp,voc,isc,ac_w\n"
+                    "module,REC,REC400AA,400,33.9,12.5,40.1,13.41,\n")
+    monkeypatch.setenv("QC_EQUIPMENT_CATALOG", str(path))
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(equipment_catalog.os, "stat", lambda p, *a, **k: stats.append(p) or real_stat(p, *a, **k))
+    details = module_details({"Engineering_Project__c.Module_Part_Number__c": "REC400AA-BLK",
+                              "Engineering_Project__c.Module_Quantity__c": "10",
+                              "Engineering_Project__c.Inverter_Manufacturer__c": "Tesla"}, "")
+    assert details.wattage == 400 and details.imp_source == "catalog"
+    assert stats == [str(path)]
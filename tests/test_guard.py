@@ -0,0 +1,98 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.synthetic_planset import write_project
+from guard import BUDGET_EXCEEDED, ResourceBudget, ReviewWatchdog, WorkerFailed
+from qc_core import iter_review, load_csv_data
+from timing import StageTimer
+
+
+def _budget():
+    return ResourceBudget(check_s=1, review_s=0)
+
+
+def stuck_check(budget=None):
+    """A check that hangs unless the watchdog already stopped it."""
+    if "Slow" in budget.skipped:
+        return budget.skipped["Slow"][0]
+    with StageTimer().stage("check.Slow"):
+        time.sleep(3600)
+
+
+def stuck_events(budget=None):
+    """Three events, then stuck_check's result."""
+    for n in range(3):
+        yield n
+    yield stuck_check(budget=budget)
+
+
+def stuck_planset(budget=None):
+    """Reading the planset hangs unless the watchdog already gave up on it."""
+    if budget.planset_skipped:
+        return budget.stop_reason("Utility")[0]
+    with StageTimer().stage("pdf.extract_text"):
+        time.sleep(3600)
+
+
+def crash(budget=None):
+    os._exit(3)
+
+
+def worker_pid(budget=None):
+    return os.getpid()
+
+
+def slow_events(budget=None):
+    yield os.getpid()
+    time.sleep(3600)
+
+
+@pytest.fixture
+def watchdog():
+    with ReviewWatchdog(workers=1, budget_factory=_budget) as watchdog:
+        yield watchdog
+
+
+def test_stuck_check_is_killed_and_rerun_without_it(watchdog):
+    start = time.monotonic()
+    status = watchdog.submit(stuck_check).result(timeout=60)
+    assert status.startswith(BUDGET_EXCEEDED)
+    assert watchdog.kills == 1
+    assert time.monotonic() - start < 30
+
+
+def test_stuck_planset_is_skipped_after_the_review_deadline():
+    with ReviewWatchdog(workers=1, budget_factory=lambda: ResourceBudget(check_s=0, review_s=1)) as watchdog:
+        status = watchdog.submit(stuck_planset).result(timeout=60)
+    assert status == f"{BUDGET_EXCEEDED}: planset not read"
+    assert watchdog.kills == 1
+
+
+def test_crashed_worker_fails_its_job_and_is_replaced(watchdog):
+    first = watchdog.submit(worker_pid).result(timeout=60)
+    with pytest.raises(WorkerFailed):
+        watchdog.submit(crash).result(timeout=60)
+    assert watchdog.submit(worker_pid).result(timeout=60) != first
+
+
+def test_stream_skips_events_replayed_after_restart(watchdog):
+    events = list(watchdog.stream(stuck_events))
+    assert events[:3] == [0, 1, 2]
+    assert len(events) == 4 and events[3].startswith(BUDGET_EXCEEDED)
+    assert watchdog.kills == 1
+
+
+def test_abandoned_stream_frees_its_worker(watchdog):
+    stream = watchdog.stream(slow_events)
+    busy_pid = next(stream)
+    stream.close()
+    assert watchdog.submit(worker_pid).result(timeout=60) != busy_pid
+
+
+def test_streamed_review_sends_the_text_path(watchdog, tmp_path):
+    csv_path, pdf_path = write_project(str(tmp_path), "stream", 4)
+    events = dict(watchdog.stream(iter_review, load_csv_data(csv_path), pdf_path=pdf_path))
+    assert events["extracted"] == events["done"]["pdf_text_path"]
+    assert os.path.exists(events["extracted"])
@@ -0,0 +1,25 @@
+import fitz
+
+from page_cache import page_fingerprint
+
+
+def _pages(*cropboxes):
+    doc = fitz.open()
+    for cropbox in cropboxes:
+        page = doc.new_page(width=600, height=800)
+        page.insert_text((150, 150), "Hello world")
+        page.set_cropbox(fitz.Rect(cropbox))
+    return doc
+
+
+def test_fingerprint_is_stable():
+    doc = _pages((0, 0, 400, 600), (0, 0, 400, 600))
+    first, second = doc[0], doc[1]
+    assert page_fingerprint(first) == page_fingerprint(second)
+
+
+def test_fingerprint_covers_cropbox_origin():
+    doc = _pages((0, 0, 400, 600), (100, 0, 500, 600))
+    first, shifted = doc[0], doc[1]
+    assert first.get_text() == shifted.get_text()
+    assert page_fingerprint(first) != page_fingerprint(shifted)
@@ -0,0 +1,51 @@
+import fitz
+import pytest
+
+from planset_pages import PlansetPages
+
+
+def _sheet(doc, rotated=False):
+    # A landscape sheet whose body talks about a site plan; its title block says it is the single line diagram.
+    # Rotated, it is stored portrait with /Rotate 90 and the text is placed at the same displayed positions.
+    if rotated:
+        page = doc.new_page(width=612, height=792)
+        page.set_rotation(90)
+    else:
+        page = doc.new_page(width=792, height=612)
+    for point, text, size in (((36, 60), "SEE SITE PLAN AND ROOF PLAN FOR ARRAY LAYOUT", 10),
+                              ((640, 500), "E-1 SINGLE LINE DIAGRAM", 8),
+                              ((640, 520), "PV SYSTEM ELECTRICAL", 8)):
+        page.insert_text(fitz.Point(point) * page.derotation_matrix, text, fontsize=size, rotate=page.rotation)
+    return page
+
+
+@pytest.fixture
+def doc():
+    doc = fitz.open()
+    doc.new_page(width=792, height=612).insert_text((36, 60), "COVER SHEET", fontsize=12)
+    _sheet(doc)
+    _sheet(doc, rotated=True)
+    return doc
+
+
+@pytest.mark.parametrize("loaded", [None, "text", "words"])
+def test_signal_does_not_depend_on_loaded_data(doc, loaded):
+    pages = PlansetPages(doc)
+    if loaded:
+        getattr(pages, loaded)(2)
+    assert pages.signal(2) == PlansetPages(doc).signal(2)
+    assert pages.kind(2) == "electrical"
+
+
+def test_rotated_sheet_classifies_from_its_title_block(doc):
+    pages = PlansetPages(doc)
+    assert doc[2].rotation == 90
+    assert pages.signal(3) == pages.signal(2)
+    assert pages.kind(3) == "electrical"
+
+
+def test_rotated_region_words_find_the_title_block(doc):
+    title_block = (0.78, 0.0, 1.0, 1.0)
+    plain, rotated = PlansetPages(doc).words(2), PlansetPages(doc).words(3)
+    assert [w.text for w in rotated.region_words(title_block)] == [w.text for w in plain.region_words(title_block)]
+    assert "ELECTRICAL" in [w.text for w in rotated.region_words(title_block)]
@@ -0,0 +1,111 @@
+import os
+
+import fitz
+import pytest
+
+from benchmarks.synthetic_planset import write_project
+from ingest import read_spooled_text
+from qc_core import (CHECK_REGISTRY, compare_fields, extract_pdf_data, iter_review, load_csv_data, replay_review,
+                     review_project, review_revision)
+
+LABEL = "Racking Model"
+
+
+@pytest.fixture(scope="module")
+def project(tmp_path_factory, offline_env):
+    out_dir = tmp_path_factory.mktemp("revision")
+    csv_path, pdf_path = write_project(str(out_dir), "base", 6)
+    csv_data = load_csv_data(csv_path)
+    previous = review_project(csv_data, pdf_path=pdf_path, evidence=True)
+    return out_dir, csv_data, pdf_path, previous
+
+
+@pytest.fixture(scope="module")
+def offline_env():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("QC_PAGE_CACHE_DIR", "off")
+        monkeypatch.setenv("QC_AUDIT_LOG_DIR", "off")
+        yield monkeypatch
+
+
+def _revise(out_dir, pdf_path, page_number):
+    doc = fitz.open(pdf_path)
+    doc[page_number - 1].insert_text((36, 700), "REVISED NOTE", fontsize=8)
+    path = str(out_dir / f"rev_{page_number}.pdf")
+    doc.save(path)
+    return path
+
+
+def test_contains_evidence_is_first_passing_page(project):
+    _, _, _, previous = project
+    assert CHECK_REGISTRY[LABEL].evidence == "contains"
+    assert len(previous["evidence"][LABEL]) == 1
+
+
+def test_change_off_evidence_page_reuses_row(project):
+    out_dir, csv_data, pdf_path, previous = project
+    (evidence_page,) = previous["evidence"][LABEL]
+    other = next(n for n in previous["reviewed_pages"] if n != evidence_page)
+    review = review_revision(previous, csv_data, pdf_path=_revise(out_dir, pdf_path, other))
+    assert review["diff"]["changed_pages"] == [other]
+    assert LABEL not in review["diff"]["rechecked"]
+    assert review["comparison"] == previous["comparison"]
+
+
+def test_change_on_evidence_page_reruns_row(project):
+    out_dir, csv_data, pdf_path, previous = project
+    (evidence_page,) = previous["evidence"][LABEL]
+    review = review_revision(previous, csv_data, pdf_path=_revise(out_dir, pdf_path, evidence_page))
+    assert review["diff"]["changed_pages"] == [evidence_page]
+    assert LABEL in review["diff"]["rechecked"]
+
+
+def test_cover_values_come_from_classified_cover(project):
+    out_dir, csv_data, pdf_path, _ = project
+    doc = fitz.open(pdf_path)
+    doc.move_page(0, 2)  # the site plan is now page 1, the cover sheet page 2
+    path = str(out_dir / "cover_second.pdf")
+    doc.save(path)
+    review = review_project(csv_data, pdf_path=path, evidence=True)
+    rows = {row[0]: row for row in review["comparison"]}
+    for label in ("Module Quantity", "Inverter Quantity"):
+        assert rows[label][3].startswith("✅"), rows[label]
+        assert review["evidence"][label] == [2]
+        assert review["evidence_boxes"][label].page == 2
+
+
+def test_review_keeps_text_on_spool(project):
+    _, _, _, previous = project
+    text = read_spooled_text(previous["pdf_text_path"])
+    assert "pdf_text" not in previous
+    assert "MODULE" in text.upper()
+    replayed = dict(replay_review(previous))
+    assert replayed["extracted"] == previous["pdf_text_path"]
+
+
+def test_revision_respools_pruned_text(project):
+    _, csv_data, pdf_path, previous = project
+    previous = review_project(csv_data, pdf_path=pdf_path, evidence=True)
+    os.remove(previous["pdf_text_path"])
+    review = review_revision(previous, csv_data, pdf_path=pdf_path)
+    assert review["diff"]["rechecked"] == []
+    assert review["comparison"] == previous["comparison"]
+    assert "MODULE" in read_spooled_text(review["pdf_text_path"]).upper()
+
+
+def test_settled_checks_stream_before_extraction_ends(project):
+    _, csv_data, pdf_path, previous = project
+    early = []
+    for kind, payload in iter_review(csv_data, pdf_path=pdf_path):
+        if kind == "extracted":
+            break
+        if kind == "check" and payload.value:
+            early.append(payload)
+    assert "Module Quantity" in [row.label for row in early]
+    assert all(row.status.startswith("✅") or CHECK_REGISTRY[row.label].evidence == "cover" for row in early)
+    # The same rows as checking the whole planset at once
+    with fitz.open(pdf_path) as doc:
+        *cover_values, index = extract_pdf_data(doc, csv_data)
+    fields_to_check = {row.label: row.field for row in early}
+    assert sorted(early) == sorted(compare_fields(csv_data, index, fields_to_check, *cover_values))
+    assert sorted(early) == sorted(row for row in previous["comparison"] if row.label in fields_to_check)
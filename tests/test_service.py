@@ -0,0 +1,100 @@
+import asyncio
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from batch import review_pair
+from benchmarks.synthetic_planset import write_project
+from service import ReviewService, UPLOAD_FIELDS, parse_multipart
+
+BOUNDARY = "qc-test-boundary"
+
+
+def _multipart(files):
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{field}"; filename="{os.path.basename(path)}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n".encode() + open(path, "rb").read() + b"\r\n"
+        for field, path in files.items()
+    ]
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(url, body=None, content_type=None):
+    request = urllib.request.Request(url, data=body, method="POST" if body is not None else "GET")
+    if content_type:
+        request.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), e.headers
+
+
+@pytest.fixture(scope="module")
+def project(tmp_path_factory):
+    csv_path, pdf_path = write_project(str(tmp_path_factory.mktemp("service")), "upload", 4)
+    return csv_path, pdf_path
+
+
+@pytest.fixture
+def base_url():
+    # The service on an ephemeral port, its event loop on a thread of its own
+    service = ReviewService(workers=1, queue_depth=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        await service.start()
+        return await asyncio.start_server(service.handle, "127.0.0.1", 0)
+
+    async def stop():
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+
+    server = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    yield f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    asyncio.run_coroutine_threadsafe(stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_parse_multipart_streams_parts_across_chunks(project, tmp_path):
+    body = _multipart({"csv": project[0], "note": project[0], "pdf": project[1]})
+    paths = parse_multipart(f"multipart/form-data; boundary={BOUNDARY}", io.BytesIO(body), str(tmp_path),
+                            UPLOAD_FIELDS, chunk_size=7)
+    assert sorted(paths) == ["csv", "pdf"]
+    for field, path in paths.items():
+        assert os.path.basename(path) == os.path.basename(project[field == "pdf"])
+        assert open(path, "rb").read() == open(project[field == "pdf"], "rb").read()
+
+
+def test_upload_is_reviewed(project, base_url):
+    csv_path, pdf_path = project
+    status, job, _ = _request(f"{base_url}/reviews", _multipart({"csv": csv_path, "pdf": pdf_path}),
+                              f"multipart/form-data; boundary={BOUNDARY}")
+    assert status == 202
+    deadline = time.time() + 60
+    while (result := _request(base_url + job["result_url"]))[0] != 200:
+        assert time.time() < deadline
+        time.sleep(0.05)
+    record = result[1]
+    assert record["error"] is None
+    assert record["results"] == review_pair(("upload", csv_path, pdf_path))["results"]
+
+
+def test_full_queue_gets_429(project, base_url):
+    csv_path, pdf_path = project
+    body = json.dumps({"csv": csv_path, "pdf": pdf_path}).encode()
+    responses = [_request(f"{base_url}/reviews", body, "application/json") for _ in range(6)]
+    assert responses[0][0] == 202
+    refused = [headers for status, _, headers in responses if status == 429]
+    assert refused and refused[0]["Retry-After"]
+    assert _request(f"{base_url}/health")[0] == 200
@@ -0,0 +1,37 @@
+import pytest
+
+from batch import failed_record
+from watch import FolderWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    (tmp_path / "p.csv").write_text("Field,Value\n")
+    (tmp_path / "p.pdf").write_bytes(b"%PDF-1.4\n")
+    return FolderWatcher(str(tmp_path), settle_s=0, retries=2, retry_backoff_s=60)
+
+
+def _review(watcher, record, now):
+    (job,) = watcher.ready(now=now)
+    watcher.finish(job, dict(record, project=job[0], csv=job[1], pdf=job[2]))
+    return watcher.state[job[0]]
+
+
+def test_transient_failure_is_retried_with_backoff(watcher):
+    now = 1e10
+    state = _review(watcher, failed_record(("p", "", ""), "worker killed"), now)
+    assert state["retry_at"] is not None
+    assert watcher.ready(now=state["retry_at"] - 1) == []
+    state = _review(watcher, failed_record(("p", "", ""), "worker killed"), state["retry_at"])
+    assert state["attempts"] == 2
+    assert state["retry_at"] - state["reviewed_at"] == pytest.approx(120)
+    # Out of retries: parked until a file changes
+    state = _review(watcher, failed_record(("p", "", ""), "worker killed"), state["retry_at"])
+    assert state["retry_at"] is None
+    assert watcher.ready(now=now * 2) == []
+
+
+def test_bad_input_is_not_retried(watcher):
+    state = _review(watcher, {"error": "Bad CSV", "transient": False}, 1e10)
+    assert state["error"] and state["retry_at"] is None
+    assert watcher.ready(now=2e10) == []
@@ -0,0 +1,142 @@
+"""
+Evidence thumbnails: low-DPI crops of the planset around a check's evidence.
+
+Every review records an EvidenceBox (page and word box) per check, see
+qc_core.evidence_boxes. The UI draws the crop around a box only when the
+reviewer asks for it, and keeps the PNGs in a byte-bounded LRU shared by
+every session, keyed by the planset's SHA-256, page, clip and DPI. Flipping
+back to a result is a dictionary lookup; checks nobody looks at cost
+nothing, and the planset is not even opened while every requested crop is
+cached.
+
+    thumbnails = ThumbnailCache.from_env()
+    png = thumbnails.get_or_render(pdf_digest, box, lambda: open_document(pdf_bytes, pdf_path))
+
+Configuration (environment): QC_THUMBNAIL_CACHE_MB (size cap, 0 disables
+caching) and QC_THUMBNAIL_DPI (render resolution).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+
+DEFAULT_MAX_MB = 64
+DEFAULT_DPI = 96
+
+# Points of context drawn around the evidence box, and the most shown
+MARGIN_PT = 36
+MAX_CLIP_PT = 600
+
+HIGHLIGHT_RGB = (255, 64, 0)
+HIGHLIGHT_PX = 2
+
+
+def open_document(pdf_bytes=None, pdf_path=None):
+    if pdf_path is not None:
+        return fitz.open(pdf_path)
+    return fitz.open(stream=pdf_bytes, filetype="pdf")
+
+
+def evidence_clip(rect, page_rect, margin=MARGIN_PT):
+    """The region to render for `rect`: it plus `margin`, at most MAX_CLIP_PT wide and tall, inside the page."""
+    center_x, center_y = (rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2
+    half_width = min(rect.width / 2 + margin, MAX_CLIP_PT / 2)
+    half_height = min(rect.height / 2 + margin, MAX_CLIP_PT / 2)
+    return fitz.Rect(center_x - half_width, center_y - half_height, center_x + half_width, center_y + half_height) & page_rect
+
+
+def render_evidence(doc, box, dpi=DEFAULT_DPI):
+    """PNG bytes of the region around `box` in `doc`, with the box outlined; None when it is off the page."""
+    if not 1 <= box.page <= len(doc):
+        return None
+    page = doc[box.page - 1]
+    # Word boxes are in unrotated page space; the clip and the image are the page as displayed
+    rect = fitz.Rect(box.x0, box.y0, box.x1, box.y1) * page.rotation_matrix
+    clip = evidence_clip(rect, page.rect)
+    if clip.is_empty:
+        return None
+    pix = page.get_pixmap(clip=clip, dpi=dpi, alpha=False)
+    # Pixmap coordinates are the whole page's at this dpi (pix.irect is the clip)
+    x0, y0, x1, y1 = (rect * fitz.Matrix(dpi / 72, dpi / 72)).irect + (-HIGHLIGHT_PX, -HIGHLIGHT_PX, HIGHLIGHT_PX, HIGHLIGHT_PX)
+    for edge in (
+        (x0, y0, x1, y0 + HIGHLIGHT_PX),
+        (x0, y1 - HIGHLIGHT_PX, x1, y1),
+        (x0, y0, x0 + HIGHLIGHT_PX, y1),
+        (x1 - HIGHLIGHT_PX, y0, x1, y1),
+    ):
+        edge = fitz.IRect(edge) & pix.irect
+        if not edge.is_empty:
+            pix.set_rect(edge, HIGHLIGHT_RGB)
+    return pix.tobytes("png")
+
+
+class ThumbnailCache:
+    """Thread-safe LRU of rendered evidence PNGs, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, dpi=DEFAULT_DPI):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_bytes=int(float(os.environ.get("QC_THUMBNAIL_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            dpi=int(os.environ.get("QC_THUMBNAIL_DPI", DEFAULT_DPI)),
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def key(self, pdf_digest, box):
+        # Boxes come from float word coordinates; a tenth of a point is far below one pixel
+        return (pdf_digest, box.page, tuple(round(v, 1) for v in box[1:]), self.dpi)
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= len(self._entries.pop(key))
+            if len(png) > self.max_bytes:
+                return
+            self._entries[key] = png
+            self._total_bytes += len(png)
+            while self._total_bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._total_bytes -= len(old)
+
+    def get_or_render(self, pdf_digest, box, open_doc):
+        """
+        The PNG for `box` in the planset with SHA-256 `pdf_digest`, or None.
+        `open_doc` is called (and the crop rendered) only on a cache miss.
+        """
+        key = self.key(pdf_digest, box)
+        png = self.get(key)
+        if png is None:
+            png = render_evidence(open_doc(), box, self.dpi)
+            if png is not None:
+                self.put(key, png)
+        return png
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
@@ -0,0 +1,78 @@
+"""
+Lightweight per-stage timing for the review pipeline.
+
+    timer = StageTimer()
+    with timer.stage("pdf.open"):
+        ...
+    timer.as_dict()  # {"total_s": ..., "stages": [{"stage": "pdf.open", "seconds": ...}, ...]}
+
+Stage names are dotted: csv.*, pdf.*, check.<label>, extra.*.
+
+set_stage_listener(fn) has fn(stage, started) called as every stage of every
+timer in the process starts and ends; the guard.py watchdog workers report
+their progress this way.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+_stage_listener = None
+
+
+def set_stage_listener(listener):
+    global _stage_listener
+    _stage_listener = listener
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []  # (stage, seconds) in completion order
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent along with a review to a watchdog worker process (see guard.py)
+        return {"stages": list(self.stages)}
+
+    def __setstate__(self, state):
+        self.stages = state["stages"]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        listener = _stage_listener
+        if listener is not None:
+            listener(name, True)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages.append((name, elapsed))
+            if listener is not None:
+                listener(name, False)
+
+    def timed(self, name):
+        """Decorator form of stage()."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def total(self, prefix=""):
+        return sum(seconds for name, seconds in self.stages if name.startswith(prefix))
+
+    def as_dict(self):
+        """Machine-readable record included with review results and batch output."""
+        return {
+            "total_s": round(self.total(), 6),
+            "stages": [{"stage": name, "seconds": round(seconds, 6)} for name, seconds in self.stages],
+        }
+
+
+def ensure_timer(timer):
+    return timer if timer is not None else StageTimer()
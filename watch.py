@@ -0,0 +1,269 @@
+"""
+Watch-folder daemon for the EXPRESS QC REVIEW TOOL.
+
+Polls a drop folder for `<project>.csv` / `<project>.pdf` pairs (paired like
+batch.py) and reviews every new or changed pair on a bounded pool of worker
+processes (a ReviewWatchdog, see guard.py), writing the batch record next to the inputs as
+`<project>.qc.json` (and appending it to the audit log, see audit_log.py).
+
+    python watch.py path/to/dropbox [--workers N] [--interval 5] [--settle 10] [--recursive] [--once]
+
+A pair is picked up once neither file has changed for --settle seconds, so
+half-copied plansets are not reviewed. It is skipped when the SHA-256 of
+both files (plus RULESET_VERSION and the equipment catalog version) matches
+its last review. Files are only re-hashed when their size or mtime changes.
+What was reviewed is kept in a state file (default: .qc-watch-state.json in
+the folder), so a restarted watcher does not review unchanged pairs again.
+A review that failed for a reason that may pass (its worker died or was given
+up on, a file could not be read, memory ran out) is tried again after
+--retry-backoff seconds, doubling each time, up to --retries times; one that
+failed on the files themselves (a bad CSV or PDF) waits until one changes.
+Polling is used rather than inotify: it works the same on network shares and
+needs no extra dependency, and a scan is one stat() per file.
+"""
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from audit_log import AuditLog
+from batch import failed_record, file_sha256, find_pairs, review_pair
+from guard import ReviewWatchdog
+from equipment_catalog import catalog_stamp
+from review_cache import RULESET_VERSION
+
+STATE_NAME = ".qc-watch-state.json"
+RESULT_SUFFIX = ".qc.json"
+DEFAULT_INTERVAL_S = 5.0
+DEFAULT_SETTLE_S = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_BACKOFF_S = 60.0
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _write_json(path, data):
+    # Written aside and renamed, so readers (and a crash) never see half a file
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+class FolderWatcher:
+    """
+    Scans `folder` for ready pairs and keeps at most `workers` reviews in flight.
+    State per project: the file stats and review key of its last review, and
+    for a transient failure the attempts so far and when to try again.
+    """
+
+    def __init__(self, folder, workers=None, interval_s=DEFAULT_INTERVAL_S, settle_s=DEFAULT_SETTLE_S,
+                 recursive=False, state_path=None, audit=None, retries=DEFAULT_RETRIES,
+                 retry_backoff_s=DEFAULT_RETRY_BACKOFF_S):
+        self.folder = os.path.abspath(folder)
+        self.workers = workers or os.cpu_count() or 1
+        self.interval_s = interval_s
+        self.settle_s = settle_s
+        self.retries = retries
+        self.retry_backoff_s = retry_backoff_s
+        self.recursive = recursive
+        self.state_path = state_path or os.path.join(self.folder, STATE_NAME)
+        self.audit = audit
+        self.state = self._load_state()
+        self._dirty = False
+        self.in_flight = {}  # future -> (project, csv_path, pdf_path, stats, key)
+        self.reviewed = 0
+        self.skipped = 0
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable watch state {self.state_path}: {e}", file=sys.stderr)
+            return {}
+        return state.get("projects", {})
+
+    def save_state(self):
+        _write_json(self.state_path, {"folder": self.folder, "projects": self.state})
+        self._dirty = False
+
+    def pairs(self):
+        """(project, csv_path, pdf_path) of every pair; project is the path relative to the folder, without extension."""
+        if not self.recursive:
+            return find_pairs(self.folder)
+        pairs = []
+        for root, dirs, _ in os.walk(self.folder):
+            dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+            prefix = os.path.relpath(root, self.folder)
+            for project, csv_path, pdf_path in find_pairs(root):
+                pairs.append((project if prefix == "." else os.path.join(prefix, project), csv_path, pdf_path))
+        return pairs
+
+    def review_key(self, csv_path, pdf_path):
+        """What a review's result depends on: both files' content, the ruleset and the equipment catalog."""
+        parts = (file_sha256(csv_path), file_sha256(pdf_path), RULESET_VERSION, catalog_stamp())
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def ready(self, limit=None, now=None):
+        """
+        [(project, csv_path, pdf_path, stats, key)] for up to `limit` pairs that
+        changed since their last review and have settled, or whose transient
+        failure is due for another try. Pairs whose files were touched but whose
+        content is unchanged are recorded without a review.
+        Only pairs up to the limit are hashed; the rest wait for a later scan.
+        """
+        now = time.time() if now is None else now
+        busy = {job[0] for job in self.in_flight.values()}
+        ready = []
+        for project, csv_path, pdf_path in self.pairs():
+            if limit is not None and len(ready) >= limit:
+                break
+            if project in busy:
+                continue
+            try:
+                stats = {"csv": _stat(csv_path), "pdf": _stat(pdf_path)}
+            except FileNotFoundError:  # removed since the listing
+                continue
+            previous = self.state.get(project)
+            retry = previous is not None and previous.get("retry_at") is not None and now >= previous["retry_at"]
+            if previous is not None and previous["stats"] == stats and not retry:
+                continue
+            if now - max(stats["csv"][0], stats["pdf"][0]) / 1e9 < self.settle_s:
+                continue  # still being written
+            key = self.review_key(csv_path, pdf_path)
+            if previous is not None and previous["key"] == key and not retry:
+                previous["stats"] = stats
+                self._dirty = True
+                self.skipped += 1
+                continue
+            ready.append((project, csv_path, pdf_path, stats, key))
+        return ready
+
+    def result_path(self, csv_path):
+        return os.path.splitext(csv_path)[0] + RESULT_SUFFIX
+
+    def finish(self, job, record):
+        project, csv_path, pdf_path, stats, key = job
+        _write_json(self.result_path(csv_path), record)
+        if self.audit is not None:
+            self.audit.append(record, source="watch")
+        now = time.time()
+        previous = self.state.get(project)
+        attempts = previous.get("attempts", 1) + 1 if previous is not None and previous["key"] == key else 1
+        retry_at = None
+        if record.get("error") and record.get("transient") and attempts <= self.retries:
+            retry_at = now + self.retry_backoff_s * 2 ** (attempts - 1)
+        # Any other failed review is not retried until one of its files changes
+        self.state[project] = {"stats": stats, "key": key, "reviewed_at": now, "error": bool(record.get("error")),
+                               "attempts": attempts, "retry_at": retry_at}
+        self.save_state()
+        self.reviewed += 1
+        counts = record.get("counts") or {}
+        outcome = "error" if record.get("error") else f"{counts.get('pass', 0)} pass, {counts.get('fail', 0)} fail"
+        if retry_at is not None:
+            outcome += f", retrying in {retry_at - now:g}s"
+        print(f"Reviewed {project} ({outcome}) -> {self.result_path(csv_path)}", file=sys.stderr)
+
+    def run(self, once=False):
+        """
+        Poll until interrupted (SIGINT / SIGTERM). With once=True, review what
+        is ready now, wait for those reviews and return.
+        """
+        watchdog = ReviewWatchdog(self.workers)
+        try:
+            while True:
+                for job in self.ready(limit=self.workers - len(self.in_flight)):
+                    self.in_flight[watchdog.submit(review_pair, job[:3])] = job
+                if not self.in_flight:
+                    if once:
+                        break
+                    if self._dirty:
+                        self.save_state()
+                    time.sleep(self.interval_s)
+                    continue
+                done, _ = wait(self.in_flight, timeout=self.interval_s, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = self.in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:  # its worker died (e.g. killed by the OOM killer); the others carry on
+                        record = failed_record(job[:3], e)
+                    self.finish(job, record)
+        finally:
+            watchdog.shutdown()
+            self.save_state()
+            if self.audit is not None:
+                self.audit.close()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Review CSV/PDF pairs as they appear in a folder.")
+    parser.add_argument("folder", help="Folder the <project>.csv / <project>.pdf pairs are dropped into")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_S,
+                        help=f"Seconds between scans (default: {DEFAULT_INTERVAL_S:g})")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_S,
+                        help=f"Seconds a pair must be unchanged before it is reviewed (default: {DEFAULT_SETTLE_S:g})")
+    parser.add_argument("--recursive", action="store_true", help="Also watch subfolders")
+    parser.add_argument("--once", action="store_true", help="Review what is ready now, then exit")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Times a review that failed transiently is tried again (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--retry-backoff", type=float, default=DEFAULT_RETRY_BACKOFF_S,
+                        help=f"Seconds before the first retry, doubling after each (default: {DEFAULT_RETRY_BACKOFF_S:g})")
+    parser.add_argument("--state", default=None, help=f"State file (default: <folder>/{STATE_NAME})")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Per-worker RSS cap in MB, 0 to disable (default: QC_MEMORY_BUDGET_MB or 2048)")
+    parser.add_argument("--page-cache", default=None,
+                        help="Page cache directory, or 'off' (default: QC_PAGE_CACHE_DIR or ~/.cache/qc-review)")
+    parser.add_argument("--audit-log", default=None,
+                        help="Audit log directory, or 'off' (default: QC_AUDIT_LOG_DIR or ~/.local/share/qc-review/audit)")
+    parser.add_argument("--check-budget-s", type=float, default=None,
+                        help="Seconds one check may run, 0 to disable (default: QC_CHECK_BUDGET_S or 30)")
+    parser.add_argument("--review-budget-s", type=float, default=None,
+                        help="Seconds one review may run, 0 to disable (default: QC_REVIEW_BUDGET_S or 300)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        print(f"Not a folder: {args.folder}", file=sys.stderr)
+        return 1
+    # Read by MemoryBudget.from_env(), PageCache.from_env(), ResourceBudget.from_env() and AuditLog.from_env()
+    if args.memory_budget_mb is not None:
+        os.environ["QC_MEMORY_BUDGET_MB"] = str(args.memory_budget_mb)
+    if args.check_budget_s is not None:
+        os.environ["QC_CHECK_BUDGET_S"] = str(args.check_budget_s)
+    if args.review_budget_s is not None:
+        os.environ["QC_REVIEW_BUDGET_S"] = str(args.review_budget_s)
+    if args.page_cache is not None:
+        os.environ["QC_PAGE_CACHE_DIR"] = args.page_cache
+    if args.audit_log is not None:
+        os.environ["QC_AUDIT_LOG_DIR"] = args.audit_log
+
+    watcher = FolderWatcher(args.folder, workers=args.workers, interval_s=args.interval, settle_s=args.settle,
+                            recursive=args.recursive, state_path=args.state, audit=AuditLog.from_env(),
+                            retries=args.retries, retry_backoff_s=args.retry_backoff)
+    signal.signal(signal.SIGTERM, _interrupt)
+    print(f"Watching {watcher.folder} ({watcher.workers} workers, every {watcher.interval_s:g}s)", file=sys.stderr)
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    print(f"Reviewed {watcher.reviewed} pairs, {watcher.skipped} unchanged", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Spatial index over one page's word boxes (PyMuPDF get_text("words")).
+
+Flattened page text loses layout: a value printed to the right of its label
+can land lines away from it, and a value under its label is only "the next
+line" when the text order happens to cooperate. PageWords keeps every word's
+box in a uniform grid, so layout questions are answered from the few cells
+they touch instead of a rescan of the page:
+
+    words = PageWords.from_page(page)
+    words.words_in(fitz.Rect(...))      # e.g. everything in the title block
+    words.value_for("ahj:")             # text right of the label, else below it
+
+Labels are matched word by word, ignoring case and punctuation, so "AHJ:"
+matches "ahj" and "DC SIZE:" matches "dc size".
+"""
+import re
+from typing import NamedTuple
+
+# Grid cell size in points (1 inch). Plan sheets run ~1200 x 800 pt, so a
+# page is a few hundred cells and a label-sized query touches one or two.
+GRID_CELL = 72.0
+
+# A value to the right of a label may start up to RIGHT_LEAD_LINES line heights
+# after it (tabbed form fields) and stops at a gap wider than RIGHT_GAP_LINES
+# (the next column of a table or form).
+RIGHT_LEAD_LINES = 12.0
+RIGHT_GAP_LINES = 3.0
+
+# A value below a label must start within this many line heights of it.
+BELOW_DROP_LINES = 2.5
+
+_TOKEN_CLEAN = re.compile(r'[^a-z0-9]')
+
+
+def _token(text):
+    return _TOKEN_CLEAN.sub('', text.lower())
+
+
+def page_derotation(page):
+    """page.derotation_matrix as a tuple for PageWords, or None for an unrotated page."""
+    return tuple(page.derotation_matrix) if page.rotation else None
+
+
+class Word(NamedTuple):
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    text: str
+    block: int
+    line: int
+    word: int
+
+
+class LabelHit(NamedTuple):
+    words: tuple  # the Word objects that spell the label, in order
+
+    @property
+    def x0(self):
+        return min(w.x0 for w in self.words)
+
+    @property
+    def y0(self):
+        return min(w.y0 for w in self.words)
+
+    @property
+    def x1(self):
+        return max(w.x1 for w in self.words)
+
+    @property
+    def y1(self):
+        return max(w.y1 for w in self.words)
+
+    @property
+    def line_key(self):
+        last = self.words[-1]
+        return last.block, last.line
+
+
+def _reading_order(word):
+    return word.block, word.line, word.word
+
+
+def _text(words):
+    return " ".join(w.text for w in words)
+
+
+def _transform_rect(rect, matrix):
+    """Bounding box of rect mapped through an (a, b, c, d, e, f) matrix, like fitz.Rect * fitz.Matrix."""
+    a, b, c, d, e, f = matrix
+    x0, y0, x1, y1 = rect
+    corners = [(a * x + c * y + e, b * x + d * y + f) for x in (x0, x1) for y in (y0, y1)]
+    return (min(x for x, _ in corners), min(y for _, y in corners),
+            max(x for x, _ in corners), max(y for _, y in corners))
+
+
+class PageWords:
+    """
+    Grid index of one page's words. Coordinates are PDF points, origin
+    top-left, in the unrotated page like get_text("words"). `rect` is the page
+    as displayed (page.rect) and, on a page with /Rotate, `derotation` maps
+    displayed points to word coordinates (page.derotation_matrix).
+    """
+
+    def __init__(self, words, rect, cell=GRID_CELL, derotation=None):
+        self.words = [Word(*w[:8]) for w in words]
+        self.rect = tuple(rect)
+        self.derotation = tuple(derotation) if derotation is not None else None
+        self.cell = cell
+        self._grid = {}
+        self._by_token = {}
+        self._lines = {}
+        for i, w in enumerate(self.words):
+            for key in self._cells(w.x0, w.y0, w.x1, w.y1):
+                self._grid.setdefault(key, []).append(i)
+            token = _token(w.text)
+            if token:
+                self._by_token.setdefault(token, []).append(i)
+            self._lines.setdefault((w.block, w.line), []).append(w)
+        for line in self._lines.values():
+            line.sort(key=_reading_order)
+
+    @classmethod
+    def from_page(cls, page, cell=GRID_CELL):
+        return cls(page.get_text("words"), page.rect, cell, page_derotation(page))
+
+    def __len__(self):
+        return len(self.words)
+
+    def _cells(self, x0, y0, x1, y1):
+        c = self.cell
+        for cx in range(int(x0 // c), int(x1 // c) + 1):
+            for cy in range(int(y0 // c), int(y1 // c) + 1):
+                yield cx, cy
+
+    def words_in(self, rect):
+        """Words whose box intersects rect (x0, y0, x1, y1), in reading order."""
+        x0, y0, x1, y1 = tuple(rect)
+        seen = set()
+        found = []
+        for key in self._cells(x0, y0, x1, y1):
+            for i in self._grid.get(key, ()):
+                if i in seen:
+                    continue
+                seen.add(i)
+                w = self.words[i]
+                if w.x0 < x1 and w.x1 > x0 and w.y0 < y1 and w.y1 > y0:
+                    found.append(w)
+        found.sort(key=_reading_order)
+        return found
+
+    def region_words(self, region):
+        """
+        Words inside a region given as fractions of the displayed page, e.g.
+        (0.78, 0.0, 1.0, 1.0) for its right-hand strip whatever the page's /Rotate.
+        """
+        px0, py0, px1, py1 = self.rect
+        fx0, fy0, fx1, fy1 = region
+        width, height = px1 - px0, py1 - py0
+        rect = (px0 + width * fx0, py0 + height * fy0, px0 + width * fx1, py0 + height * fy1)
+        if self.derotation is not None:
+            rect = _transform_rect(rect, self.derotation)
+        return self.words_in(rect)
+
+    def line_words(self, key):
+        return self._lines.get(key, [])
+
+    def find(self, label, alone=False):
+        """
+        Every place the label's words appear consecutively on one text line, in
+        reading order. With alone=True the line must hold nothing but the label.
+        """
+        tokens = [t for t in (_token(part) for part in label.split()) if t]
+        if not tokens:
+            return []
+        hits = []
+        for i in self._by_token.get(tokens[0], ()):
+            first = self.words[i]
+            line = self._lines[(first.block, first.line)]
+            pos = line.index(first)
+            span = line[pos:pos + len(tokens)]
+            if len(span) < len(tokens) or any(_token(w.text) != t for w, t in zip(span, tokens)):
+                continue
+            if alone and len([w for w in line if _token(w.text)]) != len(tokens):
+                continue
+            hits.append(LabelHit(tuple(span)))
+        hits.sort(key=lambda hit: _reading_order(hit.words[0]))
+        return hits
+
+    def right_of(self, hit):
+        """Words to the right of a label on the same visual line, up to the first wide gap."""
+        line = self.line_words(hit.line_key)
+        last = hit.words[-1]
+        after = line[line.index(last) + 1:]
+        if after:
+            return after
+        height = max(hit.y1 - hit.y0, 1.0)
+        mid = (hit.y0 + hit.y1) / 2
+        candidates = [
+            w for w in self.words_in((hit.x1, hit.y0, self.rect[2], hit.y1))
+            if w.x0 >= hit.x1 - 1 and w.y0 <= mid <= w.y1
+        ]
+        candidates.sort(key=lambda w: w.x0)
+        run = []
+        edge = hit.x1
+        for w in candidates:
+            if w.x0 - edge > (RIGHT_GAP_LINES if run else RIGHT_LEAD_LINES) * height:
+                break
+            run.append(w)
+            edge = w.x1
+        return run
+
+    def below(self, hit):
+        """The text line directly under a label (overlapping it horizontally), from the label's left edge."""
+        height = max(hit.y1 - hit.y0, 1.0)
+        candidates = [
+            w for w in self.words_in((hit.x0, hit.y1, hit.x1, hit.y1 + BELOW_DROP_LINES * height))
+            if w.y0 >= hit.y1 - height / 2 and w not in hit.words
+        ]
+        if not candidates:
+            return []
+        nearest = min(candidates, key=lambda w: (w.y0, w.x0))
+        return [w for w in self.line_words((nearest.block, nearest.line)) if w.x1 > hit.x0]
+
+    def value_for(self, label, direction="auto", alone=False):
+        """
+        Text of the first value found next to `label`: "right", "below", or
+        "auto" (right of the label, else below it). "" when there is none.
+        """
+        for hit in self.find(label, alone=alone):
+            words = []
+            if direction in ("right", "auto"):
+                words = self.right_of(hit)
+            if not words and direction in ("below", "auto"):
+                words = self.below(hit)
+            if words:
+                return _text(words)
+        return ""